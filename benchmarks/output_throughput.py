@@ -0,0 +1,124 @@
+"""Bulk output throughput of the terminal output pipeline.
+
+Feeds a large in-memory stream (similar to `cat` of a big log) to the
+session of a `Terminal`, as the reactor would, and measures how long it takes
+until everything is rendered in the Text widget. The same stream is also
+rendered the way mono used to do it (one insert/see/mark_set per read chunk)
+for comparison, and through a headless `Session`.
+
+Every run is repeated with the session recorded to an asciicast file, to
+measure the overhead of recording.
+
+The Tk runs require a display, they are skipped without one.
+Usage: python benchmarks/output_throughput.py [MB]"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+
+from mono import Session, Terminal
+
+CHUNK = 1024  # PtyProcessUnicode.read() default size
+LINE = "2024-01-01 12:00:00 INFO worker.3 processed request id=123456 in 4.2ms\n"
+
+
+def make_stream(megabytes: float) -> list[str]:
+    data = LINE * int(megabytes * 1024 * 1024 / len(LINE))
+    return [data[i : i + CHUNK] for i in range(0, len(data), CHUNK)]
+
+
+class Bench(Terminal):
+    name = shell = "bench"
+
+
+def record(session: Session, directory: str) -> None:
+    session.start_recording(os.path.join(directory, "bench.cast"))
+
+
+def run_session(chunks, directory=None) -> float:
+    session = Session()
+    if directory:
+        record(session, directory)
+
+    start = time.perf_counter()
+    for chunk in chunks:
+        session.feed(chunk)
+    while session.pending:
+        session.process(1 << 20)
+    session.stop_recording()
+    return time.perf_counter() - start
+
+
+def run_pipeline(root, chunks, directory=None) -> float:
+    terminal = Bench(root)
+    terminal.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    if directory:
+        record(terminal.session, directory)
+
+    def reader() -> None:
+        for chunk in chunks:
+            terminal.session.feed(chunk)
+
+    thread = threading.Thread(target=reader)
+    start = time.perf_counter()
+    thread.start()
+    terminal._schedule_flush()
+    while thread.is_alive() or terminal.session.pending:
+        root.update()
+    terminal.session.stop_recording()
+    elapsed = time.perf_counter() - start
+
+    terminal.destroy()
+    return elapsed
+
+
+def run_legacy(root, chunks) -> float:
+    terminal = Bench(root)
+    terminal.pack(fill=tk.BOTH, expand=True)
+    root.update()
+
+    start = time.perf_counter()
+    for chunk in chunks:
+        terminal._insert(chunk)
+        root.update_idletasks()
+    root.update()
+    elapsed = time.perf_counter() - start
+
+    terminal.destroy()
+    return elapsed
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    chunks = make_stream(megabytes)
+
+    with tempfile.TemporaryDirectory() as directory:
+        session = run_session(chunks)
+        recorded = run_session(chunks, directory)
+        print(f"headless session:   {megabytes / session:8.2f} MB/s")
+        print(f"  recorded:         {megabytes / recorded:8.2f} MB/s")
+
+        try:
+            root = tk.Tk()
+        except tk.TclError:
+            print("no display, skipping the Tk runs")
+            return
+        root.geometry("800x400")
+
+        legacy = run_legacy(root, chunks)
+        pipeline = run_pipeline(root, chunks)
+        recorded = run_pipeline(root, chunks, directory)
+        root.destroy()
+
+    print(f"per-chunk insert:   {megabytes / legacy:8.2f} MB/s")
+    print(f"frame pipeline:     {megabytes / pipeline:8.2f} MB/s")
+    print(f"  recorded:         {megabytes / recorded:8.2f} MB/s")
+    print(f"speedup:            {legacy / pipeline:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Microbenchmark of the output parser against the old regex stripping.
+
+Builds multi-MB streams resembling captured shell output and parses them in
+pty sized chunks, once with the regex path mono used before the streaming
+parser (`replace_newline` + `splitlines` + `strip_ansi_escape_sequences` per
+chunk) and once with `mono.ansi.Parser`.
+
+Usage: python benchmarks/parser.py [MB] [chunk size]"""
+
+import sys
+import time
+
+from mono.ansi import Parser, replace_newline, strip_ansi_escape_sequences
+
+STREAMS = {
+    "plain log": "2024-01-01 12:00:00 INFO worker.3 processed request id=123456 in 4.2ms\r\n",
+    "ls --color": (
+        "\x1b[0m\x1b[01;34mbenchmarks\x1b[0m  \x1b[01;34mdocs\x1b[0m  "
+        "\x1b[01;32mrun.sh\x1b[0m  README.md  \x1b[01;31marchive.tar.gz\x1b[0m\r\n"
+    ),
+    "compiler": (
+        "\x1b[1msrc/main.c:12:5: \x1b[0m\x1b[1;31merror: \x1b[0m\x1b[1m"
+        "implicit declaration of function 'foo'\x1b[0m\r\n   12 |     \x1b[1;31mfoo\x1b[0m();\r\n"
+    ),
+    "progress": "\r\x1b[K 42%|\x1b[32m████████▍          \x1b[0m| 42/100 [00:04<00:05, 9.8it/s]",
+}
+
+
+def legacy(chunks) -> None:
+    for buf in chunks:
+        p = buf.find("\x1b]0;")
+        if p != -1:
+            buf = buf[:p]
+        buf = [
+            strip_ansi_escape_sequences(i) for i in replace_newline(buf).splitlines()
+        ]
+        "\n".join(buf)
+
+
+def streaming(chunks) -> None:
+    feed = Parser().feed
+    for buf in chunks:
+        feed(buf)
+
+
+def measure(fn, chunks) -> float:
+    start = time.perf_counter()
+    fn(chunks)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+
+    print(f"{'stream':<12} {'regex MB/s':>12} {'parser MB/s':>12} {'ratio':>8}")
+    for name, sample in STREAMS.items():
+        data = sample * int(megabytes * 2**20 / len(sample))
+        chunks = [data[i : i + size] for i in range(0, len(data), size)]
+        mb = len(data) / 2**20
+
+        old = measure(legacy, chunks)
+        new = measure(streaming, chunks)
+        print(f"{name:<12} {mb / old:>12.1f} {mb / new:>12.1f} {old / new:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""CPU use of reading many ptys, one thread per pty versus the shared reactor.
+
+For 1, 10 and 100 shells, measures the CPU time used by this process while
+the shells are idle, and the CPU and wall time needed to read a burst of
+output from every shell at once. Does not need a display.
+
+Usage: python benchmarks/reactor.py [idle seconds] [lines per shell]"""
+
+import sys
+import threading
+import time
+
+from ptyprocess import PtyProcess
+
+from mono.reactor import Reactor
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.bytes = 0
+        self.closed = 0
+        self.lock = threading.Lock()
+
+    def on_data(self, data) -> None:
+        with self.lock:
+            self.bytes += len(data)
+
+
+def spawn(n: int) -> list:
+    return [PtyProcess.spawn(["/bin/sh"], echo=False) for _ in range(n)]
+
+
+def threaded(ptys, counter) -> None:
+    def loop(p) -> None:
+        while True:
+            try:
+                counter.on_data(p.read(1024))
+            except EOFError:
+                return
+
+    for p in ptys:
+        threading.Thread(target=loop, args=(p,), daemon=True).start()
+
+
+def reactor(ptys, counter) -> None:
+    r = Reactor()
+    for p in ptys:
+        r.register(p.fd, counter.on_data)
+
+
+def measure(mode, n: int, idle: float, lines: int) -> tuple:
+    ptys = spawn(n)
+    counter = Counter()
+    mode(ptys, counter)
+    time.sleep(0.5)
+
+    cpu = time.process_time()
+    time.sleep(idle)
+    idle_cpu = (time.process_time() - cpu) / idle
+
+    expected = counter.bytes + n * lines * len("y\r\n")
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for p in ptys:
+        p.write(f"yes | head -n {lines}\n".encode())
+    while counter.bytes < expected and time.perf_counter() - wall < 120:
+        time.sleep(0.01)
+    load_wall = time.perf_counter() - wall
+    load_cpu = time.process_time() - cpu
+
+    for p in ptys:
+        p.terminate(force=True)
+    return idle_cpu, load_cpu, load_wall, counter.bytes / 2**20 / load_wall
+
+
+def main() -> None:
+    idle = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+
+    print(
+        f"{'mode':<8} {'shells':>6} {'idle cpu %':>10} {'load cpu s':>10} "
+        f"{'load wall s':>11} {'MB/s':>8}"
+    )
+    for n in (1, 10, 100):
+        for name, mode in (("threads", threaded), ("reactor", reactor)):
+            idle_cpu, cpu, wall, rate = measure(mode, n, idle, lines)
+            print(
+                f"{name:<8} {n:>6} {idle_cpu * 100:>10.2f} {cpu:>10.2f} "
+                f"{wall:>11.2f} {rate:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Memory and insert cost of TerminalText over a long output run.
+
+Appends lines in frame sized batches (like the terminal output pipeline does)
+and prints the resident memory and the average insert cost for every million
+lines, once with an unbounded widget and once with `max_scrollback_lines`.
+With the limit set both columns should stay flat.
+
+The same run is then done on the `Scrollback` store used by the virtualized
+terminals, where the whole history is kept.
+
+Requires a display. Usage: python benchmarks/scrollback.py [lines] [limit]"""
+
+import os
+import sys
+import time
+import tkinter as tk
+
+from mono.scrollback import Scrollback
+from mono.text import TerminalText
+
+BATCH = 1000
+LINE = "2024-01-01 12:00:00 INFO worker.3 processed request id=123456 in 4.2ms\n"
+
+
+def rss() -> float:
+    """Resident set size in MB (Linux only)."""
+
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def run(root, lines: int, limit: int) -> None:
+    text = TerminalText(root, max_scrollback_lines=limit)
+    text.pack(fill=tk.BOTH, expand=True)
+    batch = LINE * BATCH
+
+    print(f"max_scrollback_lines={limit}")
+    print(f"{'lines':>12} {'rss MB':>10} {'us/insert':>10}")
+
+    elapsed = 0.0
+    inserts = 0
+    for done in range(BATCH, lines + 1, BATCH):
+        start = time.perf_counter()
+        text.append(batch)
+        text.see(tk.END)
+        elapsed += time.perf_counter() - start
+        inserts += 1
+
+        if done % 1_000_000 == 0:
+            root.update()
+            print(f"{done:>12} {rss():>10.1f} {elapsed / inserts * 1e6:>10.1f}")
+            elapsed = 0.0
+            inserts = 0
+
+    text.destroy()
+
+
+def run_store(lines: int) -> None:
+    scrollback = Scrollback()
+    batch = LINE * BATCH
+    base = rss()
+
+    print("Scrollback store")
+    print(f"{'lines':>12} {'rss MB':>10} {'us/write':>10} {'bytes/line':>10}")
+
+    elapsed = 0.0
+    writes = 0
+    for done in range(BATCH, lines + 1, BATCH):
+        start = time.perf_counter()
+        scrollback.write(batch)
+        elapsed += time.perf_counter() - start
+        writes += 1
+
+        if done % 1_000_000 == 0:
+            used = rss()
+            per_line = (used - base) * 2**20 / done
+            print(
+                f"{done:>12} {used:>10.1f} {elapsed / writes * 1e6:>10.1f} {per_line:>10.1f}"
+            )
+            elapsed = 0.0
+            writes = 0
+
+
+def main() -> None:
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    run_store(lines)
+
+    root = tk.Tk()
+    run(root, lines, limit)
+    run(root, min(lines, 2_000_000), None)
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
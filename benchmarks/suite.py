@@ -0,0 +1,449 @@
+"""Benchmark suite, results are written as JSON to track them over releases.
+
+Benchmarks:
+    throughput: MB/s of `cat` of a large file through a pty, processed by a
+        headless `Session` and rendered by a `Terminal`, with the reads and
+        the decoder calls per MB.
+    keystroke: latency of a key typed in the widget (through the
+        `TerminalText` proxy) and of a command echoed back by the shell
+        after `Terminal.enter`.
+    memory: resident memory added by every tab opened in `Terminals`.
+    first_prompt: seconds until the `Default`, `Bash` and `Python` shells
+        print their first prompt.
+    restore: time to interactive of the active tab and shells spawned after
+        restoring many tabs at once, with and without `lazy_spawn`.
+    import: seconds to `import mono` in a fresh interpreter.
+    search: latency of `Session.search` (first match and whole search) for
+        growing scrollback sizes, plain, case insensitive and regex, with and
+        without the trigram index, next to a `Text.search` of the widget.
+    tabs: time to add, switch to and close a tab with a growing number of
+        tabs open in `Terminals`, and the widgets of the tab strip.
+    background: CPU time of busy terminals in background tabs, with their
+        rendering suspended and rendered as if they were visible.
+    progress: redraws per second of a progress bar processed by a headless
+        `Session`, with the lines and characters left in the scrollback and
+        the updates per frame.
+
+The Tk parts need a display, they are reported as skipped without one.
+
+Usage: python benchmarks/suite.py [-o results.json] [--megabytes N] [name ...]"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+import mono
+from mono import Session, Terminal
+from mono.shells import Bash, Default, Python
+from mono.shells.bash import INTEGRATION
+from mono.shells.default import default_shell
+
+LINE = "2024-01-01 12:00:00 INFO worker.3 processed request id=123456 in 4.2ms\n"
+
+
+class Bench(Terminal):
+    name = shell = "bench"
+
+
+def rss() -> float:
+    """Resident set size in MB (Linux only)."""
+
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def summary(samples: list[float], scale: float = 1.0) -> dict:
+    samples = sorted(i * scale for i in samples)
+    return {
+        "median": statistics.median(samples),
+        "p90": samples[int(len(samples) * 0.9)],
+        "max": samples[-1],
+        "samples": len(samples),
+    }
+
+
+def wait(predicate, timeout: float, step=None) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        if step:
+            step()
+        else:
+            time.sleep(0.001)
+    return True
+
+
+def make_root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.geometry("800x400")
+    return root
+
+
+def bench_throughput(args) -> dict:
+    with tempfile.NamedTemporaryFile("w", suffix=".log") as f:
+        f.write(LINE * int(args.megabytes * 2**20 / len(LINE)))
+        f.flush()
+        size = os.path.getsize(f.name) / 2**20
+
+        session = Session(["cat", f.name], autoprocess=True)
+        metrics = session.enable_metrics()
+        start = time.perf_counter()
+        session.start()
+        wait(lambda: not session.alive and not session.pending, 600)
+        results = {
+            "megabytes": size,
+            "session": size / (time.perf_counter() - start),
+            "reads_per_mb": metrics.reads / size,
+            "bytes_per_read": metrics.bytes_read / max(metrics.reads, 1),
+        }
+
+        # processed once per frame like `Terminal`, the output is decoded
+        # once per frame too
+        def frame() -> None:
+            time.sleep(0.016)
+            session.process(Terminal.frame_budget)
+
+        session = Session(["cat", f.name])
+        metrics = session.enable_metrics()
+        session.start()
+        wait(lambda: not session.alive and not session.pending, 600, frame)
+        results["decodes_per_mb"] = metrics.decodes / size
+
+        if not (root := make_root()):
+            results["terminal"] = "skipped: no display"
+            return results
+
+        terminal = Bench(root)
+        terminal.pack(fill=tk.BOTH, expand=True)
+        root.update()
+        start = time.perf_counter()
+        terminal.session.start(["cat", f.name])
+        terminal._schedule_flush()
+        wait(
+            lambda: not terminal.alive and not terminal.session.pending,
+            600,
+            root.update,
+        )
+        results["terminal"] = size / (time.perf_counter() - start)
+        root.destroy()
+        return results
+
+
+def bench_keystroke(args) -> dict:
+    if not (root := make_root()):
+        return {"skipped": "no display"}
+
+    terminal = Default(root)
+    terminal.pack(fill=tk.BOTH, expand=True)
+    wait(lambda: terminal.session.ready, 10, root.update)
+
+    # typing in the widget, through the proxy guarding the input mark
+    typed = []
+    for _ in range(200):
+        start = time.perf_counter()
+        terminal.text.insert("insert", "a")
+        root.update_idletasks()
+        typed.append(time.perf_counter() - start)
+    terminal.text.delete("input", "end")
+
+    # a command sent with enter, until its output is shown
+    echoed = []
+    for i in range(args.rounds):
+        marker = f"mono{i}x"
+        terminal.text.insert("input", f"echo {marker[:-1]}''{marker[-1]}")
+        start = time.perf_counter()
+        terminal.enter()
+        wait(lambda: marker in terminal.text.get("1.0", "end"), 10, root.update)
+        echoed.append(time.perf_counter() - start)
+
+    root.destroy()
+    return {"type_ms": summary(typed, 1000), "enter_ms": summary(echoed, 1000)}
+
+
+def bench_memory(args) -> dict:
+    if not (root := make_root()):
+        return {"skipped": "no display"}
+
+    terminals = mono.Terminals(root)
+    terminals.pack(fill=tk.BOTH, expand=True)
+    root.update()
+
+    base = rss()
+    for _ in range(args.tabs):
+        terminals.add_default_terminal()
+        root.update()
+    added = rss() - base
+
+    root.destroy()
+    return {"tabs": args.tabs, "mb_per_tab": added / args.tabs}
+
+
+def bench_restore(args) -> dict:
+    if not (root := make_root()):
+        return {"skipped": "no display"}
+
+    results = {"tabs": args.tabs}
+    for lazy in (False, True):
+        terminals = mono.Terminals(root, lazy_spawn=lazy)
+        terminals.pack(fill=tk.BOTH, expand=True)
+        for _ in range(args.tabs):
+            terminals.add_default_terminal()
+        active = terminals.active_terminal
+        wait(lambda: active.time_to_interactive is not None, 30, root.update)
+
+        results["lazy" if lazy else "eager"] = {
+            "time_to_interactive": active.time_to_interactive,
+            "spawned": sum(t.session.p is not None for t in terminals.active_terminals),
+        }
+        terminals.delete_all_terminals()
+        terminals.destroy()
+
+    root.destroy()
+    return results
+
+
+def bench_first_prompt(args) -> dict:
+    results = {}
+    for cls in (Default, Bash, Python):
+        shell, integration = cls.shell, cls.integration
+        if cls is Default:
+            # resolved when a Default terminal is created
+            shell = default_shell()
+            if os.path.basename(shell or "") == "bash":
+                integration = INTEGRATION
+
+        if not (shell := shutil.which(shell or "")):
+            results[cls.name] = "skipped: not installed"
+            continue
+
+        env = {**os.environ, **integration} if integration else None
+        samples = []
+        for _ in range(args.rounds):
+            session = Session([shell], env=env, prompt=cls.prompt, autoprocess=True)
+            start = time.perf_counter()
+            session.start()
+            if wait(lambda: session.ready, 10):
+                samples.append(time.perf_counter() - start)
+            session.write("exit\r\n" if cls is not Python else "exit()\r\n")
+        results[cls.name] = summary(samples) if samples else "no prompt detected"
+    return results
+
+
+def bench_import(args) -> dict:
+    code = "import time; t = time.perf_counter(); import mono; print(time.perf_counter() - t)"
+    samples = [
+        float(subprocess.check_output([sys.executable, "-c", code], text=True))
+        for _ in range(args.rounds)
+    ]
+    return summary(samples)
+
+
+def bench_search(args) -> dict:
+    queries = {
+        "plain": ("id=123456 ", {}),
+        "ignore_case": ("ID=123456 ", {"ignore_case": True}),
+        "regex": (r"id=12345\d ", {"regex": True}),
+    }
+    root = make_root()
+    results = {}
+    for lines in args.lines:
+        session = Session()
+        session.scrollback.write(
+            "".join(LINE.replace("123456", str(i)) for i in range(lines))
+        )
+
+        def run(pattern, kwargs) -> dict:
+            first = []
+            start = time.perf_counter()
+            search = session.search(
+                pattern,
+                callback=lambda _: first or first.append(time.perf_counter()),
+                **kwargs,
+            )
+            search.wait()
+            end = time.perf_counter()
+            return {"first": (first[0] if first else end) - start, "total": end - start}
+
+        result = {name: run(*query) for name, query in queries.items()}
+        start = time.perf_counter()
+        session.enable_search_index().wait()
+        result["index_build"] = time.perf_counter() - start
+        result["indexed"] = {name: run(*query) for name, query in queries.items()}
+        session.disable_search_index()
+
+        if root:
+            text = tk.Text(root)
+            text.insert("end", "".join(session.scrollback.lines(0, lines)))
+            start = time.perf_counter()
+            text.search("id=123456 ", "end", backwards=True)
+            result["text_widget"] = time.perf_counter() - start
+            text.destroy()
+        else:
+            result["text_widget"] = "skipped: no display"
+        results[lines] = result
+
+    if root:
+        root.destroy()
+    return results
+
+
+def bench_tabs(args) -> dict:
+    if not (root := make_root()):
+        return {"skipped": "no display"}
+
+    results = {}
+    for count in (10, 100, 500):
+        terminals = mono.Terminals(root)
+        terminals.pack(fill=tk.BOTH, expand=True)
+        root.update()
+
+        start = time.perf_counter()
+        for _ in range(count):
+            terminals.add_terminal(Bench(terminals, standalone=False))
+        root.update()
+        added = time.perf_counter() - start
+
+        opened = list(terminals.active_terminals)
+        switched = []
+        for _ in range(args.rounds):
+            terminal = random.choice(opened)
+            start = time.perf_counter()
+            terminals.set_active_terminal(terminal)
+            root.update()
+            switched.append(time.perf_counter() - start)
+        widgets = len(terminals.tabs.winfo_children())
+
+        random.shuffle(opened)
+        start = time.perf_counter()
+        for terminal in opened:
+            terminals.tabs.close_tab(terminals.tabs.get_tab(terminal))
+            root.update()
+        closed = time.perf_counter() - start
+
+        results[count] = {
+            "add_ms": added / count * 1000,
+            "switch_ms": summary(switched, 1000),
+            "close_ms": closed / count * 1000,
+            "tab_widgets": widgets,
+        }
+        terminals.destroy()
+
+    root.destroy()
+    return results
+
+
+def bench_background(args) -> dict:
+    if not (root := make_root()):
+        return {"skipped": "no display"}
+
+    results = {"tabs": args.tabs}
+    for suspended in (True, False):
+        terminals = mono.Terminals(root)
+        terminals.pack(fill=tk.BOTH, expand=True)
+        for _ in range(args.tabs):
+            terminals.add_terminal(Bench(terminals, standalone=False))
+        opened = list(terminals.active_terminals)
+        if not suspended:
+            for terminal in opened:
+                terminal.resume_rendering()
+        root.update()
+
+        start = time.process_time()
+        for _ in range(args.rounds):
+            for terminal in opened:
+                terminal.session.feed(LINE * 500)
+                terminal._flush()
+            root.update()
+        results["suspended" if suspended else "rendered"] = {
+            "cpu_s": time.process_time() - start
+        }
+        terminals.destroy()
+
+    root.destroy()
+    return results
+
+
+def bench_progress(args) -> dict:
+    session = Session()
+    redraws = 100_000
+    frame = 1000
+    updates = 0
+
+    start = time.perf_counter()
+    for i in range(0, redraws, frame):
+        for j in range(i, i + frame):
+            percent = j * 100 // redraws
+            session.feed(f"\r{percent:3}% [{'#' * (percent // 5):20}] file {j}")
+        updates += len(session.process())
+    elapsed = time.perf_counter() - start
+
+    scrollback = session.scrollback
+    return {
+        "redraws_per_s": redraws / elapsed,
+        "lines": len(scrollback),
+        "chars": sum(len(line) for line in scrollback.lines(0, len(scrollback))),
+        "updates_per_frame": updates / (redraws // frame),
+    }
+
+
+BENCHMARKS = {
+    "throughput": bench_throughput,
+    "keystroke": bench_keystroke,
+    "memory": bench_memory,
+    "first_prompt": bench_first_prompt,
+    "restore": bench_restore,
+    "import": bench_import,
+    "search": bench_search,
+    "tabs": bench_tabs,
+    "background": bench_background,
+    "progress": bench_progress,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", choices=[[], *BENCHMARKS], default=[])
+    parser.add_argument("-o", "--output", help="JSON file, printed by default")
+    parser.add_argument("--megabytes", type=float, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--tabs", type=int, default=10)
+    parser.add_argument(
+        "--lines", type=int, nargs="+", default=[100_000, 500_000, 1_000_000]
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.names or BENCHMARKS:
+        print(f"running {name}...", file=sys.stderr)
+        results[name] = BENCHMARKS[name](args)
+
+    report = {
+        "mono": mono.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+        "results": results,
+    }
+    data = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,247 @@
-import re
+"""Streaming parser for the VT/ANSI output of the shells.
+
+`Parser.feed` takes the output as it is read from the pty and turns it into a
+list of typed events in a single pass. Escape sequences that are split across
+two reads are kept back and completed with the next call, so no partial
+sequence ever ends up in the widget.
 
+Newlines in `Text` events are normalized, `\\r\\n` is always reported as `\\n`.
+"""
+
+import re
+import typing
 
 SEQ = re.compile(r'\x1b(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 NEWLINE = re.compile(r'\x1b\[\d+\;1H')
 
+
 def strip_ansi_escape_sequences(string):
     return SEQ.sub('', string)
 
+
 def replace_newline(string):
     return NEWLINE.sub('\n', string)
+
+
+class Text(typing.NamedTuple):
+    """Run of printable text, may contain newlines and tabs."""
+
+    text: str
+
+
+class Control(typing.NamedTuple):
+    """C0 control character other than newline and tab (e.g. \\r, \\b, \\a)."""
+
+    char: str
+
+
+class SGR(typing.NamedTuple):
+    """Select Graphic Rendition, colors and text attributes."""
+
+    params: tuple
+
+
+class CursorMove(typing.NamedTuple):
+    """Cursor movement (CUU, CUD, CUF, CUB, CNL, CPL, CHA, CUP, HVP, VPA)."""
+
+    command: str
+    params: tuple
+
+
+class CSI(typing.NamedTuple):
+    """Any other control sequence (erase, scroll, modes...)."""
+
+    command: str
+    params: tuple
+    private: str = ""
+
+
+class Title(typing.NamedTuple):
+    """Window title set with OSC 0 or OSC 2."""
+
+    title: str
+
+
+class OSC(typing.NamedTuple):
+    """Any other operating system command, e.g. OSC 133 shell integration."""
+
+    command: str
+    data: str
+
+
+class ESC(typing.NamedTuple):
+    """Two or three character escape sequence (e.g. ESC 7, ESC M)."""
+
+    command: str
+    intermediates: str = ""
+
+
+CURSOR_MOVES = frozenset("ABCDEFGHfd")
+
+SEQUENCE = re.compile(
+    # 1-3: CSI params, intermediates, final
+    r"\x1b\[([0-?]*)([ -/]*)([@-~])"
+    # 4: OSC, terminated by BEL or ST
+    r"|\x1b\]([^\x07\x1b]*)(?:\x07|\x1b\\)"
+    # 5: DCS, SOS, PM and APC strings, ignored
+    r"|\x1b[PX^_](.*?)\x1b\\"
+    # 6-7: ESC intermediates, final
+    r"|\x1b([ -/]*)([0-OQ-WYZ\\`-~])"
+    # 8: single control character other than \t and \n
+    r"|([\x00-\x08\x0b-\x1f\x7f])",
+    re.S,
+)
+
+# splits the output into alternating text runs and sequences, an ESC that
+# does not start a complete sequence is split out alone
+SPLIT = re.compile(
+    r"([\x00-\x08\x0b-\x1f\x7f]"
+    r"(?:(?<=\x1b)(?:\[[0-?]*[ -/]*[@-~]"
+    r"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|[PX^_].*?\x1b\\"
+    r"|[ -/]*[0-OQ-WYZ\\`-~]))?)",
+    re.S,
+)
+
+PARTIAL = re.compile(
+    r"\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[PX^_].*|[ -/]*)\Z",
+    re.S,
+)
+
+
+def parse_params(params: str) -> tuple:
+    """Parse a CSI parameter string into a tuple of ints. Missing parameters are 0.
+
+    Colon separated sub-parameters (`38:2::255:0:0`) are flattened into the
+    equivalent semicolon form (`38;2;255;0;0`)."""
+
+    if not params:
+        return ()
+
+    if ":" in params:
+        fields = []
+        for param in params.split(";"):
+            sub = param.split(":")
+            # drop the color space id of 38:2:<id>:r:g:b
+            if len(sub) == 6 and sub[1] == "2":
+                del sub[2]
+            fields.extend(sub)
+    else:
+        fields = params.split(";")
+
+    return tuple(int(i) if i.isdigit() else 0 for i in fields)
+
+
+class Parser:
+    """Incremental VT/ANSI parser.
+
+    Keeps the state of an incomplete escape sequence between calls, so the
+    output can be fed in chunks of any size.
+
+    Args:
+        max_pending (int): Maximum length of an incomplete sequence kept across
+            calls. Longer sequences (e.g. an unterminated OSC) are dropped."""
+
+    def __init__(self, max_pending: int = 1 << 16) -> None:
+        self.max_pending = max_pending
+        self._pending = ""
+        self._cache = {}
+
+    @property
+    def pending(self) -> str:
+        """Incomplete escape sequence (or trailing carriage return) carried over
+        to the next call."""
+
+        return self._pending
+
+    def reset(self) -> None:
+        """Drop any incomplete escape sequence."""
+
+        self._pending = ""
+
+    def feed(self, data: str) -> list:
+        """Parse a chunk of output.
+
+        Args:
+            data (str): Output read from the pty.
+
+        Returns:
+            list: Events found in the chunk."""
+
+        if self._pending:
+            data = self._pending + data
+            self._pending = ""
+        if "\r" in data:
+            data = data.replace("\r\n", "\n")
+            if data[-1] == "\r":
+                # may be the start of a \r\n split between two reads
+                self._pending = "\r"
+                data = data[:-1]
+
+        events = []
+        append = events.append
+        cache = self._cache
+        get = cache.get
+
+        parts = iter(SPLIT.split(data))
+        while (text := next(parts, None)) is not None:
+            if text:
+                append(Text(text))
+            if (seq := next(parts, None)) is None:
+                break
+
+            if (event := get(seq)) is None:
+                if seq == "\x1b":
+                    rest = seq + "".join(parts)
+                    if PARTIAL.match(rest):
+                        # sequence continues in the next chunk
+                        if len(rest) <= self.max_pending:
+                            self._pending = rest
+                        break
+                    # otherwise a malformed sequence, only the ESC is dropped
+                    parts = iter(SPLIT.split(rest[1:]))
+                    continue
+
+                if (event := self._sequence(seq)) is None:
+                    continue
+                if seq[1:2] != "]":
+                    # control sequences repeat a lot (colors, cursor moves)
+                    if len(cache) >= 1024:
+                        cache.clear()
+                    cache[seq] = event
+
+            append(event)
+
+        return events
+
+    @staticmethod
+    def _sequence(seq: str) -> tuple:
+        m = SEQUENCE.match(seq)
+
+        match m.lastindex:
+            case 3:
+                params, _, command = m.group(1, 2, 3)
+                private = ""
+                if params and params[0] in "<=>?":
+                    private = params[0]
+                    params = params[1:]
+
+                if private:
+                    return CSI(command, parse_params(params), private)
+                if command == "m":
+                    return SGR(parse_params(params))
+                if command in CURSOR_MOVES:
+                    return CursorMove(command, parse_params(params))
+                return CSI(command, parse_params(params))
+            case 4:
+                command, _, arg = m.group(4).partition(";")
+                if command in ("0", "2"):
+                    return Title(arg)
+                return OSC(command, arg)
+            case 7:
+                return ESC(m.group(7), m.group(6))
+            case 8:
+                return Control(seq)
+
+        # DCS, SOS, PM and APC payloads are not interpreted
+        return None
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import atexit
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from itertools import accumulate
+
+# directory of the history files, one per shell type, None to keep the
+# histories in memory only
+DIRECTORY = os.path.join(os.path.expanduser("~"), ".mono", "history")
+
+# histories by shell type, shared by the terminals of the process
+_histories = {}
+
+_ESCAPE = re.compile(r"\\(.)")
+
+
+def get_history(name: str) -> History:
+    """History shared by all the terminals of a shell type, stored in
+    `DIRECTORY`.
+
+    Args:
+        name (str): Name of the shell type.
+
+    Returns:
+        History: The history, loaded on first use."""
+
+    if (history := _histories.get(name)) is None:
+        path = None
+        if DIRECTORY:
+            path = os.path.join(DIRECTORY, re.sub(r"[^\w.-]", "_", name))
+        history = _histories[name] = History(path)
+    return history
+
+
+class History:
+    """Command history, persisted to an append-only file.
+
+    The file is only read when the history is first used. New commands are
+    appended to the file by a background thread every `flush_interval`
+    seconds, so saving never blocks the UI. Consecutive duplicates are not
+    kept.
+
+    Prefix lookups use a sorted index of the distinct commands, and fuzzy
+    searches a single string of them, newest first, scanned by a regular
+    expression. Both are built on first use and stay fast with hundreds of
+    thousands of entries.
+
+    Args:
+        path (str): File of the history, None to keep it in memory only.
+        flush_interval (float): Seconds between two writes of the file."""
+
+    def __init__(self, path: str = None, flush_interval: float = 1.0) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+
+        # loaded on first use
+        self._entries = None
+        # distinct commands, sorted, and their last position in `_entries`
+        self._sorted = None
+        self._last = None
+        # distinct commands newest first, joined with NUL and their offsets
+        self._recent = None
+
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    @property
+    def entries(self) -> list[str]:
+        """Commands, oldest first."""
+
+        if self._entries is None:
+            self._entries = self._load()
+        return self._entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, i: int) -> str:
+        return self.entries[i]
+
+    def _load(self) -> list[str]:
+        if not self.path:
+            return []
+        try:
+            with open(self.path, encoding="utf-8", errors="replace") as f:
+                entries = f.read().split("\n")
+        except OSError:
+            return []
+
+        if not entries[-1]:
+            entries.pop()
+        for i, entry in enumerate(entries):
+            if "\\" in entry:
+                entries[i] = _ESCAPE.sub(lambda m: "\n" if m[1] == "n" else m[1], entry)
+        return entries
+
+    def add(self, command: str) -> None:
+        """Add a command, written to the file in the background.
+
+        Args:
+            command (str): The command, empty ones are ignored."""
+
+        command = command.strip()
+        entries = self.entries
+        if not command or entries and entries[-1] == command:
+            return
+
+        entries.append(command)
+        if self._last is not None:
+            if command not in self._last:
+                insort(self._sorted, command)
+            self._last[command] = len(entries) - 1
+        self._recent = None
+
+        if self.path and not self._closed:
+            self._pending.append(command)
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run, name="mono-history", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def prefix(self, prefix: str) -> list[str]:
+        """Distinct commands starting with a prefix, newest first.
+
+        Args:
+            prefix (str): Start of the commands."""
+
+        if self._last is None:
+            self._last = {command: i for i, command in enumerate(self.entries)}
+            self._sorted = sorted(self._last)
+
+        lo = bisect_left(self._sorted, prefix)
+        hi = bisect_left(self._sorted, prefix + "\U0010ffff", lo)
+        return sorted(self._sorted[lo:hi], key=self._last.__getitem__, reverse=True)
+
+    def search(self, query: str, limit: int = 100) -> list[str]:
+        """Fuzzy search of the distinct commands: the commands containing the
+        query come first, then those containing its characters in order,
+        newest first in both groups. Case insensitive unless the query has
+        uppercase characters.
+
+        Args:
+            query (str): Text searched.
+            limit (int): Maximum number of commands returned."""
+
+        if self._recent is None:
+            recent = list(dict.fromkeys(reversed(self.entries)))
+            offsets = array("I", accumulate((len(i) + 1 for i in recent), initial=0))
+            self._recent = (recent, "\0".join(recent), offsets)
+        recent, text, offsets = self._recent
+
+        flags = 0 if query != query.lower() else re.IGNORECASE
+        chars = [re.escape(c) for c in query]
+        results = {}
+        for pattern in ("".join(chars), "[^\0]*?".join(chars)):
+            expression = re.compile(pattern, flags)
+            pos = 0
+            while len(results) < limit and (m := expression.search(text, pos)):
+                i = bisect_right(offsets, m.start()) - 1
+                results[recent[i]] = None
+                # continue with the next command
+                pos = offsets[i + 1]
+        return list(results)[:limit]
+
+    def close(self) -> None:
+        """Write the pending commands and stop writing."""
+
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._write()
+        self._write()
+
+    def _write(self) -> None:
+        lines = []
+        while self._pending:
+            command = self._pending.popleft()
+            lines.append(command.replace("\\", "\\\\").replace("\n", "\\n"))
+        if not lines:
+            return
+
+        try:
+            if directory := os.path.dirname(self.path):
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError:
+            # the history is still kept in memory
+            pass
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+
+class Histogram:
+    """Distribution of values in power of two buckets.
+
+    Recording a value is a couple of integer operations, percentiles are
+    estimated from the buckets (within a factor of two) when a snapshot is
+    taken.
+
+    Args:
+        unit (float): Resolution of the first bucket, e.g. 1e-6 for
+            microseconds when recording seconds."""
+
+    def __init__(self, unit: float = 1.0) -> None:
+        self.unit = unit
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[min(int(value / self.unit).bit_length(), 63)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: Histogram) -> None:
+        """Add the values of another histogram with the same unit."""
+
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the `p` percentile."""
+
+        rank = self.count * p / 100
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min((1 << i) * self.unit, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """Counters and histograms of a terminal session.
+
+    Sessions only record metrics once they are enabled (`Session.metrics`
+    is None otherwise), so they cost nothing by default. Times are in
+    seconds.
+
+    Counters:
+        bytes_read: Bytes read from the pty.
+        reads: Number of reads from the pty.
+        decodes: Number of times the output read was decoded (once per
+            processed frame).
+
+    Histograms:
+        parse: Time parsing the output of a frame.
+        process: Time processing a frame (parsing, scrollback, screen).
+        queue_depth: Chunks waiting to be processed at every frame.
+        render: Time rendering a frame in the Text widget.
+        flush: Time of a whole frame, processing and rendering.
+        loop_lag: Delay of the frames on the Tk event loop."""
+
+    counters = ("bytes_read", "reads", "decodes")
+    histograms = {
+        "parse": 1e-6,
+        "process": 1e-6,
+        "queue_depth": 1,
+        "render": 1e-6,
+        "flush": 1e-6,
+        "loop_lag": 1e-6,
+    }
+
+    def __init__(self) -> None:
+        self.bytes_read = 0
+        self.reads = 0
+        self.decodes = 0
+        for name, unit in self.histograms.items():
+            setattr(self, name, Histogram(unit))
+
+    def merge(self, other: Metrics) -> None:
+        """Add the metrics of another session."""
+
+        for name in self.counters:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in self.histograms:
+            getattr(self, name).merge(getattr(other, name))
+
+    def snapshot(self) -> dict:
+        """Current values, histograms as count, mean, p50, p90, p99 and max."""
+
+        result = {name: getattr(self, name) for name in self.counters}
+        for name in self.histograms:
+            result[name] = getattr(self, name).snapshot()
+        return result
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+import typing
+import weakref
+
+from .reactor import Reactor, get_reactor
+from .reaper import close_pty, terminate
+
+if typing.TYPE_CHECKING:
+    from .session import Session
+
+# pools shut down at exit, not kept alive for it
+_pools = weakref.WeakSet()
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    for pool in list(_pools):
+        pool.shutdown()
+
+
+class WarmPty:
+    """A shell spawned ahead of time by a `PtyPool`.
+
+    Its output (rc file output, the first prompt) is kept until it is handed
+    to a session with `Session.start`, then forwarded to that session.
+
+    Args:
+        p (PtyProcess): The pty process.
+        cwd (str): Working directory the shell was spawned in."""
+
+    def __init__(self, p, cwd: str = None) -> None:
+        self.p = p
+        self.cwd = cwd
+        self.reactor = None
+        self.created_at = time.monotonic()
+        self.closed = False
+
+        self._buffer = []
+        self._session = None
+        self._lock = threading.Lock()
+
+    def on_data(self, data: bytes | str) -> None:
+        """Output of the shell, read by the reactor (a thread on windows)."""
+
+        with self._lock:
+            if self._session is None:
+                self._buffer.append(data)
+                return
+        self._forward(data)
+
+    def on_close(self) -> None:
+        with self._lock:
+            self.closed = True
+            session = self._session
+        if session:
+            session._on_close()
+
+    def handoff(self, session: Session) -> None:
+        """Forward the output kept so far and from now on to a session."""
+
+        with self._lock:
+            self._session = session
+            buffer, self._buffer = self._buffer, []
+            for data in buffer:
+                self._forward(data)
+        if self.closed:
+            session._on_close()
+
+    def _forward(self, data: bytes | str) -> None:
+        # reactor reads are bytearrays
+        if isinstance(data, str):
+            self._session.feed(data)
+        else:
+            self._session._on_data(data)
+
+    def _read_loop(self) -> None:
+        """Reader thread used on windows, where ptys are not selectable."""
+
+        while True:
+            try:
+                buf = self.p.read()
+            except (EOFError, OSError):
+                break
+            if buf:
+                self.on_data(buf)
+        self.on_close()
+
+    def kill(self) -> None:
+        """Terminate the shell and close its pty, which must not be read by
+        the reactor anymore."""
+
+        terminate(self.p)
+        close_pty(self.p)
+
+
+class PtyPool:
+    """Pool of shells spawned ahead of time, so that opening a terminal does
+    not wait for the shell to start.
+
+    Every shell command line (and environment) asked for with `acquire` or
+    `warm` is kept at `size` spawned shells by a background thread. Shells
+    not handed out within `ttl` seconds are killed, and a shell that is not
+    asked for anymore within `ttl` is not spawned again. `shutdown` kills
+    all the pooled shells, it is also called at exit.
+
+    Args:
+        size (int): Number of spawned shells kept per command line.
+        ttl (float): Seconds a pooled shell is kept without being used.
+        reactor (Reactor): Reactor reading the pooled ptys, defaults to the
+            shared one."""
+
+    def __init__(
+        self, size: int = 1, ttl: float = 300.0, reactor: Reactor = None
+    ) -> None:
+        self.size = size
+        self.ttl = ttl
+        self.reactor = reactor
+
+        # key -> pooled shells, oldest first
+        self._members = {}
+        # key -> (argv, env, cwd, last use)
+        self._wanted = {}
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = None
+        _pools.add(self)
+
+    @staticmethod
+    def _key(argv: list[str], env: dict = None) -> tuple:
+        return tuple(argv), frozenset(env.items()) if env else None
+
+    def warm(self, argv: list[str], env: dict = None, cwd: str = None) -> None:
+        """Start keeping shells spawned for a command line.
+
+        Args:
+            argv (list): Command line of the shell.
+            env (dict): Environment of the shell, defaults to the current one.
+            cwd (str): Working directory the shells are spawned in."""
+
+        with self._condition:
+            if self._closed:
+                return
+            self._wanted[self._key(argv, env)] = (argv, env, cwd, time.monotonic())
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run, name="mono-pool", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def acquire(
+        self, argv: list[str], env: dict = None, cwd: str = None
+    ) -> WarmPty | None:
+        """Take a pooled shell, pass it to `Session.start`. The pool is topped
+        up again in the background.
+
+        Args:
+            argv (list): Command line of the shell.
+            env (dict): Environment of the shell, defaults to the current one.
+            cwd (str): Working directory new pooled shells are spawned in.
+
+        Returns:
+            WarmPty: The shell, or None when none is ready (its working
+                directory may differ from `cwd`)."""
+
+        key = self._key(argv, env)
+        with self._condition:
+            members = self._members.get(key, [])
+            while members:
+                member = members.pop(0)
+                if not member.closed:
+                    break
+            else:
+                member = None
+        self.warm(argv, env, cwd)
+        return member
+
+    def __len__(self) -> int:
+        """Number of pooled shells."""
+
+        with self._condition:
+            return sum(len(members) for members in self._members.values())
+
+    def shutdown(self) -> None:
+        """Kill the pooled shells and stop spawning new ones."""
+
+        with self._condition:
+            self._closed = True
+            members = [m for members in self._members.values() for m in members]
+            self._members.clear()
+            self._wanted.clear()
+            self._condition.notify()
+
+        for member in members:
+            self._discard(member)
+
+    def _spawn(self, argv: list[str], env: dict, cwd: str) -> WarmPty:
+        if os.name == "nt":
+            from winpty import PtyProcess as PTY
+        else:
+            from ptyprocess import PtyProcess as PTY
+
+        member = WarmPty(PTY.spawn(argv, cwd=cwd, env=env), cwd)
+        if os.name == "nt":
+            threading.Thread(target=member._read_loop, daemon=True).start()
+        else:
+            self.reactor = member.reactor = self.reactor or get_reactor()
+            self.reactor.register(member.p.fd, member.on_data, member.on_close)
+        return member
+
+    def _discard(self, member: WarmPty) -> None:
+        if os.name != "nt":
+            self.reactor.unregister(member.p.fd, timeout=1.0)
+        member.kill()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+
+                now = time.monotonic()
+                expired = []
+                missing = []
+                for key, (argv, env, cwd, used) in list(self._wanted.items()):
+                    members = self._members.setdefault(key, [])
+                    while members and (
+                        members[0].closed or now - members[0].created_at > self.ttl
+                    ):
+                        expired.append(members.pop(0))
+
+                    if now - used > self.ttl:
+                        # not asked for recently, let the pool drain
+                        if not members:
+                            del self._wanted[key]
+                            del self._members[key]
+                        continue
+                    if len(members) < self.size:
+                        missing.append((key, argv, env, cwd))
+
+            for member in expired:
+                self._discard(member)
+
+            # spawned without the lock, this is the slow part
+            failed = False
+            for key, argv, env, cwd in missing:
+                try:
+                    member = self._spawn(argv, env, cwd)
+                except OSError:
+                    failed = True
+                    continue
+                with self._condition:
+                    unwanted = self._closed or key not in self._wanted
+                    if not unwanted:
+                        self._members[key].append(member)
+                # discarding blocks, not while `acquire` waits for the lock
+                if unwanted:
+                    self._discard(member)
+
+            with self._condition:
+                if self._closed:
+                    return
+                if failed or not missing:
+                    self._condition.wait(min(self.ttl, 60))
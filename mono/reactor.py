@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import logging
+import os
+import selectors
+import threading
+import typing
+
+logger = logging.getLogger(__name__)
+
+
+class Reactor:
+    """Single I/O thread reading the ptys of all the terminals.
+
+    Every pty file descriptor is registered with one selector (epoll on Linux).
+    When a descriptor becomes readable it is read once with a large read into
+    a buffer reused for every read, a copy of the bytes read is handed to the
+    `on_data` callback of the terminal and the thread goes back to waiting, so
+    idle terminals cost nothing and busy ones do not need a thread each.
+    Decoding is left to the consumer of the output.
+
+    Callbacks run on the reactor thread and must not block or touch Tk. A
+    callback raising is logged and its descriptor closed, the other
+    descriptors are still read.
+
+    A descriptor can be paused: it is not read until resumed, so once the
+    kernel buffer of the pty is full the child blocks on its writes. This is
+    how terminals apply backpressure when their output can't be rendered as
+    fast as it is produced.
+
+    Args:
+        read_size (int): Maximum number of bytes read at once."""
+
+    def __init__(self, read_size: int = 1 << 16) -> None:
+        self.read_size = read_size
+
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._thread = None
+        # callbacks of the paused descriptors
+        self._paused = {}
+
+        # wakes the thread up when descriptors are (un)registered
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+
+    def register(
+        self,
+        fd: int,
+        on_data: typing.Callable[[bytes], None],
+        on_close: typing.Callable[[], None] = None,
+    ) -> None:
+        """Start reading a file descriptor.
+
+        Args:
+            fd (int): File descriptor of the pty.
+            on_data (Callable): Called with the bytes read (a bytearray owned
+                by the callee).
+            on_close (Callable): Called once the pty is closed (EOF or error)."""
+
+        self._submit(("register", fd, (on_data, on_close)))
+
+        with self._lock:
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run, name="mono-reactor", daemon=True
+                )
+                self._thread.start()
+
+    def unregister(self, fd: int, timeout: float = None) -> None:
+        """Stop reading a file descriptor, its callbacks won't be called anymore.
+
+        Args:
+            fd (int): File descriptor of the pty.
+            timeout (float): Wait up to `timeout` seconds for the reactor
+                thread to drop the descriptor, after which it can be closed
+                (its number may be reused right away). None to not wait."""
+
+        done = None
+        if (
+            timeout is not None
+            and self._thread
+            and threading.current_thread() is not self._thread
+        ):
+            done = threading.Event()
+        self._submit(("unregister", fd, done))
+        if done:
+            done.wait(timeout)
+
+    def pause(self, fd: int) -> None:
+        """Stop reading a file descriptor until `resume` is called.
+
+        Args:
+            fd (int): File descriptor of the pty."""
+
+        self._submit(("pause", fd, None))
+
+    def resume(self, fd: int) -> None:
+        """Read a paused file descriptor again.
+
+        Args:
+            fd (int): File descriptor of the pty."""
+
+        self._submit(("resume", fd, None))
+
+    def __len__(self) -> int:
+        """Number of descriptors being read, paused ones included."""
+
+        return len(self._selector.get_map()) - 1 + len(self._paused)
+
+    def _submit(self, op: tuple) -> None:
+        with self._lock:
+            self._pending.append(op)
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except BlockingIOError:
+            # the pipe is full, the thread is going to wake up anyway
+            pass
+
+    def _apply_pending(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for op, fd, callbacks in pending:
+            if op == "resume":
+                if (callbacks := self._paused.pop(fd, None)) is None:
+                    continue
+                op = "register"
+
+            if op == "register":
+                try:
+                    self._selector.register(fd, selectors.EVENT_READ, callbacks)
+                except (KeyError, ValueError, OSError):
+                    # already registered or closed in the meantime
+                    pass
+            elif op == "pause":
+                try:
+                    self._paused[fd] = self._selector.unregister(fd).data
+                except (KeyError, ValueError):
+                    pass
+            else:
+                self._paused.pop(fd, None)
+                try:
+                    self._selector.unregister(fd)
+                except (KeyError, ValueError):
+                    pass
+                if callbacks:
+                    # the event of a waiting `unregister`
+                    callbacks.set()
+
+    def _close(self, fd: int, on_close) -> None:
+        try:
+            self._selector.unregister(fd)
+        except (KeyError, ValueError):
+            pass
+        if on_close:
+            try:
+                on_close()
+            except Exception:
+                logger.exception("close callback of fd %d failed", fd)
+
+    def _run(self) -> None:
+        readv = os.readv
+        buffer = bytearray(self.read_size)
+
+        while True:
+            for key, _ in self._selector.select():
+                if key.fd == self._wakeup_r:
+                    try:
+                        while os.read(self._wakeup_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    self._apply_pending()
+                    continue
+
+                if self._selector.get_map().get(key.fd) is not key:
+                    # unregistered while this event was pending
+                    continue
+
+                on_data, on_close = key.data
+                try:
+                    # the descriptor is readable, this does not block
+                    n = readv(key.fd, (buffer,))
+                except OSError:
+                    # EIO once the child has exited on linux
+                    n = 0
+
+                if not n:
+                    self._close(key.fd, on_close)
+                    continue
+                try:
+                    on_data(buffer[:n])
+                except Exception:
+                    # only the terminal of this descriptor stops
+                    logger.exception("data callback of fd %d failed", key.fd)
+                    self._close(key.fd, on_close)
+
+
+_reactor = None
+_reactor_lock = threading.Lock()
+
+
+def get_reactor() -> Reactor:
+    """Get the reactor shared by all the terminals, created on first use."""
+
+    global _reactor
+
+    with _reactor_lock:
+        if _reactor is None:
+            _reactor = Reactor()
+        return _reactor
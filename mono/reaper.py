@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import os
+import signal
+import threading
+import time
+import typing
+
+# signals sent in turn by `terminate`, the shell hangs up like when its
+# terminal window is closed, then is asked to terminate, then killed
+if os.name == "nt":
+    SIGNALS = ()
+else:
+    SIGNALS = (signal.SIGHUP, signal.SIGTERM, signal.SIGKILL)
+
+# exit status of a process reaped by someone else, out of the range of exit
+# codes (0 to 255) and of minus signal numbers
+UNKNOWN = -256
+
+# waitpid must not be called by two threads for the same child
+_wait_lock = threading.Lock()
+
+
+def exit_status(p) -> int | None:
+    """Exit status of a pty process without blocking, reaping it.
+
+    Args:
+        p (PtyProcess): The pty process.
+
+    Returns:
+        int: The exit code, minus the signal number if the process was killed
+            by a signal, `UNKNOWN` if it was lost. None while the process is
+            running."""
+
+    with _wait_lock:
+        return _exit_status(p)
+
+
+def _exit_status(p) -> int | None:
+    """`exit_status`, with `_wait_lock` held."""
+
+    try:
+        if p.isalive():
+            return None
+    except Exception:
+        # reaped by someone else, the status is lost
+        pass
+
+    if getattr(p, "signalstatus", None) is not None:
+        return -p.signalstatus
+    if getattr(p, "exitstatus", None) is not None:
+        return p.exitstatus
+    return UNKNOWN
+
+
+def wait(p, timeout: float) -> int | None:
+    """Wait for a pty process to exit, returns its exit status or None if it
+    is still running after `timeout` seconds."""
+
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+    while (status := exit_status(p)) is None and time.monotonic() < deadline:
+        time.sleep(delay)
+        delay = min(delay * 2, 0.05)
+    return status
+
+
+def terminate(p, timeout: float = 0.5) -> int | None:
+    """Terminate a pty process: SIGHUP, then SIGTERM and SIGKILL if it is
+    still running `timeout` seconds after the previous signal.
+
+    Args:
+        p (PtyProcess): The pty process.
+        timeout (float): Seconds given to the process after every signal.
+
+    Returns:
+        int: The exit status, see `exit_status`, None if the process could
+            not be terminated."""
+
+    if (status := exit_status(p)) is not None:
+        return status
+
+    if not SIGNALS:
+        try:
+            p.terminate(force=True)
+        except Exception:
+            # exited meanwhile
+            pass
+        return wait(p, timeout)
+
+    for sig in SIGNALS:
+        # not with `p.kill`, which waits for the child outside of the lock
+        with _wait_lock:
+            if (status := _exit_status(p)) is not None:
+                return status
+            try:
+                # not reaped yet, the pid can't have been reused
+                os.kill(p.pid, sig)
+            except OSError:
+                # exited meanwhile
+                pass
+        if (status := wait(p, timeout)) is not None:
+            return status
+    return None
+
+
+def close_pty(p) -> None:
+    """Close the pty of a process that was terminated. The descriptor must
+    not be registered to a reactor anymore."""
+
+    # the default delay is for the kernel to update the status of the child,
+    # which was already reaped
+    if hasattr(p, "delayafterclose"):
+        p.delayafterclose = 0
+    try:
+        p.close()
+    except Exception:
+        # still running, the pty is closed anyway
+        pass
+
+
+class Reaper:
+    """Thread collecting the exit status of the children whose pty was
+    closed, which may be a little later than the end of their output.
+
+    The watched processes are polled every `interval` seconds, the thread
+    stops once it has none left.
+
+    Args:
+        interval (float): Seconds between two polls."""
+
+    def __init__(self, interval: float = 0.02) -> None:
+        self.interval = interval
+
+        # process -> callback
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._watched)
+
+    def watch(self, p, callback: typing.Callable[[int], None]) -> None:
+        """Call `callback` with the exit status of a process once it exits.
+
+        Args:
+            p (PtyProcess): The pty process.
+            callback (Callable): Called on the reaper thread."""
+
+        with self._lock:
+            self._watched[p] = callback
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run, name="mono-reaper", daemon=True
+                )
+                self._thread.start()
+
+    def unwatch(self, p) -> None:
+        """Stop watching a process, its callback won't be called."""
+
+        with self._lock:
+            self._watched.pop(p, None)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._watched:
+                    self._thread = None
+                    return
+                watched = list(self._watched.items())
+
+            for p, callback in watched:
+                if (status := exit_status(p)) is None:
+                    continue
+                with self._lock:
+                    if self._watched.get(p) is not callback:
+                        continue
+                    del self._watched[p]
+                callback(status)
+            time.sleep(self.interval)
+
+
+_reaper = None
+_reaper_lock = threading.Lock()
+
+
+def get_reaper() -> Reaper:
+    """Get the reaper shared by all the sessions, created on first use."""
+
+    global _reaper
+
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = Reaper()
+        return _reaper
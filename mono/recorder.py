@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import codecs
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+def _open_zstd(path: str):
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "zstd compression needs python 3.14 or the zstandard package"
+            ) from None
+        return zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+    return zstd.open(path, "wb")
+
+
+OPENERS = {
+    None: lambda path: open(path, "wb"),
+    "gzip": lambda path: gzip.open(path, "wb", compresslevel=6),
+    "zstd": _open_zstd,
+}
+
+SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+class Recorder:
+    """Records a session to an asciicast v2 file from a background thread.
+
+    Output, input and resize events are only timestamped and queued by the
+    threads producing them. The writer thread wakes up every `flush_interval`
+    seconds and writes all the queued events at once.
+
+    The queue is bounded: when the disk can't keep up, new events are dropped
+    once `max_events` are waiting, and a marker event with the number of
+    dropped events is written instead, so recording never blocks or grows
+    without limit.
+
+    Args:
+        path (str): File to write, ``.gz`` and ``.zst`` suffixes select the
+            compression unless `compression` is given.
+        width (int): Number of columns of the terminal.
+        height (int): Number of rows of the terminal.
+        compression (str): None, "gzip" or "zstd".
+        max_size (int): Uncompressed bytes after which the recording continues
+            in a new file (``name.1.cast``, ``name.2.cast``...), None to never
+            rotate.
+        max_events (int): Maximum number of events waiting to be written.
+        flush_interval (float): Seconds between two writes.
+        resolution (float): Consecutive events closer than this many seconds
+            are merged into one.
+        title (str): Title stored in the header."""
+
+    def __init__(
+        self,
+        path: str,
+        width: int = 80,
+        height: int = 24,
+        compression: str = None,
+        max_size: int = None,
+        max_events: int = 1 << 16,
+        flush_interval: float = 0.2,
+        resolution: float = 0.01,
+        title: str = None,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.width = width
+        self.height = height
+        if compression is None:
+            compression = SUFFIXES.get(os.path.splitext(self.path)[1])
+        if compression not in OPENERS:
+            raise ValueError(f"unknown compression {compression!r}")
+        self.compression = compression
+        self.max_size = max_size
+        self.max_events = max_events
+        self.flush_interval = flush_interval
+        self.resolution = resolution
+        self.title = title
+
+        self.dropped = 0
+        self.files = []
+
+        self._events = deque()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._reported = 0
+        self._file = None
+        self._size = 0
+        # opened here so that errors are raised to the caller
+        self._rotate()
+        self._thread = threading.Thread(
+            target=self._run, name="mono-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def output(self, data: str | bytes) -> None:
+        """Record output of the session, as text or as bytes read from the
+        pty (UTF-8)."""
+
+        self._event("o", data)
+
+    def input(self, data: str) -> None:
+        """Record input sent to the session."""
+
+        self._event("i", data)
+
+    def resize(self, rows: int, cols: int) -> None:
+        """Record a change of the size of the terminal."""
+
+        self._event("r", f"{cols}x{rows}")
+
+    def _event(self, code: str, data: str) -> None:
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        self._events.append((time.monotonic(), code, data))
+
+    def close(self) -> None:
+        """Write the remaining events and close the file."""
+
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+
+    def __enter__(self) -> Recorder:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _rotate(self) -> None:
+        if self._file:
+            self._file.close()
+
+        path = self.path
+        if self.files:
+            root, ext = os.path.splitext(self.path)
+            if self.compression:
+                root, inner = os.path.splitext(root)
+                ext = inner + ext
+            path = f"{root}.{len(self.files)}{ext}"
+
+        self._file = OPENERS[self.compression](path)
+        self.files.append(path)
+        # event times are relative to the start of their file
+        self._start = time.monotonic()
+
+        header = {
+            "version": 2,
+            "width": self.width,
+            "height": self.height,
+            "timestamp": int(time.time()),
+        }
+        if self.title:
+            header["title"] = self.title
+        data = (json.dumps(header) + "\n").encode()
+        self._file.write(data)
+        self._size = len(data)
+
+    def _merge(self) -> list[tuple[float, str, str]]:
+        """Take the queued events. Consecutive output or input events closer
+        than `resolution` are merged, so bulk output is written as a few
+        large events."""
+
+        events = self._events
+        resolution = self.resolution
+        merged = []
+        for _ in range(len(events)):
+            t, code, data = events.popleft()
+            if (
+                merged
+                and code != "r"
+                and code == merged[-1][1]
+                and t - merged[-1][0] < resolution
+            ):
+                merged[-1][2].append(data)
+            else:
+                merged.append((t, code, [data]))
+        return [(t, code, self._decode(data)) for t, code, data in merged]
+
+    def _decode(self, parts: list) -> str:
+        """Join event data, output read as bytes is decoded here, on the
+        writer thread."""
+
+        decode = self._decoder.decode
+        return "".join(i if isinstance(i, str) else decode(i) for i in parts)
+
+    def _write(self) -> None:
+        start = self._start
+        dumps = json.dumps
+        lines = [
+            f"[{t - start:.6f}, {dumps(code)}, {dumps(data)}]\n"
+            for t, code, data in self._merge()
+        ]
+
+        dropped = self.dropped
+        if dropped != self._reported:
+            lines.append(
+                dumps([time.monotonic() - start, "m", f"dropped {dropped} events"])
+                + "\n"
+            )
+            self._reported = dropped
+
+        if not lines:
+            return
+
+        data = "".join(lines).encode()
+        self._file.write(data)
+        self._size += len(data)
+        self._file.flush()
+        if self.max_size and self._size >= self.max_size:
+            self._rotate()
+
+    def _run(self) -> None:
+        try:
+            while not self._closed:
+                self._wakeup.wait(self.flush_interval)
+                self._write()
+            self._write()
+        finally:
+            self._file.close()
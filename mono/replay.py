@@ -0,0 +1,188 @@
+"""Replay of recorded sessions.
+
+Feeds an asciicast recording to a `Session` or a `Terminal`, in real time or
+as fast as possible, and reports how long every frame took to process and
+render. Replays are deterministic and need no pty, they reproduce output
+heavy sessions and double as a rendering benchmark:
+
+    python -m mono.replay session.cast [--speed 2] [--tk]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import time
+import typing
+
+from .session import Session
+
+if typing.TYPE_CHECKING:
+    from .terminal import Terminal
+
+
+def _open_zstd(path: str):
+    try:
+        from compression import zstd
+    except ImportError:
+        import zstandard
+
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+    return zstd.open(path, "rb")
+
+
+def read_cast(path: str) -> tuple[dict, list[tuple[float, str, str]]]:
+    """Read an asciicast v2 recording, optionally gzip or zstd compressed.
+
+    Args:
+        path (str): Recording, as written by `Recorder`.
+
+    Returns:
+        tuple: The header and the list of (time, code, data) events."""
+
+    path = os.fspath(path)
+    if path.endswith(".gz"):
+        f = gzip.open(path, "rb")
+    elif path.endswith(".zst"):
+        f = _open_zstd(path)
+    else:
+        f = open(path, "rb")
+
+    with f:
+        header, *events = (json.loads(line) for line in f.read().splitlines())
+    return header, [tuple(event) for event in events]
+
+
+class Stats(typing.NamedTuple):
+    """Results of a replay."""
+
+    frames: int
+    bytes: int
+    seconds: float
+    frame_times: list[float]
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Frame time, in seconds, under which `p` percent of the frames took."""
+
+        if not self.frame_times:
+            return 0.0
+        times = sorted(self.frame_times)
+        return times[min(int(len(times) * p / 100), len(times) - 1)]
+
+    def __str__(self) -> str:
+        ms = [self.percentile(p) * 1000 for p in (50, 90, 99, 100)]
+        return (
+            f"{self.frames} frames, {self.bytes / 1e6:.2f} MB in {self.seconds:.3f}s "
+            f"({self.bytes_per_second / 1e6:.2f} MB/s), frame ms "
+            f"p50 {ms[0]:.2f} p90 {ms[1]:.2f} p99 {ms[2]:.2f} max {ms[3]:.2f}"
+        )
+
+
+def replay(
+    target: Session | Terminal,
+    events: list[tuple[float, str, str]],
+    speed: float = None,
+    frame_interval: float = 0.016,
+    frame_budget: int = 1 << 20,
+    read_size: int = 1 << 16,
+) -> Stats:
+    """Replay recorded events into a session or a terminal.
+
+    Output events are fed to the session and processed once per frame, for a
+    terminal the frame is also rendered (``update_idletasks``), which is
+    included in the frame times. Input events are skipped, their echo is
+    part of the output. Resize events resize the session.
+
+    Args:
+        target (Session | Terminal): Where the output is replayed.
+        events (list): (time, code, data) events, see `read_cast`.
+        speed (float): Playback speed relative to the recording, None to
+            replay as fast as possible.
+        frame_interval (float): Seconds between two frames in real time.
+        frame_budget (int): Maximum number of characters per frame.
+        read_size (int): Size of the pieces output events are fed in.
+
+    Returns:
+        Stats: Frames rendered, bytes replayed and the time of every frame."""
+
+    session = target if isinstance(target, Session) else target.session
+    render = getattr(target, "update_idletasks", None)
+
+    frame_times = []
+    size = 0
+    i = 0
+    start = time.perf_counter()
+
+    while i < len(events) or session.pending:
+        # as fast as possible, a frame worth of output at a time, in real
+        # time, everything recorded until now
+        now = (time.perf_counter() - start) * speed if speed else float("inf")
+        frame = 0
+        while i < len(events) and events[i][0] <= now and frame < frame_budget:
+            _, code, data = events[i]
+            i += 1
+            if code == "o":
+                # fed in pieces the size of the reads of the reactor
+                for j in range(0, len(data), read_size):
+                    session.feed(data[j : j + read_size])
+                frame += len(data)
+                size += len(data.encode())
+            elif code == "r":
+                cols, rows = map(int, data.split("x"))
+                session.resize(rows, cols)
+
+        if session.pending:
+            t = time.perf_counter()
+            session.process(frame_budget)
+            if render:
+                render()
+            frame_times.append(time.perf_counter() - t)
+
+        if speed and i < len(events) and not session.pending:
+            time.sleep(frame_interval)
+
+    return Stats(len(frame_times), size, time.perf_counter() - start, frame_times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m mono.replay", description="Replay an asciicast recording."
+    )
+    parser.add_argument("path", help="recording (.cast, .cast.gz or .cast.zst)")
+    parser.add_argument(
+        "--speed", type=float, help="playback speed, as fast as possible by default"
+    )
+    parser.add_argument("--tk", action="store_true", help="render in a Terminal")
+    args = parser.parse_args()
+
+    header, events = read_cast(args.path)
+    rows, cols = header.get("height", 24), header.get("width", 80)
+
+    if not args.tk:
+        print(replay(Session(rows=rows, cols=cols), events, args.speed))
+        return
+
+    import tkinter as tk
+
+    from .terminal import Terminal
+
+    class Player(Terminal):
+        name = shell = "replay"
+
+    root = tk.Tk()
+    root.geometry("800x400")
+    terminal = Player(root)
+    terminal.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    print(replay(terminal, events, args.speed))
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
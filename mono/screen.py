@@ -0,0 +1,515 @@
+from __future__ import annotations
+
+import sys
+from array import array
+
+from .ansi import CSI, ESC, SGR, Control, CursorMove, Text, Title
+from .tags import DEFAULT, Style, apply_sgr
+
+# typecode of the character arrays, "u" is deprecated since 3.13
+CHARS = "w" if sys.version_info >= (3, 13) else "u"
+
+
+class Screen:
+    """Headless model of the terminal screen, used by full-screen programs.
+
+    The screen is a rows x cols grid of cells. Every row is stored as two
+    arrays, one with the characters and one with the style ids of the cells
+    (indexes into `styles`). Rows that changed since the last call to
+    `take_dirty` are kept in the `dirty` set, so a view only has to redraw
+    those rows.
+
+    Supports cursor addressing, erasing, inserting and deleting lines and
+    characters, scroll regions and the alternate screen buffer.
+
+    Styles are interned until the screen is reset. Past `max_styles`, the
+    styles no longer used by any cell are dropped and the ids renumbered.
+
+    Args:
+        rows (int): Number of rows.
+        cols (int): Number of columns.
+        max_styles (int): Soft limit on the number of interned styles."""
+
+    def __init__(self, rows: int = 24, cols: int = 80, max_styles: int = 1024) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.max_styles = max_styles
+
+        self._handlers = {
+            Text: self._text,
+            Control: self._control,
+            SGR: self._sgr,
+            CursorMove: self._cursor_move,
+            CSI: self._csi,
+            ESC: self._esc,
+            Title: self._title,
+        }
+
+        self.title = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset the screen to its initial state."""
+
+        self.styles = [DEFAULT]
+        self._style_ids = {DEFAULT: 0}
+        self.chars = [self._blank_chars() for _ in range(self.rows)]
+        self.attrs = [self._blank_attrs() for _ in range(self.rows)]
+
+        self.x = self.y = 0
+        self.style = DEFAULT
+        self._style_id = 0
+        self.top = 0
+        self.bottom = self.rows - 1
+        self.wrap_pending = False
+        self.autowrap = True
+        self.cursor_visible = True
+
+        self.alternate = False
+        self._primary = None
+        self._saved_cursor = None
+
+        self.dirty = set(range(self.rows))
+
+    def feed(self, events: list) -> None:
+        """Apply parsed output events to the screen.
+
+        Args:
+            events (list): Events from `mono.ansi.Parser.feed`."""
+
+        handlers = self._handlers
+        for event in events:
+            if handler := handlers.get(type(event)):
+                handler(event)
+
+    def take_dirty(self) -> list[int]:
+        """Get the rows changed since the last call, in order, and mark them clean."""
+
+        dirty = sorted(self.dirty)
+        self.dirty.clear()
+        return dirty
+
+    def line(self, y: int) -> str:
+        """Text of a row."""
+
+        return self.chars[y].tounicode()
+
+    @property
+    def display(self) -> list[str]:
+        """Text of all rows."""
+
+        return [row.tounicode() for row in self.chars]
+
+    def runs(self, y: int) -> list[tuple[str, Style]]:
+        """Text of a row split into runs of the same style.
+
+        Args:
+            y (int): Row index.
+
+        Returns:
+            list: (text, style) pairs."""
+
+        text = self.chars[y].tounicode()
+        attrs = self.attrs[y]
+        styles = self.styles
+
+        first = attrs[0]
+        if attrs.count(first) == self.cols:
+            return [(text, styles[first])]
+
+        runs = []
+        start = 0
+        for x in range(1, self.cols):
+            if attrs[x] != attrs[x - 1]:
+                runs.append((text[start:x], styles[attrs[start]]))
+                start = x
+        runs.append((text[start:], styles[attrs[start]]))
+        return runs
+
+    def resize(self, rows: int, cols: int) -> None:
+        """Change the size of the screen, the content is kept where possible.
+
+        Args:
+            rows (int): Number of rows.
+            cols (int): Number of columns."""
+
+        if (rows, cols) == (self.rows, self.cols):
+            return
+
+        # drop rows above the cursor first so it stays on screen
+        drop = max(self.y - rows + 1, 0)
+        self.chars, self.attrs = self._resize(self.chars, self.attrs, rows, cols, drop)
+        if self._primary:
+            self._primary = self._resize(*self._primary, rows, cols, 0)
+
+        self.rows = rows
+        self.cols = cols
+        self.y = min(self.y - drop, rows - 1)
+        self.x = min(self.x, cols - 1)
+        self.top = 0
+        self.bottom = rows - 1
+        self.wrap_pending = False
+        self.dirty = set(range(rows))
+
+    def _resize(self, chars, attrs, rows: int, cols: int, drop: int) -> tuple:
+        chars = chars[drop : drop + rows]
+        attrs = attrs[drop : drop + rows]
+
+        for i, row in enumerate(chars):
+            if len(row) > cols:
+                chars[i] = row[:cols]
+                attrs[i] = attrs[i][:cols]
+            elif len(row) < cols:
+                chars[i] = row + array(CHARS, " ") * (cols - len(row))
+                attrs[i] = attrs[i] + array("I", [0]) * (cols - len(row))
+
+        while len(chars) < rows:
+            chars.append(array(CHARS, " ") * cols)
+            attrs.append(array("I", [0]) * cols)
+
+        return chars, attrs
+
+    # -- buffers ---------------------------------------------------------------
+
+    def _blank_chars(self) -> array:
+        return array(CHARS, " ") * self.cols
+
+    def _blank_attrs(self, style_id: int = 0) -> array:
+        return array("I", [style_id]) * self.cols
+
+    def _blank_id(self) -> int:
+        """Style id of erased cells, keeps the background color (BCE)."""
+
+        if self.style.bg is None:
+            return 0
+        return self._intern(Style(bg=self.style.bg))
+
+    def _intern(self, style: Style) -> int:
+        if (style_id := self._style_ids.get(style)) is None:
+            if len(self.styles) >= self.max_styles:
+                self._compact()
+            style_id = self._style_ids[style] = len(self.styles)
+            self.styles.append(style)
+        return style_id
+
+    def _compact(self) -> None:
+        """Drop the styles not used by any cell, of both buffers, and
+        renumber the others."""
+
+        grids = [self.attrs]
+        if self._primary:
+            grids.append(self._primary[1])
+        used = {0, self._style_id}
+        for attrs in grids:
+            for row in attrs:
+                used.update(row)
+
+        ids = sorted(used)
+        self.styles = [self.styles[i] for i in ids]
+        self._style_ids = {style: i for i, style in enumerate(self.styles)}
+        remap = {old: new for new, old in enumerate(ids)}
+        self._style_id = remap[self._style_id]
+        for attrs in grids:
+            for i, row in enumerate(attrs):
+                attrs[i] = array("I", map(remap.__getitem__, row))
+
+    def _erase(self, y: int, start: int, end: int) -> None:
+        n = end - start
+        if n <= 0:
+            return
+        self.chars[y][start:end] = array(CHARS, " ") * n
+        self.attrs[y][start:end] = array("I", [self._blank_id()]) * n
+        self.dirty.add(y)
+
+    def _erase_lines(self, start: int, end: int) -> None:
+        style_id = self._blank_id()
+        for y in range(start, end):
+            self.chars[y] = self._blank_chars()
+            self.attrs[y] = self._blank_attrs(style_id)
+            self.dirty.add(y)
+
+    def scroll_up(self, n: int = 1) -> None:
+        """Scroll the scroll region up by n lines, blank lines enter at the bottom."""
+
+        n = min(n, self.bottom - self.top + 1)
+        style_id = self._blank_id()
+        for _ in range(n):
+            del self.chars[self.top]
+            del self.attrs[self.top]
+            self.chars.insert(self.bottom, self._blank_chars())
+            self.attrs.insert(self.bottom, self._blank_attrs(style_id))
+        self.dirty.update(range(self.top, self.bottom + 1))
+
+    def scroll_down(self, n: int = 1) -> None:
+        """Scroll the scroll region down by n lines, blank lines enter at the top."""
+
+        n = min(n, self.bottom - self.top + 1)
+        style_id = self._blank_id()
+        for _ in range(n):
+            del self.chars[self.bottom]
+            del self.attrs[self.bottom]
+            self.chars.insert(self.top, self._blank_chars())
+            self.attrs.insert(self.top, self._blank_attrs(style_id))
+        self.dirty.update(range(self.top, self.bottom + 1))
+
+    def set_alternate(self, enabled: bool) -> None:
+        """Switch between the primary and the alternate screen buffer."""
+
+        if enabled == self.alternate:
+            return
+
+        if enabled:
+            self._primary = (self.chars, self.attrs)
+            self.chars = [self._blank_chars() for _ in range(self.rows)]
+            self.attrs = [self._blank_attrs() for _ in range(self.rows)]
+        else:
+            self.chars, self.attrs = self._primary
+            self._primary = None
+
+        self.alternate = enabled
+        self.dirty = set(range(self.rows))
+
+    # -- cursor ----------------------------------------------------------------
+
+    def linefeed(self) -> None:
+        """Move the cursor down, scrolling at the bottom of the scroll region."""
+
+        self.wrap_pending = False
+        if self.y == self.bottom:
+            self.scroll_up()
+        elif self.y < self.rows - 1:
+            self.y += 1
+
+    def reverse_index(self) -> None:
+        """Move the cursor up, scrolling at the top of the scroll region."""
+
+        self.wrap_pending = False
+        if self.y == self.top:
+            self.scroll_down()
+        elif self.y > 0:
+            self.y -= 1
+
+    def move_to(self, y: int, x: int) -> None:
+        """Move the cursor, clamped to the screen."""
+
+        self.y = min(max(y, 0), self.rows - 1)
+        self.x = min(max(x, 0), self.cols - 1)
+        self.wrap_pending = False
+
+    def save_cursor(self) -> None:
+        self._saved_cursor = (self.y, self.x, self.style, self.autowrap)
+
+    def restore_cursor(self) -> None:
+        if self._saved_cursor:
+            y, x, style, self.autowrap = self._saved_cursor
+            self.move_to(y, x)
+            self._set_style(style)
+
+    # -- drawing ---------------------------------------------------------------
+
+    def draw(self, text: str) -> None:
+        """Write printable text at the cursor, wrapping at the end of the line."""
+
+        cols = self.cols
+        while text:
+            if self.wrap_pending:
+                self.x = 0
+                self.linefeed()
+
+            y, x = self.y, self.x
+            n = min(len(text), cols - x)
+            self.chars[y][x : x + n] = array(CHARS, text[:n])
+            self.attrs[y][x : x + n] = array("I", [self._style_id]) * n
+            self.dirty.add(y)
+            text = text[n:]
+
+            if x + n < cols:
+                self.x = x + n
+            elif self.autowrap:
+                self.x = cols - 1
+                self.wrap_pending = True
+            else:
+                # without autowrap the rest overwrites the last column
+                self.x = cols - 1
+                if text:
+                    self.chars[y][cols - 1] = text[-1]
+                text = ""
+
+    def _text(self, event: Text) -> None:
+        for i, line in enumerate(event.text.split("\n")):
+            if i:
+                # the parser reports \r\n as \n
+                self.linefeed()
+                self.x = 0
+
+            if "\t" not in line:
+                self.draw(line)
+                continue
+
+            for j, part in enumerate(line.split("\t")):
+                if j:
+                    self.wrap_pending = False
+                    self.x = min((self.x // 8 + 1) * 8, self.cols - 1)
+                self.draw(part)
+
+    def _control(self, event: Control) -> None:
+        match event.char:
+            case "\r":
+                self.x = 0
+                self.wrap_pending = False
+            case "\b":
+                self.x = max(self.x - 1, 0)
+                self.wrap_pending = False
+            case "\x0b" | "\x0c":
+                self.linefeed()
+
+    def _set_style(self, style: Style) -> None:
+        self.style = style
+        self._style_id = self._intern(style)
+
+    def _sgr(self, event: SGR) -> None:
+        self._set_style(apply_sgr(self.style, event.params))
+
+    def _title(self, event: Title) -> None:
+        self.title = event.title
+
+    def _cursor_move(self, event: CursorMove) -> None:
+        params = event.params
+        n = params[0] if params and params[0] else 1
+
+        match event.command:
+            case "A":
+                top = self.top if self.y >= self.top else 0
+                self.move_to(max(self.y - n, top), self.x)
+            case "B":
+                bottom = self.bottom if self.y <= self.bottom else self.rows - 1
+                self.move_to(min(self.y + n, bottom), self.x)
+            case "C":
+                self.move_to(self.y, self.x + n)
+            case "D":
+                self.move_to(self.y, self.x - n)
+            case "E":
+                self.move_to(self.y + n, 0)
+            case "F":
+                self.move_to(self.y - n, 0)
+            case "G":
+                self.move_to(self.y, n - 1)
+            case "d":
+                self.move_to(n - 1, self.x)
+            case "H" | "f":
+                x = params[1] if len(params) > 1 and params[1] else 1
+                self.move_to(n - 1, x - 1)
+
+    def _csi(self, event: CSI) -> None:
+        params = event.params
+        p = params[0] if params else 0
+        n = p or 1
+
+        if event.private:
+            if event.private == "?" and event.command in "hl":
+                self._set_modes(params, event.command == "h")
+            return
+
+        match event.command:
+            case "J":
+                if p == 0:
+                    self._erase(self.y, self.x, self.cols)
+                    self._erase_lines(self.y + 1, self.rows)
+                elif p == 1:
+                    self._erase_lines(0, self.y)
+                    self._erase(self.y, 0, self.x + 1)
+                else:
+                    self._erase_lines(0, self.rows)
+            case "K":
+                if p == 0:
+                    self._erase(self.y, self.x, self.cols)
+                elif p == 1:
+                    self._erase(self.y, 0, self.x + 1)
+                else:
+                    self._erase(self.y, 0, self.cols)
+            case "X":
+                self._erase(self.y, self.x, min(self.x + n, self.cols))
+            case "@":
+                self._shift(n)
+            case "P":
+                self._shift(-n)
+            case "L" | "M":
+                if self.top <= self.y <= self.bottom:
+                    top, self.top = self.top, self.y
+                    if event.command == "L":
+                        self.scroll_down(n)
+                    else:
+                        self.scroll_up(n)
+                    self.top = top
+                    self.x = 0
+            case "S":
+                self.scroll_up(n)
+            case "T":
+                self.scroll_down(n)
+            case "r":
+                top = (p or 1) - 1
+                bottom = (params[1] if len(params) > 1 and params[1] else self.rows) - 1
+                if top < bottom < self.rows:
+                    self.top, self.bottom = top, bottom
+                    self.move_to(0, 0)
+            case "s":
+                self.save_cursor()
+            case "u":
+                self.restore_cursor()
+
+    def _shift(self, n: int) -> None:
+        """Insert (n > 0) or delete (n < 0) characters at the cursor."""
+
+        y, x, cols = self.y, self.x, self.cols
+        chars, attrs = self.chars[y], self.attrs[y]
+        blank = self._blank_id()
+
+        if n > 0:
+            n = min(n, cols - x)
+            chars[x + n :] = chars[x : cols - n]
+            attrs[x + n :] = attrs[x : cols - n]
+            chars[x : x + n] = array(CHARS, " ") * n
+            attrs[x : x + n] = array("I", [blank]) * n
+        else:
+            n = min(-n, cols - x)
+            chars[x : cols - n] = chars[x + n :]
+            attrs[x : cols - n] = attrs[x + n :]
+            chars[cols - n :] = array(CHARS, " ") * n
+            attrs[cols - n :] = array("I", [blank]) * n
+        self.dirty.add(y)
+
+    def _set_modes(self, params: tuple, enabled: bool) -> None:
+        for mode in params:
+            match mode:
+                case 7:
+                    self.autowrap = enabled
+                case 25:
+                    self.cursor_visible = enabled
+                case 47 | 1047:
+                    self.set_alternate(enabled)
+                case 1049:
+                    if enabled:
+                        self.save_cursor()
+                        self.set_alternate(True)
+                    else:
+                        self.set_alternate(False)
+                        self.restore_cursor()
+
+    def _esc(self, event: ESC) -> None:
+        if event.intermediates:
+            return
+
+        match event.command:
+            case "7":
+                self.save_cursor()
+            case "8":
+                self.restore_cursor()
+            case "D":
+                self.linefeed()
+            case "E":
+                self.linefeed()
+                self.x = 0
+            case "M":
+                self.reverse_index()
+            case "c":
+                self.reset()
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from array import array
+from itertools import accumulate
+
+from .tags import DEFAULT, Style
+
+
+class Scrollback:
+    """Compact store of the terminal output history.
+
+    Completed lines are packed into blocks of `block_size` lines, each block
+    being a single string with an offset table and the style runs of the
+    lines that are not fully in the default style. Once `max_lines` is set,
+    the oldest blocks are dropped as new ones are packed.
+
+    Lines are addressed relative to the oldest line kept, the last line is the
+    current, incomplete one. `start` is the absolute number of the oldest line.
+
+    The current line and the last `editable` completed lines are not packed
+    yet and can be rewritten, for carriage returns and cursor movements.
+
+    Args:
+        max_lines (int): Maximum number of lines kept, None for unbounded.
+        block_size (int): Number of lines packed together.
+        editable (int): Number of completed lines kept unpacked."""
+
+    def __init__(
+        self, max_lines: int = None, block_size: int = 1024, editable: int = 0
+    ) -> None:
+        self.max_lines = max_lines
+        self.block_size = block_size
+        self.editable = editable
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop all the history."""
+
+        self.start = 0
+        # packed blocks of (text, offsets, runs)
+        self._blocks = []
+        # completed lines not packed yet and their style runs
+        self._lines = []
+        self._runs = []
+        # parts of the current line
+        self._tail = []
+        self._tail_runs = []
+
+    def __len__(self) -> int:
+        return len(self._blocks) * self.block_size + len(self._lines) + 1
+
+    @property
+    def end(self) -> int:
+        """Absolute number of the current line plus one."""
+
+        return self.start + len(self)
+
+    @property
+    def packed(self) -> int:
+        """Absolute number of the first line not packed in a block yet."""
+
+        return self.start + len(self._blocks) * self.block_size
+
+    def write(self, text: str, style: Style = DEFAULT) -> None:
+        """Append output to the history.
+
+        Args:
+            text (str): Output text, newlines start new lines.
+            style (Style): Style of the text."""
+
+        *lines, last = text.split("\n")
+
+        if lines:
+            # the first line completes the current one
+            first = lines[0]
+            if self._tail:
+                if first:
+                    self._tail.append(first)
+                    self._tail_runs.append((len(first), style))
+                lines[0] = "".join(self._tail)
+                runs = self._merge(self._tail_runs)
+            else:
+                runs = ((len(first), style),) if style != DEFAULT and first else None
+
+            self._lines.extend(lines)
+            self._runs.append(runs)
+            if style == DEFAULT:
+                self._runs.extend([None] * (len(lines) - 1))
+            else:
+                self._runs.extend(((len(i), style),) if i else None for i in lines[1:])
+
+            self._tail = []
+            self._tail_runs = []
+            if len(self._lines) >= self.block_size + self.editable:
+                self._pack()
+
+        if last:
+            self._tail.append(last)
+            self._tail_runs.append((len(last), style))
+
+    @staticmethod
+    def _merge(runs: list) -> tuple | None:
+        """Merge adjacent runs of the same style, None if all are default."""
+
+        merged = []
+        for length, style in runs:
+            if merged and merged[-1][1] == style:
+                merged[-1] = (merged[-1][0] + length, style)
+            else:
+                merged.append((length, style))
+
+        if all(style == DEFAULT for _, style in merged):
+            return None
+        return tuple(merged)
+
+    def _pack(self) -> None:
+        size = self.block_size
+        while len(self._lines) >= size + self.editable:
+            lines = self._lines[:size]
+            runs = self._runs[:size]
+            del self._lines[:size]
+            del self._runs[:size]
+
+            offsets = array("I", accumulate((len(i) + 1 for i in lines), initial=0))
+            if not any(runs):
+                runs = None
+            self._blocks.append(("\n".join(lines), offsets, runs))
+
+        if self.max_lines:
+            excess = (len(self) - self.max_lines) // size
+            if excess > 0:
+                del self._blocks[:excess]
+                self.start += excess * size
+
+    def rewrite(self, i: int, runs: list[tuple[str, Style]]) -> None:
+        """Replace the text of a line that is not packed yet.
+
+        Args:
+            i (int): Line index, relative to the oldest line kept.
+            runs (list): (text, style) pairs of the new text."""
+
+        block, j = self._locate(i)
+        if block:
+            raise IndexError("line already packed")
+
+        lengths = [(len(text), style) for text, style in runs if text]
+        text = "".join(text for text, _ in runs)
+        if j < len(self._lines):
+            self._lines[j] = text
+            self._runs[j] = self._merge(lengths)
+        else:
+            self._tail = [text] if text else []
+            self._tail_runs = lengths
+
+    def truncate(self, i: int) -> None:
+        """Drop the lines after a line that is not packed yet, which becomes
+        the current line.
+
+        Args:
+            i (int): Line index, relative to the oldest line kept."""
+
+        block, j = self._locate(i)
+        if block:
+            raise IndexError("line already packed")
+        if j == len(self._lines):
+            return
+
+        runs = self.runs(i)
+        del self._lines[j:]
+        del self._runs[j:]
+        self.rewrite(-1, runs)
+
+    def snapshot(self) -> tuple:
+        """Cheap copy of the history that stays valid while more output is
+        written, for readers on other threads (packed blocks are shared).
+        Must be taken by the thread writing to the scrollback.
+
+        Returns:
+            tuple: start, block size, packed blocks, unpacked lines and the
+                text of the current line."""
+
+        return (
+            self.start,
+            self.block_size,
+            tuple(self._blocks),
+            list(self._lines),
+            "".join(self._tail),
+        )
+
+    def _locate(self, i: int) -> tuple:
+        """Packed block (or None) of a line and the index of the line in it."""
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("line out of range")
+
+        b, j = divmod(i, self.block_size)
+        if b < len(self._blocks):
+            return self._blocks[b], j
+        return None, i - len(self._blocks) * self.block_size
+
+    def line(self, i: int) -> str:
+        """Text of a line.
+
+        Args:
+            i (int): Line index, relative to the oldest line kept."""
+
+        block, j = self._locate(i)
+        if block:
+            text, offsets, _ = block
+            return text[offsets[j] : offsets[j + 1] - 1]
+        if j < len(self._lines):
+            return self._lines[j]
+        return "".join(self._tail)
+
+    def lines(self, start: int, end: int) -> list[str]:
+        """Text of the lines in [start, end)."""
+
+        return [self.line(i) for i in range(max(start, 0), min(end, len(self)))]
+
+    def runs(self, i: int) -> list[tuple[str, Style]]:
+        """Text of a line split into runs of the same style.
+
+        Args:
+            i (int): Line index, relative to the oldest line kept.
+
+        Returns:
+            list: (text, style) pairs."""
+
+        line = self.line(i)
+        block, j = self._locate(i)
+        if block:
+            runs = block[2] and block[2][j]
+        elif j < len(self._lines):
+            runs = self._runs[j]
+        else:
+            runs = self._merge(self._tail_runs)
+
+        if runs is None:
+            return [(line, DEFAULT)]
+
+        result = []
+        pos = 0
+        for length, style in runs:
+            result.append((line[pos : pos + length], style))
+            pos += length
+        return result
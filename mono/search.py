@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import re
+import threading
+import typing
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+if typing.TYPE_CHECKING:
+    from .scrollback import Scrollback
+
+
+class Match(typing.NamedTuple):
+    """A match in the scrollback, `line` is the absolute line number and
+    [start, end) the columns of the match in the line."""
+
+    line: int
+    start: int
+    end: int
+
+
+class SearchIndex:
+    """Trigram index of the packed blocks of a scrollback.
+
+    Every block gets a bitmap of the (lowercase) trigrams of its text, built
+    on a worker thread as blocks are packed and dropped once they leave the
+    scrollback. Plain queries of three characters or more skip the blocks
+    missing one of their trigrams. Building costs about 10ms per block of
+    1024 lines, which is why the index is optional.
+
+    Args:
+        bits (int): Size of the bitmap of a block, a power of two."""
+
+    def __init__(self, bits: int = 1 << 16) -> None:
+        self.bits = bits
+        # block number -> (text, bitmap)
+        self._blocks = {}
+        # latest (first block number, packed blocks) to index
+        self._latest = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    @staticmethod
+    def trigrams(text: str) -> set[str]:
+        text = text.lower()
+        return {text[i : i + 3] for i in range(len(text) - 2)}
+
+    def bitmap(self, trigrams: typing.Iterable[str]) -> bytearray:
+        mask = self.bits - 1
+        bitmap = bytearray(self.bits >> 3)
+        for trigram in trigrams:
+            h = hash(trigram) & mask
+            bitmap[h >> 3] |= 1 << (h & 7)
+        return bitmap
+
+    def get(self, number: int, text: str) -> bytearray | None:
+        """Bitmap of a block, None if not indexed yet."""
+
+        entry = self._blocks.get(number)
+        if entry and entry[0] is text:
+            return entry[1]
+        return None
+
+    def may_contain(self, bitmap: bytearray, trigrams: typing.Iterable[str]) -> bool:
+        mask = self.bits - 1
+        for trigram in trigrams:
+            h = hash(trigram) & mask
+            if not bitmap[h >> 3] & 1 << (h & 7):
+                return False
+        return True
+
+    def update(self, scrollback: Scrollback) -> None:
+        """Index the blocks packed since the last update in the background.
+        Must be called by the thread writing to the scrollback.
+
+        Args:
+            scrollback (Scrollback): The indexed scrollback."""
+
+        start, block_size, blocks, _, _ = scrollback.snapshot()
+        with self._condition:
+            if self._closed:
+                return
+            self._latest = (start // block_size, blocks)
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run, name="mono-search-index", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Stop indexing."""
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait until the latest update is indexed, returns whether it is."""
+
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._latest is None or self._closed, timeout
+            )
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._latest or self._closed)
+                if self._closed:
+                    return
+                first, blocks = self._latest
+
+            # dict operations are atomic, searches read the dict meanwhile
+            for number in [n for n in self._blocks if not 0 <= n - first < len(blocks)]:
+                del self._blocks[number]
+            # newest first, that is where searches start
+            for b in range(len(blocks) - 1, -1, -1):
+                text = blocks[b][0]
+                if self._closed or self._latest[1] is not blocks:
+                    break
+                if self.get(first + b, text) is None:
+                    self._blocks[first + b] = (text, self.bitmap(self.trigrams(text)))
+
+            with self._condition:
+                if self._latest[1] is blocks:
+                    self._latest = None
+                    self._condition.notify_all()
+
+
+class Search:
+    """Search of the scrollback, running on a worker thread.
+
+    The search runs on a snapshot of the scrollback, newest lines first.
+    Matches are streamed in batches to `callback` (called from the worker
+    thread) and collected in `matches`, in descending order.
+
+    Args:
+        scrollback (Scrollback): The scrollback to search, the snapshot is
+            taken by the thread writing to it.
+        pattern (str): Text or regular expression searched.
+        regex (bool): Whether `pattern` is a regular expression.
+        ignore_case (bool): Case insensitive search.
+        callback (callable): Called with every batch of matches.
+        index (SearchIndex): Trigram index of the scrollback, used by plain
+            searches.
+        batch_size (int): Matches per batch."""
+
+    def __init__(
+        self,
+        scrollback: Scrollback,
+        pattern: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        callback: typing.Callable[[list[Match]], None] = None,
+        index: SearchIndex = None,
+        batch_size: int = 256,
+    ) -> None:
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        # raises re.error for invalid expressions, on the calling thread
+        self.pattern = re.compile(pattern if regex else re.escape(pattern), flags)
+        # plain case insensitive searches scan the lowercased text, which is
+        # much faster than an IGNORECASE expression
+        self._folded = None
+        if ignore_case and not regex:
+            self._folded = re.compile(re.escape(pattern.lower()), re.MULTILINE)
+        self.trigrams = (
+            SearchIndex.trigrams(pattern) if not regex and len(pattern) >= 3 else None
+        )
+        self.callback = callback
+        self.index = index
+        self.batch_size = batch_size
+
+        self.matches = []
+        # blocks skipped thanks to the index
+        self.skipped = 0
+        self.done = threading.Event()
+        self._cancelled = False
+
+        self._snapshot = scrollback.snapshot()
+        self._thread = threading.Thread(
+            target=self._run, name="mono-search", daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop the search, no more matches are reported."""
+
+        self._cancelled = True
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait for the search to complete, returns whether it did."""
+
+        return self.done.wait(timeout)
+
+    def _run(self) -> None:
+        start, block_size, blocks, lines, tail = self._snapshot
+        self._snapshot = None
+        first = start // block_size
+
+        try:
+            # the unpacked lines and the current line
+            lines = lines + [tail]
+            offsets = array("I", accumulate((len(i) + 1 for i in lines), initial=0))
+            line = start + len(blocks) * block_size
+            self._scan("\n".join(lines), offsets, line)
+
+            for b in range(len(blocks) - 1, -1, -1):
+                if self._cancelled:
+                    return
+                text, offsets, _ = blocks[b]
+                self._search_block(first + b, text, offsets, start + b * block_size)
+        finally:
+            self.done.set()
+
+    def _search_block(self, number: int, text: str, offsets: array, line: int) -> None:
+        index = self.index
+        if index is not None and self.trigrams is not None:
+            bitmap = index.get(number, text)
+            if bitmap is not None and not index.may_contain(bitmap, self.trigrams):
+                self.skipped += 1
+                return
+        self._scan(text, offsets, line)
+
+    def _scan(self, text: str, offsets: array, line: int) -> None:
+        pattern = self.pattern
+        if self._folded is not None:
+            lowered = text.lower()
+            # lowercasing some characters changes the length, offsets differ
+            if len(lowered) == len(text):
+                text, pattern = lowered, self._folded
+
+        found = []
+        for m in pattern.finditer(text):
+            start, end = m.span()
+            if start == end:
+                continue
+            j = bisect_right(offsets, start) - 1
+            # matches spanning lines are cut at the end of the first one
+            end = min(end, offsets[j + 1] - 1)
+            found.append(Match(line + j, start - offsets[j], end - offsets[j]))
+
+        found.reverse()
+        for i in range(0, len(found), self.batch_size):
+            if self._cancelled:
+                return
+            batch = found[i : i + self.batch_size]
+            self.matches.extend(batch)
+            if self.callback:
+                self.callback(batch)
@@ -0,0 +1,1108 @@
+from __future__ import annotations
+
+import codecs
+import itertools
+import os
+import re
+import time
+import typing
+from collections import deque
+from threading import Event, Lock, Thread
+
+from .ansi import CSI, OSC, SGR, Control, CursorMove, Parser, Text, Title
+from .metrics import Metrics
+from .reactor import Reactor, get_reactor
+from .reaper import close_pty, get_reaper, terminate
+from .screen import Screen
+from .scrollback import Scrollback
+from .tags import DEFAULT, Style, apply_sgr
+
+if typing.TYPE_CHECKING:
+    import asyncio
+
+    from .pool import WarmPty
+    from .recorder import Recorder
+    from .search import Match, Search, SearchIndex
+
+
+class Output(typing.NamedTuple):
+    """Output appended to the scrollback, as (text, style) runs."""
+
+    runs: list
+
+
+class Rewrite(typing.NamedTuple):
+    """Lines rewritten in place by carriage returns, erases or cursor
+    movements (progress bars): the output from the absolute line `start` on
+    is replaced by `lines`, lists of (text, style) runs. `tail` is the
+    absolute number of the last line as of the previous updates."""
+
+    start: int
+    lines: list
+    tail: int
+
+
+class ScreenChanged(typing.NamedTuple):
+    """The program entered or left the alternate screen."""
+
+    alternate: bool
+
+
+class TitleChanged(typing.NamedTuple):
+    """The program set the window title."""
+
+    title: str
+
+
+class Exited(typing.NamedTuple):
+    """The shell exited, `status` is its exit code or minus the signal that
+    killed it, `reaper.UNKNOWN` if it was lost."""
+
+    status: int
+
+
+class Result(typing.NamedTuple):
+    """Outcome of a command run with `Session.run`."""
+
+    status: int
+    output: str
+
+
+# end of a line looking like a shell prompt: "$ ", "# ", "> ", "% ", ">>> "
+PROMPT = r"[$#%>❯]\s*$"
+
+
+# sequences kept from the output skipped by backpressure: shell integration
+# and command markers, alternate screen switches
+KEPT = re.compile(
+    r"\x1b\](?:133|777);[^\x07\x1b]*(?:\x07|\x1b\\)|\x1b\[\?(?:1049|1047|47)[hl]"
+)
+# the same in undecoded output
+KEPT_BYTES = re.compile(KEPT.pattern.encode())
+# utf-8 continuation bytes
+CONTINUATION = bytes(range(0x80, 0xC0))
+
+
+CR = Control("\r")
+
+# lines kept in the scrollback by default, the output of terminals in
+# background tabs is only kept there
+HISTORY_LINES = 100_000
+
+
+def switches_screen(event) -> bool:
+    """Whether a parser event switches to or from the alternate screen."""
+
+    return (
+        type(event) is CSI
+        and event.private == "?"
+        and event.command in "hl"
+        and not {47, 1047, 1049}.isdisjoint(event.params)
+    )
+
+
+class Session:
+    """Terminal session independent of any UI.
+
+    Owns the pty of the shell, the read loop, the parser, the scrollback and
+    the screen model. Output read by the reactor thread is queued, `process`
+    parses it, updates the models and hands the resulting updates (`Output`,
+    `Rewrite`, `ScreenChanged`, `TitleChanged`, `Exited`) to the subscribers.
+
+    Outside of the alternate screen, carriage returns, backspaces, erases in
+    line and cursor movements over the last `rows` lines rewrite the
+    scrollback in place, so progress bars and spinners redraw a single line
+    instead of appending every frame of their animation. The lines rewritten
+    during a `process` call are reported once, as a single `Rewrite`.
+
+    `Terminal` is a Tk view of a session which calls `process` once per frame.
+    Without a UI, call `process` from your own loop or pass `autoprocess=True`
+    to process the output on the reactor thread as soon as it is read.
+
+    Commands sent with `run_command` are queued until the shell is ready,
+    i.e. has printed its prompt, then sent one by one as every command
+    completes (or `pipeline` at a time). Prompts are detected with OSC 133
+    shell integration markers when the shell emits them, and by matching the
+    last line of the output against the `prompt` regex otherwise. With the
+    markers, a command completes at its end marker (D), or at the next prompt
+    (A) after its start marker (C), never at a prompt alone.
+
+    When the output waiting to be processed grows past `high_water`
+    characters (a program printing faster than it can be rendered), the
+    session applies backpressure according to `flood`: "pause" stops reading
+    the pty until the backlog is back under `low_water`, so the kernel
+    throttles the program, and "tail" skips the backlog down to its last
+    `low_water` characters, rendering only the tail of the output. The
+    prompt and command markers in the skipped output are still handled.
+    `interrupt` sends Ctrl-C ahead of the backlog and skips it.
+
+    Once the pty closes, the exit status of the shell is collected in the
+    background: `exit_status` is set, `exited` is set and the next `process`
+    call reports `Exited`. `close` tears the session down deterministically.
+
+    Args:
+        argv (list): Command line of the shell.
+        cwd (str): Working directory.
+        env (dict): Environment of the shell, defaults to the current one.
+        rows (int): Number of rows of the pty.
+        cols (int): Number of columns of the pty.
+        max_scrollback_lines (int): Maximum number of lines kept in the
+            scrollback, None for unbounded. Defaults to `HISTORY_LINES`.
+        reactor (Reactor): Reactor reading the pty, defaults to the shared one.
+        autoprocess (bool): Process the output on the reactor thread.
+        prompt (str): Regex matching the end of a prompt, used when the shell
+            does not emit OSC 133 markers.
+        pipeline (int): Number of queued commands sent ahead without waiting
+            for the previous ones to complete.
+        high_water (int): Characters of unprocessed output past which
+            backpressure is applied, None to never apply it.
+        low_water (int): Characters of unprocessed output under which reading
+            is resumed, and kept by "tail". Defaults to a quarter of
+            `high_water`.
+        flood (str): "pause" or "tail", see above."""
+
+    def __init__(
+        self,
+        argv: list[str] = None,
+        cwd: str = None,
+        env: dict = None,
+        rows: int = 24,
+        cols: int = 80,
+        max_scrollback_lines: int = HISTORY_LINES,
+        reactor: Reactor = None,
+        autoprocess: bool = False,
+        prompt: str = None,
+        pipeline: int = 1,
+        high_water: int = 1 << 22,
+        low_water: int = None,
+        flood: str = "pause",
+    ) -> None:
+        if flood not in ("pause", "tail"):
+            raise ValueError(f"unknown flood mode {flood!r}")
+        self.argv = argv
+        self.cwd = cwd
+        self.env = env
+        self.reactor = reactor
+        self.autoprocess = autoprocess
+        self.prompt = re.compile(prompt or PROMPT)
+        self.pipeline = pipeline
+        self.high_water = high_water
+        self.low_water = low_water if low_water is not None else (high_water or 0) // 4
+        self.flood = flood
+
+        self.p = None
+        self.alive = False
+        # reader thread, on windows
+        self._reader = None
+        self.exit_status = None
+        self.exited = Event()
+        # closes run on background threads too
+        self._close_lock = Lock()
+        self._exit_reported = False
+        self.title = None
+        self.style = DEFAULT
+
+        self.parser = Parser()
+        self.screen = Screen(rows, cols)
+        self.scrollback = Scrollback(max_scrollback_lines, editable=rows)
+        # cursor in the scrollback: lines above the last one and column, None
+        # at the end of the output where text is appended
+        self._row = 0
+        self._col = None
+        # absolute number of the first line rewritten since the last update
+        # and of the last line as of the previous updates
+        self._dirty = None
+        self._synced = 0
+
+        # output, bytes appended by the reader (str by `feed` and the windows
+        # reader) and consumed by `process` (deque append/popleft are
+        # thread-safe)
+        self._output = deque()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # characters queued by the reader and consumed by `process`, each
+        # only written by one thread
+        self._fed = 0
+        self._processed = 0
+        # reading is paused by backpressure
+        self.paused = False
+        self._resumed = Event()
+        self._resumed.set()
+        # characters skipped by "tail" and `interrupt`
+        self.skipped = 0
+        # commands waiting for the shell to be ready
+        self._commands = deque()
+        self._commands_lock = Lock()
+        # the shell printed its first prompt
+        self.ready = False
+        # perf_counter() times of the spawn and of the first prompt
+        self.started_at = None
+        self.ready_at = None
+        # commands sent and not completed yet
+        self._in_flight = 0
+        # the shell emits OSC 133 markers, the prompt regex is not needed
+        self._integrated = False
+        # a command started (OSC 133 C) and its end was not marked yet
+        self._command_started = False
+        self._subscribers = []
+        self.recorder = None
+        # None until enabled, see enable_metrics
+        self.metrics = None
+        # None until enabled, see enable_search_index
+        self.search_index = None
+        self._indexed_end = 0
+
+        # commands awaited with `run`, by token: (loop, future)
+        self._waiters = {}
+        self._tokens = itertools.count(1)
+        self._run_lock = None
+        # start of the output of the command being captured, None outside
+        # of `run`
+        self._capture = None
+
+    @property
+    def backlog(self) -> int:
+        """Characters of output waiting to be processed."""
+
+        return self._fed - self._processed
+
+    @property
+    def pending(self) -> int:
+        """Number of output chunks waiting to be processed."""
+
+        return len(self._output)
+
+    def subscribe(self, callback: typing.Callable[[list], None]) -> None:
+        """Call `callback` with the list of updates of every `process` call.
+
+        Args:
+            callback (Callable): Subscriber."""
+
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: typing.Callable[[list], None]) -> None:
+        """Stop calling a subscriber."""
+
+        self._subscribers.remove(callback)
+
+    def start(self, argv: list[str] = None, pty: WarmPty = None) -> None:
+        """Spawn the shell and start reading its output.
+
+        Args:
+            argv (list): Command line of the shell, defaults to `argv`.
+            pty (WarmPty): Shell already spawned by a `PtyPool` to use instead
+                of spawning one."""
+
+        if pty:
+            self.argv = argv or self.argv
+            self.started_at = time.perf_counter()
+            self.p = pty.p
+            self.p.setwinsize(self.screen.rows, self.screen.cols)
+            self.alive = True
+            # the pty stays registered to the reactor of the pool
+            self.reactor = pty.reactor
+            pty.handoff(self)
+            return
+
+        if os.name == "nt":
+            from winpty import PtyProcess as PTY
+        else:
+            # raw bytes, decoded by `process`
+            from ptyprocess import PtyProcess as PTY
+
+        self.argv = argv or self.argv
+        self.started_at = time.perf_counter()
+        self.p = PTY.spawn(
+            self.argv,
+            cwd=self.cwd,
+            env=self.env,
+            dimensions=(self.screen.rows, self.screen.cols),
+        )
+        self.alive = True
+
+        if os.name == "nt":
+            self._reader = Thread(
+                target=self._read_loop, name="mono-reader", daemon=True
+            )
+            self._reader.start()
+        else:
+            self.reactor = self.reactor or get_reactor()
+            self.reactor.register(self.p.fd, self._on_data, self._on_close)
+
+    def stop(self) -> None:
+        """Stop reading the output of the shell."""
+
+        if self.alive and os.name != "nt":
+            self.reactor.unregister(self.p.fd)
+        self.alive = False
+        self.paused = False
+        self._resumed.set()
+
+    def close(self, timeout: float = 0.5, block: bool = True) -> int | None:
+        """Terminate the shell and release its pty: stop reading it, send
+        SIGHUP to the shell, then SIGTERM and SIGKILL if it is still running
+        `timeout` seconds after the previous signal, close the pty and join
+        the reader thread. Safe to call more than once.
+
+        Args:
+            timeout (float): Seconds given to the shell after every signal,
+                and to the threads to let go of the pty.
+            block (bool): Wait for the shell to be terminated. Otherwise only
+                stop reading the pty, the rest is done on a background thread
+                and `exited` is set once done.
+
+        Returns:
+            int: Exit status of the shell, see `Exited`, None if it could not
+                be terminated, was never started or `block` is False."""
+
+        if not (p := self.p):
+            return None
+
+        if not block:
+            if os.name != "nt" and self.reactor:
+                # the output stops right away, without waiting for the reactor
+                self.reactor.unregister(p.fd)
+            self.alive = False
+            Thread(
+                target=self.close, args=(timeout,), name="mono-close", daemon=True
+            ).start()
+            return None
+
+        with self._close_lock:
+            if os.name != "nt" and self.reactor:
+                # the descriptor may only be closed once the reactor dropped it
+                self.reactor.unregister(p.fd, timeout)
+            self.alive = False
+            self.paused = False
+            self._resumed.set()
+
+            get_reaper().unwatch(p)
+            try:
+                status = terminate(p, timeout)
+            finally:
+                # the pty is released whatever happens to the shell
+                close_pty(p)
+            if self._reader:
+                self._reader.join(timeout)
+                self._reader = None
+            if status is not None:
+                self._on_exit(status)
+            return status
+
+    def write(self, data: str) -> None:
+        """Send input to the shell.
+
+        Args:
+            data (str): Input, sent as is."""
+
+        self.p.write(data if os.name == "nt" else data.encode())
+        if self.recorder:
+            self.recorder.input(data)
+
+    def run_command(self, command: str) -> None:
+        """Queue a command, it is sent once the shell is ready and the
+        previous commands completed.
+
+        Args:
+            command (str): Command to run."""
+
+        self._commands.append(command)
+        self._send_commands()
+
+    @property
+    def queued(self) -> int:
+        """Number of commands waiting to be sent."""
+
+        return len(self._commands)
+
+    def _send_commands(self) -> None:
+        with self._commands_lock:
+            while (
+                self.alive
+                and self.ready
+                and self._commands
+                and self._in_flight < self.pipeline
+            ):
+                self._in_flight += 1
+                self.write(self._commands.popleft() + "\r")
+
+    def _on_prompt(self, completed: int = 1) -> None:
+        """The shell printed a prompt, the commands sent before completed.
+
+        Args:
+            completed (int): Number of commands completed, None for all."""
+
+        with self._commands_lock:
+            if not self.ready:
+                self.ready = True
+                self.ready_at = time.perf_counter()
+            if completed is None:
+                self._in_flight = 0
+            else:
+                self._in_flight = max(self._in_flight - completed, 0)
+        self._send_commands()
+
+    async def run(self, command: str, timeout: float = None) -> Result:
+        """Run a command and wait for it to finish.
+
+        The command is wrapped with ``printf`` calls printing OSC 777 markers
+        with its exit status, so this requires a POSIX shell. Commands run on
+        the same session are serialized, commands on different sessions run
+        concurrently.
+
+        The output is only seen once the session is processed, either by
+        `autoprocess`, a `Terminal` showing the session or your own calls to
+        `process`.
+
+        Args:
+            command (str): Command to run, on a single line.
+            timeout (float): Seconds to wait, None to wait forever.
+
+        Returns:
+            Result: Exit status and output (without escape sequences) of the command.
+
+        Raises:
+            TimeoutError: The command did not finish in time, it keeps running."""
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self._run_lock is None:
+            self._run_lock = asyncio.Lock()
+
+        async with self._run_lock:
+            token = str(next(self._tokens))
+            future = loop.create_future()
+            self._waiters[token] = (loop, future)
+            try:
+                self.run_command(self.wrap(command, token))
+                return await asyncio.wait_for(future, timeout)
+            finally:
+                self._waiters.pop(token, None)
+
+    def wrap(self, command: str, token: str) -> str:
+        """Wrap a command to print the start and end markers used by `run`.
+        Override for shells without ``printf``.
+
+        Args:
+            command (str): Command to run.
+            token (str): Identifier of the command in the markers."""
+
+        return (
+            f"printf '\\033]777;mono;start;{token}\\007'; {command}; "
+            f"printf '\\033]777;mono;end;{token};%d\\007' $?"
+        )
+
+    def start_recording(self, path: str, **kwargs) -> Recorder:
+        """Record the output, input and resizes of the session to an asciicast
+        file, written from a background thread.
+
+        Args:
+            path (str): File to write.
+            **kwargs: Options of `Recorder`.
+
+        Returns:
+            Recorder: The recorder, also available as `recorder`."""
+
+        from .recorder import Recorder
+
+        self.stop_recording()
+        kwargs.setdefault("width", self.screen.cols)
+        kwargs.setdefault("height", self.screen.rows)
+        kwargs.setdefault("title", self.title)
+        self.recorder = Recorder(path, **kwargs)
+        return self.recorder
+
+    def stop_recording(self) -> None:
+        """Stop recording, the queued events are written before returning."""
+
+        if recorder := self.recorder:
+            self.recorder = None
+            recorder.close()
+
+    def enable_metrics(self) -> Metrics:
+        """Start recording metrics, available as `metrics`."""
+
+        if self.metrics is None:
+            self.metrics = Metrics()
+        return self.metrics
+
+    def disable_metrics(self) -> None:
+        self.metrics = None
+
+    def enable_search_index(self) -> SearchIndex:
+        """Maintain a trigram index of the scrollback for `search`, available
+        as `search_index`."""
+
+        from .search import SearchIndex
+
+        if self.search_index is None:
+            self.search_index = SearchIndex()
+            self.search_index.update(self.scrollback)
+        return self.search_index
+
+    def disable_search_index(self) -> None:
+        if index := self.search_index:
+            self.search_index = None
+            index.close()
+
+    def search(
+        self,
+        pattern: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        callback: typing.Callable[[list[Match]], None] = None,
+    ) -> Search:
+        """Search the scrollback on a worker thread, see `Search`. Must be
+        called from the thread processing the session.
+
+        Args:
+            pattern (str): Text or regular expression searched.
+            regex (bool): Whether `pattern` is a regular expression.
+            ignore_case (bool): Case insensitive search.
+            callback (callable): Called from the worker with every batch of
+                matches, newest first.
+
+        Returns:
+            Search: The running search."""
+
+        from .search import Search
+
+        return Search(
+            self.scrollback,
+            pattern,
+            regex=regex,
+            ignore_case=ignore_case,
+            callback=callback,
+            index=self.search_index,
+        )
+
+    def resize(self, rows: int, cols: int) -> None:
+        """Change the size of the pty and of the screen.
+
+        Args:
+            rows (int): Number of rows.
+            cols (int): Number of columns."""
+
+        self.screen.resize(rows, cols)
+        self.scrollback.editable = rows
+        if self.recorder:
+            self.recorder.resize(rows, cols)
+        if self.p:
+            self.p.setwinsize(rows, cols)
+
+    def feed(self, data: str | bytes) -> None:
+        """Queue output as if it was read from the pty.
+
+        Args:
+            data (str): Output, text or UTF-8 bytes decoded when processed."""
+
+        self._output.append(data)
+        self._fed += len(data)
+        if self.recorder:
+            self.recorder.output(data)
+        if self.autoprocess:
+            self.process()
+        elif (
+            self.high_water
+            and self._fed - self._processed > self.high_water
+            and self.flood == "pause"
+            and not self.paused
+        ):
+            self._pause()
+
+    def interrupt(self) -> None:
+        """Send Ctrl-C to the shell right away and skip the output waiting to
+        be processed, so that what follows the interruption shows up without
+        waiting for the backlog to be rendered. Must be called from the
+        thread processing the session."""
+
+        if self.p and self.alive:
+            self.write("\x03")
+        self._skip(0)
+        if self.paused:
+            self._resume()
+
+    def _pause(self) -> None:
+        self.paused = True
+        if os.name == "nt":
+            self._resumed.clear()
+        elif self.p and self.alive:
+            self.reactor.pause(self.p.fd)
+
+    def _resume(self) -> None:
+        self.paused = False
+        if os.name == "nt":
+            self._resumed.set()
+        elif self.p and self.alive:
+            self.reactor.resume(self.p.fd)
+
+    def _skip(self, keep: int) -> None:
+        """Drop the oldest queued output, keeping about `keep` characters.
+        The markers and screen switches of the dropped output are kept."""
+
+        dropped = []
+        size = 0
+        while self._output and self._fed - self._processed - size > keep:
+            buf = self._output.popleft()
+            dropped.append(buf)
+            size += len(buf)
+        if not dropped:
+            return
+
+        self._processed += size
+        self.skipped += size
+        # the dropped output is not decoded, only searched for the sequences
+        # kept, and the next output is decoded from a character boundary
+        kept = []
+        for kind, chunks in itertools.groupby(dropped, key=type):
+            if kind is str:
+                kept += KEPT.findall("".join(chunks))
+            else:
+                data = b"".join(chunks)
+                kept += (m.decode(errors="replace") for m in KEPT_BYTES.findall(data))
+        kept = "".join(kept)
+        self._decoder.reset()
+        if self._output and not isinstance(head := self._output[0], str):
+            # the rest of a character split by the skip
+            rest = len(head) - len(head.lstrip(CONTINUATION))
+            if rest:
+                self._output[0] = head[rest:]
+                self._processed += rest
+        notice = f"{kept}\r\n[{size} characters skipped]\r\n"
+        self._output.appendleft(notice)
+        # not output of the shell
+        self._processed -= len(notice)
+
+    def _on_data(self, data: bytes) -> None:
+        """Called by the reactor thread with the bytes read from the pty,
+        they are only decoded by `process`."""
+
+        if (metrics := self.metrics) is not None:
+            metrics.reads += 1
+            metrics.bytes_read += len(data)
+        self.feed(data)
+
+    def _on_close(self) -> None:
+        """Called by the reactor thread once the shell has exited."""
+
+        self.alive = False
+        if self.p and not self.exited.is_set():
+            get_reaper().watch(self.p, self._on_exit)
+
+    def _on_exit(self, status: int) -> None:
+        """Called with the exit status of the shell, from any thread."""
+
+        if not self.exited.is_set():
+            self.exit_status = status
+            self.exited.set()
+
+    def _read_loop(self) -> None:
+        """Reader thread used on windows, where ptys are not selectable."""
+
+        while self.alive:
+            self._resumed.wait()
+            try:
+                buf = self.p.read()
+            except (EOFError, OSError):
+                # the shell has exited, nothing more will be read
+                if self.alive:
+                    self._on_close()
+                break
+
+            if buf:
+                if (metrics := self.metrics) is not None:
+                    metrics.reads += 1
+                    metrics.bytes_read += len(buf)
+                self.feed(buf)
+
+    def process(self, budget: int = None) -> list:
+        """Parse the queued output and update the scrollback and the screen.
+
+        Args:
+            budget (int): Maximum number of characters processed, the rest is
+                left for the next call. None to process everything.
+
+        Returns:
+            list: Updates, also passed to the subscribers."""
+
+        if (metrics := self.metrics) is not None:
+            metrics.queue_depth.observe(len(self._output))
+            start = time.perf_counter()
+
+        if (
+            self.flood == "tail"
+            and self.high_water
+            and self._fed - self._processed > self.high_water
+        ):
+            self._skip(self.low_water)
+
+        chunks = []
+        size = 0
+        while self._output and (budget is None or size < budget):
+            buf = self._output.popleft()
+            size += len(buf)
+            chunks.append(buf)
+        self._processed += size
+        if self.paused and self._fed - self._processed <= self.low_water:
+            self._resume()
+
+        # reported after the last output
+        exited = (
+            self.exited.is_set() and not self._exit_reported and not self._output
+        )
+        if not chunks and not exited:
+            return []
+
+        updates = []
+        runs = []
+        run = []
+        screen = []
+        style = self.style
+        capture = self._capture
+        written = False
+
+        events = self.parser.feed(self._decode(chunks)) if chunks else []
+        if metrics is not None:
+            metrics.parse.observe(time.perf_counter() - start)
+
+        for event in events:
+            if type(event) is Title:
+                self.title = event.title
+                updates.append(TitleChanged(event.title))
+            elif type(event) is OSC and event.command == "777":
+                # the output captured is read back from the scrollback
+                if run:
+                    runs.append(("".join(run), style))
+                    run = []
+                if runs:
+                    self._write_scrollback(runs, updates)
+                    runs = []
+                    written = True
+                capture = self._marker(event.data, capture)
+            elif type(event) is OSC and event.command == "133":
+                self._integrated = True
+                match event.data.partition(";")[0]:
+                    case "C":
+                        self._command_started = True
+                    case "D":
+                        self._command_started = False
+                        self._on_prompt()
+                    case "A":
+                        # a prompt alone completes nothing, unless the shell
+                        # marks the start of commands and not their end
+                        self._on_prompt(1 if self._command_started else 0)
+                        self._command_started = False
+            elif self.screen.alternate:
+                screen.append(event)
+                if switches_screen(event):
+                    self.screen.feed(screen)
+                    screen = []
+                    if not self.screen.alternate:
+                        updates.append(ScreenChanged(False))
+            else:
+                match event:
+                    case Text(text):
+                        run.append(text)
+                    case SGR(params):
+                        self.style = apply_sgr(self.style, params)
+                        if self.style != style:
+                            if run:
+                                runs.append(("".join(run), style))
+                                run = []
+                            style = self.style
+                    case CursorMove("H", (_, 1)):
+                        # moving to the start of a line, used instead of newlines on windows
+                        run.append("\n")
+                    case Control("\r" | "\b") | CursorMove(
+                        "A" | "B" | "C" | "D" | "E" | "F" | "G"
+                    ) | CSI("K" | "J", _, ""):
+                        if run:
+                            runs.append(("".join(run), style))
+                            run = []
+                        if runs:
+                            self._write_scrollback(runs, updates)
+                            runs = []
+                        self._edit(event)
+                        written = True
+                    case CSI() if switches_screen(event):
+                        self.screen.feed([event])
+                        if self.screen.alternate:
+                            if run:
+                                runs.append(("".join(run), style))
+                                run = []
+                            if runs:
+                                self._write_scrollback(runs, updates)
+                                runs = []
+                            self._rewritten(updates)
+                            updates.append(ScreenChanged(True))
+
+        self._capture = capture
+        if screen:
+            self.screen.feed(screen)
+        if run:
+            runs.append(("".join(run), style))
+        if runs:
+            self._write_scrollback(runs, updates)
+            written = True
+        self._rewritten(updates)
+        if written:
+            index = self.search_index
+            if index is not None and self.scrollback.packed != self._indexed_end:
+                self._indexed_end = self.scrollback.packed
+                index.update(self.scrollback)
+            if not self._integrated and not self.screen.alternate:
+                # no shell integration, the output ending with a prompt is
+                # the best guess that the shell is waiting for a command. The
+                # prompts of pipelined commands can't be told apart from their
+                # output, so they are all considered completed
+                if self.prompt.search(self.scrollback.line(-1)):
+                    self._on_prompt(None)
+
+        if exited:
+            self._exit_reported = True
+            updates.append(Exited(self.exit_status))
+
+        if metrics is not None:
+            metrics.process.observe(time.perf_counter() - start)
+        for callback in self._subscribers:
+            callback(updates)
+        return updates
+
+    def _decode(self, chunks: list) -> str:
+        """Text of queued chunks. Consecutive chunks of bytes are decoded at
+        once, characters split between two reads are decoded once complete."""
+
+        decode = self._decoder.decode
+        parts = []
+        raw = []
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                if raw:
+                    parts.append(decode(b"".join(raw)))
+                    raw = []
+                parts.append(chunk)
+            else:
+                raw.append(chunk)
+        if raw:
+            parts.append(decode(b"".join(raw)))
+        if (metrics := self.metrics) is not None:
+            metrics.decodes += 1
+        return parts[0] if len(parts) == 1 else "".join(parts)
+
+    def _marker(self, data: str, capture: tuple | None) -> tuple | None:
+        """Handle a marker printed by a command wrapped by `wrap`, returns the
+        new capture start: absolute scrollback line and column of the cursor
+        at the start marker."""
+
+        match data.split(";"):
+            case ["mono", "start", _]:
+                return self.scrollback.end - 1 - self._row, self._cursor()
+            case ["mono", "end", token, status]:
+                if waiter := self._waiters.pop(token, None):
+                    loop, future = waiter
+                    result = Result(int(status), self._captured(capture))
+                    loop.call_soon_threadsafe(_resolve, future, result)
+                return None
+        return capture
+
+    def _captured(self, capture: tuple | None) -> str:
+        """Output from the capture start to the end of the scrollback, as
+        shown once carriage returns and erases are applied."""
+
+        if capture is None:
+            return ""
+        scrollback = self.scrollback
+        line, col = capture
+        if not scrollback.start <= line < scrollback.end:
+            # trimmed or cleared meanwhile, what is left
+            line, col = scrollback.start, 0
+        lines = scrollback.lines(line - scrollback.start, len(scrollback))
+        if not lines:
+            return ""
+        lines[0] = lines[0][col:]
+        return "\n".join(lines)
+
+    def _write_scrollback(self, runs: list, updates: list) -> None:
+        if self._dirty is None and not self._row and self._col is None:
+            for text, style in runs:
+                self.scrollback.write(text, style)
+            updates.append(Output(runs))
+            return
+
+        appended = []
+        for text, style in runs:
+            if self._row or self._col is not None:
+                if appended:
+                    updates.append(Output(appended))
+                    appended = []
+                text = self._overwrite(text, style)
+                if not text:
+                    continue
+            self.scrollback.write(text, style)
+            # otherwise part of the rewritten lines
+            if self._dirty is None:
+                appended.append((text, style))
+        if appended:
+            updates.append(Output(appended))
+
+    def _overwrite(self, text: str, style: Style) -> str:
+        """Write text over the line under the cursor, returns the rest of the
+        text once the cursor is back at the end of the output."""
+
+        scrollback = self.scrollback
+        # the lines above may have been packed by `Terminal.clear`
+        self._row = min(self._row, scrollback.end - scrollback.packed - 1)
+        while text and (self._row or self._col is not None):
+            line, newline, text = text.partition("\n")
+            i = len(scrollback) - 1 - self._row
+            if line:
+                col = self._cursor()
+                length = len(scrollback.line(i))
+                if col == 0 and len(line) >= length:
+                    # the usual redraw of a whole line after a carriage return
+                    runs = [(line, style)]
+                else:
+                    runs = scrollback.runs(i)
+                    if length < col:
+                        runs.append((" " * (col - length), DEFAULT))
+                    runs = _splice(runs, col, col + len(line), [(line, style)])
+                self._touch(i)
+                scrollback.rewrite(i, runs)
+                self._col = col + len(line)
+                if not self._row and self._col >= length:
+                    self._col = None
+            if newline:
+                # the parser turns \r\n into \n, back to the start of the line
+                if self._row:
+                    self._row -= 1
+                    self._col = 0
+                    self._settle()
+                else:
+                    self._touch(i)
+                    scrollback.write("\n")
+                    self._col = None
+        return text
+
+    def _edit(self, event: Control | CursorMove | CSI) -> None:
+        """Move the cursor or erase scrollback lines."""
+
+        scrollback = self.scrollback
+        if event == CR:
+            self._col = 0
+            self._settle()
+            return
+
+        self._row = min(self._row, scrollback.end - scrollback.packed - 1)
+        col = self._cursor()
+        match event:
+            case Control("\b"):
+                col = max(col - 1, 0)
+            case CursorMove(command, params):
+                n = max(params[0], 1) if params else 1
+                cols = self.screen.cols
+                last = cols - 1
+                match command:
+                    case "A" | "F":
+                        # only over the lines that can still be rewritten
+                        editable = scrollback.end - scrollback.packed - 1
+                        self._row = min(self._row + n, editable)
+                    case "B" | "E":
+                        self._row = max(self._row - n, 0)
+                    case "C":
+                        # stopped at the right margin, like the screen
+                        col = max(min(col + n, last), col)
+                    case "D":
+                        col = max(col - n, 0)
+                    case "G":
+                        col = min(n, cols) - 1
+                if command in "EF":
+                    col = 0
+            case CSI(command, params):
+                mode = params[0] if params else 0
+                i = len(scrollback) - 1 - self._row
+                if command == "J":
+                    # only erasing below the cursor, clearing the screen
+                    # would clear the history
+                    if mode:
+                        return
+                    if self._row:
+                        self._touch(i)
+                        scrollback.truncate(i)
+                        self._row = 0
+                        i = len(scrollback) - 1
+                line = scrollback.line(i)
+                match mode:
+                    case 0:
+                        text = line[:col]
+                    case 1:
+                        text = " " * min(col + 1, len(line)) + line[col + 1 :]
+                    case _:
+                        text = ""
+                if text != line:
+                    runs = scrollback.runs(i)
+                    if mode == 0:
+                        runs = _splice(runs, col, len(line), [])
+                    elif mode == 1:
+                        runs = _splice(runs, 0, col + 1, [(text[: col + 1], DEFAULT)])
+                    else:
+                        runs = []
+                    self._touch(i)
+                    scrollback.rewrite(i, runs)
+        self._col = col
+        self._settle()
+
+    def _cursor(self) -> int:
+        """Column of the cursor."""
+
+        if self._col is None:
+            return len(self.scrollback.line(-1))
+        return self._col
+
+    def _settle(self) -> None:
+        """Append again once the cursor is at the end of the output."""
+
+        if not self._row and self._col == len(self.scrollback.line(-1)):
+            self._col = None
+
+    def _touch(self, i: int) -> None:
+        """Mark a line as rewritten, before changing it."""
+
+        line = self.scrollback.start + i
+        if self._dirty is None:
+            self._synced = self.scrollback.end - 1
+            self._dirty = line
+        else:
+            self._dirty = min(self._dirty, line)
+
+    def _rewritten(self, updates: list) -> None:
+        """Report the lines rewritten since the last update."""
+
+        if self._dirty is None:
+            return
+        scrollback = self.scrollback
+        start = max(self._dirty, scrollback.start)
+        lines = [
+            scrollback.runs(i - scrollback.start) for i in range(start, scrollback.end)
+        ]
+        updates.append(Rewrite(start, lines, self._synced))
+        self._dirty = None
+
+
+def _splice(runs: list, start: int, end: int, insert: list) -> list:
+    """Replace the columns [start, end) of a line given as (text, style) runs."""
+
+    head = []
+    tail = []
+    pos = 0
+    for text, style in runs:
+        if pos < start:
+            head.append((text[: start - pos], style))
+        if pos + len(text) > end:
+            tail.append((text[max(end - pos, 0) :], style))
+        pos += len(text)
+    return head + insert + tail
+
+
+def _resolve(future: asyncio.Future, result: Result) -> None:
+    if not future.done():
+        future.set_result(result)
@@ -1,23 +1,113 @@
 from __future__ import annotations
 
-import platform
+import importlib
+import sys
 import typing
-
-from .bash import Bash
-from .cmd import CommandPrompt
-from .default import Default
-from .powershell import PowerShell
-from .python import Python
+from collections.abc import MutableMapping
 
 if typing.TYPE_CHECKING:
     from mono import Terminal
 
-SHELLS = {"Default": Default, "Powershell": PowerShell, "Python": Python}
-
-if platform.system() == "Windows":
-    SHELLS["Command Prompt"] = CommandPrompt
-elif platform.system() == "Linux":
-    SHELLS["Bash"] = Bash
+    from .bash import Bash
+    from .cmd import CommandPrompt
+    from .default import Default
+    from .powershell import PowerShell
+    from .python import Python
+
+# shell classes of this package, imported on first use
+CLASSES = {
+    "Bash": ".bash",
+    "CommandPrompt": ".cmd",
+    "Default": ".default",
+    "PowerShell": ".powershell",
+    "Python": ".python",
+}
+
+__all__ = [
+    *CLASSES,
+    "SHELLS",
+    "get_available_shells",
+    "get_shell_from_name",
+    "register_shell",
+    "is_shell_registered",
+]
+
+# entry point group third party packages register their shells in, e.g.
+# [project.entry-points."mono.shells"] NodeJS = "mono_node:NodeJS"
+ENTRY_POINTS = "mono.shells"
+
+
+class ShellRegistry(MutableMapping):
+    """Shells by name. Shells can be registered as classes or as
+    "module:Class" strings, which are only imported when the shell is first
+    looked up. Shells registered by installed packages under the
+    ``mono.shells`` entry point group are added on first use."""
+
+    def __init__(self, shells: dict) -> None:
+        self._shells = dict(shells)
+        self._discovered = False
+
+    def _discover(self) -> None:
+        if self._discovered:
+            return
+        self._discovered = True
+
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=ENTRY_POINTS):
+            self._shells.setdefault(entry_point.name, entry_point)
+
+    def __getitem__(self, name: str) -> Terminal:
+        self._discover()
+        shell = self._shells[name]
+        if isinstance(shell, str):
+            module, _, attr = shell.partition(":")
+            shell = getattr(importlib.import_module(module, __name__), attr)
+            self._shells[name] = shell
+        elif not isinstance(shell, type):
+            # an entry point
+            shell = self._shells[name] = shell.load()
+        return shell
+
+    def __setitem__(self, name: str, shell: Terminal | str) -> None:
+        self._shells[name] = shell
+
+    def __delitem__(self, name: str) -> None:
+        del self._shells[name]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        self._discover()
+        return iter(self._shells)
+
+    def __len__(self) -> int:
+        self._discover()
+        return len(self._shells)
+
+    def __contains__(self, name: object) -> bool:
+        self._discover()
+        return name in self._shells
+
+
+SHELLS = ShellRegistry(
+    {
+        "Default": ".default:Default",
+        "Powershell": ".powershell:PowerShell",
+        "Python": ".python:Python",
+    }
+)
+
+if sys.platform == "win32":
+    SHELLS["Command Prompt"] = ".cmd:CommandPrompt"
+elif sys.platform.startswith("linux"):
+    SHELLS["Bash"] = ".bash:Bash"
+
+
+def __getattr__(name: str) -> typing.Any:
+    if module := CLASSES.get(name):
+        value = getattr(importlib.import_module(module, __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_available_shells() -> dict[str, Terminal]:
@@ -38,15 +128,19 @@ def get_shell_from_name(name: str) -> Terminal | Default:
         Terminal: The shell class.
     """
 
-    return SHELLS.get(name, Default)
+    try:
+        return SHELLS[name]
+    except KeyError:
+        return SHELLS["Default"]
 
 
-def register_shell(name: str, shell: Terminal) -> None:
+def register_shell(name: str, shell: Terminal | str) -> None:
     """Register a new shell.
 
     Args:
         name (str): The name of the shell.
-        shell (Terminal): The shell class.
+        shell (Terminal): The shell class, or a "module:Class" string to
+            import it on first use.
     """
 
     SHELLS[name] = shell
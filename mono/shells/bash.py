@@ -2,6 +2,11 @@ import tkinter as tk
 
 from ..terminal import Terminal
 
+# makes bash mark its prompts (OSC 133 A) and the status of the last command (D)
+INTEGRATION = {
+    "PROMPT_COMMAND": "printf '\\033]133;D;%s\\007\\033]133;A\\007' \"$?\""
+}
+
 
 class Bash(Terminal):
     """Linux Bash - Checks for bash executable in path and opens that in terminal. 
@@ -10,6 +15,7 @@ class Bash(Terminal):
     shell = "/bin/bash"
     name = "Bash"
     icon = "bash"
+    integration = INTEGRATION
     
     def __init__(self, master, *args, **kwargs) -> None:
         super().__init__(master, *args, **kwargs)
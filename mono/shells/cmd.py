@@ -21,3 +21,6 @@ class CommandPrompt(Terminal):
             return
 
         self.start_service()
+
+    def chdir_command(self, path: str) -> str:
+        return f'cd /d "{path}"'
@@ -1,20 +1,39 @@
 import os
 import tkinter as tk
 from ..terminal import Terminal
+from .bash import INTEGRATION
+from .cmd import CommandPrompt
+from .powershell import PowerShell
+
+# shells COMSPEC/SHELL may resolve to whose commands differ from the posix ones
+CLASSES = {"cmd": CommandPrompt, "powershell": PowerShell, "pwsh": PowerShell}
+
+
+def default_shell() -> str:
+    """Get the shell of the host machine, from the COMSPEC/SHELL environmental variables."""
+
+    return os.environ.get('COMSPEC') or os.environ.get('SHELL')
 
 
 class Default(Terminal):
     """Default Terminal - Checks COMSPEC/SHELL environmental variables set in the host machine
-    and opens that in terminal. Shows Not Detected in case variable is not set."""
+    and opens that in terminal. Shows Not Detected in case variable is not set.
 
-    # get the correct shell command depending on platform
-    shell = os.environ.get('COMSPEC') or os.environ.get('SHELL')
-    name = icon = os.path.splitext(os.path.basename(shell))[0]
+    The shell is looked up when the terminal is created, not when mono is imported."""
+
+    shell = None
+    name = icon = "Default"
 
     def __init__(self, master, *args, **kwargs) -> None:
+        # get the correct shell command depending on platform
+        self.shell = default_shell()
+        if self.shell:
+            self.name = self.icon = os.path.splitext(os.path.basename(self.shell))[0]
+            self.integration = INTEGRATION if self.name == "bash" else None
+
         super().__init__(master, *args, **kwargs)
 
-        self.available = self.check_shell()
+        self.available = self.shell and self.check_shell()
         if not (self.shell and self.available):
             tk.Label(self, text="No shells detected for the host os, report an issue otherwise.").grid()
             self.name = "Not Detected"
@@ -22,3 +41,9 @@ class Default(Terminal):
             return
 
         self.start_service()
+
+    def chdir_command(self, path: str) -> str:
+        # the command of the shell the variables resolved to
+        if cls := CLASSES.get(self.name.lower()):
+            return cls.chdir_command(self, path)
+        return super().chdir_command(path)
@@ -23,3 +23,6 @@ class PowerShell(Terminal):
             return
 
         self.start_service()
+
+    def chdir_command(self, path: str) -> str:
+        return "Set-Location -LiteralPath '{}'".format(path.replace("'", "''"))
@@ -20,4 +20,7 @@ class Python(Terminal):
             self.icon = "error"
             return
 
-        self.start_service()
\ No newline at end of file
+        self.start_service()
+
+    def chdir_command(self, path: str) -> str:
+        return f"import os; os.chdir({path!r})"
@@ -6,15 +6,69 @@ ICONS = {
     "powershell": "terminal-powershell"
 }
 
-class Tab(tk.Frame):
-    def __init__(self, master, terminal, *args, **kwargs) -> None:
+class Tab:
+    """A terminal of the tab strip.
+
+    Tabs are linked to their neighbours in the order of the strip and have
+    no widgets of their own: `Tabs` only creates a `TabRow` for every
+    visible row and shows the tabs in them.
+
+    Args:
+        master (Tabs): The tab strip.
+        terminal (Terminal): Terminal shown while the tab is selected."""
+
+    def __init__(self, master, terminal) -> None:
+        self.master = master
+        self.terminal = terminal
+        self.name = terminal.name or terminal.__class__.__name__
+        self.selected = False
+
+        # neighbours in the strip
+        self.prev = None
+        self.next = None
+
+    def close(self, *_) -> None:
+        self.master.close_tab(self)
+
+    def deselect(self, *_) -> None:
+        if self.selected:
+            self.terminal.grid_remove()
+            self.terminal.suspend_rendering()
+            self.selected = False
+            self.master.update_tab(self)
+
+    def select(self, *_) -> None:
+        if not self.selected:
+            self.master.set_active_tab(self)
+            self.terminal.grid(column=0, row=0, sticky=tk.NSEW)
+            self.terminal.resume_rendering()
+            self.selected = True
+            self.master.update_tab(self)
+
+            if getattr(self.terminal, "deferred", False):
+                # tabs restored together are all selected in turn, only the
+                # one still selected once they are added is spawned
+                self.terminal.after_idle(self.spawn)
+
+    def spawn(self, *_) -> None:
+        if self.selected and self.terminal.winfo_exists():
+            self.terminal.spawn()
+
+
+class TabRow(tk.Frame):
+    """Widgets of a visible row of the tab strip, showing one tab and reused
+    for other tabs as the strip scrolls."""
+
+    def __init__(self, master, *args, **kwargs) -> None:
         super().__init__(master, *args, **kwargs)
         self.master = master
         self.base = master.base
         self.theme = self.base.theme
 
-        self.terminal = terminal
-        self.selected = False
+        self.tab = None
+        self.hovered = False
+        # (name, bg, fg) shown, the widgets are only reconfigured on changes
+        self._shown = None
 
         self.bg, self.fg, self.hbg, self.hfg = self.theme.tab
         self.config(bg=self.theme.border)
@@ -22,8 +76,7 @@ class Tab(tk.Frame):
         self.container = tk.Frame(self, bg=self.bg)
         self.container.pack(side=tk.LEFT, fill=tk.X, expand=True) # for lines bw set pady=(0,1)
 
-        self.name_label = tk.Label(self, text=terminal.name  or terminal.__class__.__name__, padx=5, 
-                             font=('Segoe UI', 11), anchor=tk.W, bg=self.bg, fg=self.fg)
+        self.name_label = tk.Label(self, padx=5, font=('Segoe UI', 11), anchor=tk.W, bg=self.bg, fg=self.fg)
         self.name_label.pack(in_=self.container, side=tk.LEFT, expand=True, fill=tk.X)
 
         self.closebtn = tk.Label(self, text='×', font=('Arial', 15), fg=self.fg, bg=self.bg)
@@ -36,39 +89,41 @@ class Tab(tk.Frame):
         self.bind("<Enter>", self.on_hover)
         self.bind("<Leave>", self.off_hover)
 
-    def close(self, *_) -> None:
-        self.master.close_tab(self)
+        for widget in (self, self.container, self.name_label, self.closebtn):
+            widget.bind("<MouseWheel>", self.master._mousewheel)
+            widget.bind("<Button-4>", lambda _: self.master.scroll(-3))
+            widget.bind("<Button-5>", lambda _: self.master.scroll(3))
 
-    def on_hover(self, *_) -> None:
-        if not self.selected:
-            self.name_label.config(bg=self.hbg)
-            self.container.config(bg=self.hbg)
-            self.closebtn.config(bg=self.hbg)
+    def show(self, tab: Tab) -> None:
+        """Show a tab in the row, or its new state."""
 
-            self.hovered = True
+        self.tab = tab
+        if tab.selected:
+            bg, fg = self.hbg, self.hfg
+        else:
+            bg, fg = self.hbg if self.hovered else self.bg, self.fg
+        if self._shown == (tab.name, bg, fg):
+            return
+        self._shown = (tab.name, bg, fg)
 
-    def off_hover(self, *_) -> None:
-        if not self.selected:
-            self.name_label.config(bg=self.bg)
-            self.container.config(bg=self.bg)
-            self.closebtn.config(bg=self.bg)
-            self.hovered = False
+        self.name_label.config(text=tab.name, bg=bg, fg=fg)
+        self.container.config(bg=bg)
+        self.closebtn.config(bg=bg, activeforeground=fg)
 
-    def deselect(self, *_) -> None:
-        if self.selected:
-            self.terminal.grid_remove()
+    def select(self, *_) -> None:
+        if self.tab:
+            self.tab.select()
 
-            self.name_label.config(bg=self.bg, fg=self.fg)
-            self.container.config(bg=self.bg)
-            self.closebtn.config(bg=self.bg, activeforeground=self.fg)
-            self.selected = False
+    def close(self, *_) -> None:
+        if self.tab:
+            self.tab.close()
 
-    def select(self, *_) -> None:
-        if not self.selected:
-            self.master.set_active_tab(self)
-            self.terminal.grid(column=0, row=0, sticky=tk.NSEW)
+    def on_hover(self, *_) -> None:
+        self.hovered = True
+        if self.tab:
+            self.show(self.tab)
 
-            self.name_label.config(bg=self.hbg, fg=self.hfg)
-            self.container.config(bg=self.hbg)
-            self.closebtn.config(bg=self.hbg, activeforeground=self.hfg)
-            self.selected = True
+    def off_hover(self, *_) -> None:
+        self.hovered = False
+        if self.tab:
+            self.show(self.tab)
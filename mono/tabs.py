@@ -1,9 +1,20 @@
 import tkinter as tk
 
-from .tab import Tab
+from .tab import Tab, TabRow
 
 
 class Tabs(tk.Frame):
+    """Tab strip of `Terminals`, one tab per terminal.
+
+    The tabs form a doubly linked list in the order of the strip, indexed by
+    terminal and by name, so adding, closing, finding and switching tabs cost
+    the same with hundreds of terminals. Switching only touches the previous
+    and the new active tab.
+
+    The strip is virtual: widgets are only created for the rows that fit in
+    it (`TabRow`), showing the tabs from `top` on. They are reused as the
+    strip scrolls, with the mouse wheel or to show the selected tab."""
+
     def __init__(self, master, width=170, *args, **kwargs) -> None:
         super().__init__(master, width=width, *args, **kwargs)
         self.master = master
@@ -12,46 +23,217 @@ class Tabs(tk.Frame):
         self.pack_propagate(False)
         self.config(bg=self.base.theme.tabbar)
 
-        self.tabs = []
+        self.first = None
+        self.last = None
         self.active_tab = None
+        self._count = 0
+        self._by_terminal = {}
+        # name -> tabs of that name, in the order of the strip
+        self._by_name = {}
+
+        # first tab shown, rows created so far and how many of them are packed
+        self.top = None
+        self._rows = []
+        self._packed = 0
+        # tab -> row showing it
+        self._shown = {}
+        self._redraw_job = None
+
+        self.bind("<Configure>", self._schedule_redraw)
+        self.bind("<MouseWheel>", self._mousewheel)
+        self.bind("<Button-4>", lambda _: self.scroll(-3))
+        self.bind("<Button-5>", lambda _: self.scroll(3))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        tab = self.first
+        while tab:
+            yield tab
+            tab = tab.next
+
+    @property
+    def tabs(self) -> list[Tab]:
+        """Tabs in the order of the strip."""
+
+        return list(self)
+
+    def get_tab(self, terminal) -> Tab | None:
+        """Tab of a terminal, None if it has none."""
+
+        return self._by_terminal.get(terminal)
+
+    def get_tab_by_name(self, name: str) -> Tab | None:
+        """First tab of a terminal with this name, None if there is none."""
+
+        if tabs := self._by_name.get(name):
+            return next(iter(tabs))
+        return None
 
     def add_tab(self, view) -> None:
         tab = Tab(self, view)
-        tab.pack(fill=tk.X)
-        self.tabs.append(tab)
+        if self.last:
+            self.last.next = tab
+            tab.prev = self.last
+        else:
+            self.first = self.top = tab
+        self.last = tab
+        self._count += 1
+        self._by_terminal[view] = tab
+        self._by_name.setdefault(tab.name, {})[tab] = None
 
+        self._schedule_redraw()
         tab.select()
 
     def set_active_tab(self, selected_tab) -> None:
-        self.active_tab = selected_tab
-        for tab in self.tabs:
-            if tab != selected_tab:
-                tab.deselect()
+        previous, self.active_tab = self.active_tab, selected_tab
+        if previous is not None and previous is not selected_tab:
+            previous.deselect()
+        self.see(selected_tab)
+
+    def update_tab(self, tab) -> None:
+        """Show the new state of a tab, if it is visible."""
+
+        if row := self._shown.get(tab):
+            row.show(tab)
+
+    def see(self, tab) -> None:
+        """Scroll the strip so that a tab is visible."""
+
+        if (row := self._shown.get(tab)) and row is not self._rows[self._packed - 1]:
+            return
+
+        # the tab becomes the last row fully visible
+        top = tab
+        for _ in range(self._capacity() - 1):
+            if not top.prev:
+                break
+            top = top.prev
+        self.top = top
+        self._schedule_redraw()
+
+    def scroll(self, rows: int) -> None:
+        """Scroll the strip by a number of rows, negative to scroll up."""
+
+        top = self.top
+        if not top:
+            return
+        for _ in range(abs(rows)):
+            if not (following := top.prev if rows < 0 else top.next):
+                break
+            top = following
+        if top is not self.top:
+            self.top = top
+            self._redraw()
+
+    def _mousewheel(self, event: tk.Event) -> str:
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _capacity(self) -> int:
+        """Number of rows fully visible."""
+
+        if not self._rows:
+            return 1
+        return max(self.winfo_height() // max(self._rows[0].winfo_reqheight(), 1), 1)
+
+    def _schedule_redraw(self, *_) -> None:
+        if not self._redraw_job:
+            self._redraw_job = self.after_idle(self._redraw)
+
+    def _redraw(self) -> None:
+        """Show the tabs from `top` on in the rows, creating the missing rows
+        and hiding the extra ones."""
+
+        if self._redraw_job:
+            self.after_cancel(self._redraw_job)
+            self._redraw_job = None
+
+        if not self._rows:
+            self._rows.append(TabRow(self))
+        capacity = self._capacity()
+
+        tab = self.top or self.first
+        if tab:
+            # no empty space at the bottom while scrolled down
+            last = tab
+            below = 0
+            while below < capacity - 1 and last.next:
+                last = last.next
+                below += 1
+            for _ in range(min(capacity, self._count) - 1 - below):
+                tab = tab.prev
+        self.top = tab
+
+        # and a partially visible row at the bottom
+        shown = {}
+        count = 0
+        while tab and count <= capacity:
+            if count == len(self._rows):
+                self._rows.append(TabRow(self))
+            row = self._rows[count]
+            row.show(tab)
+            shown[tab] = row
+            tab = tab.next
+            count += 1
+
+        for row in self._rows[self._packed : count]:
+            row.pack(fill=tk.X)
+        for row in self._rows[count : self._packed]:
+            row.pack_forget()
+            row.tab = None
+        self._packed = count
+        self._shown = shown
 
     def clear_all_tabs(self) -> None:
-        for tab in self.tabs:
-            tab.destroy()
+        for row in self._rows:
+            row.destroy()
+        self._rows.clear()
+        self._packed = 0
+        self._shown = {}
 
-        self.tabs.clear()
+        self.first = self.last = self.top = self.active_tab = None
+        self._count = 0
+        self._by_terminal.clear()
+        self._by_name.clear()
 
     def close_active_tab(self) -> None:
         self.close_tab(self.active_tab)
 
     def close_tab(self, tab) -> None:
-        if not self.tabs:
+        if tab is None or self._by_terminal.get(tab.terminal) is not tab:
             return
-        
-        i = self.tabs.index(tab)
-        self.tabs.remove(tab)
+
+        if tab.prev:
+            tab.prev.next = tab.next
+        else:
+            self.first = tab.next
+        if tab.next:
+            tab.next.prev = tab.prev
+        else:
+            self.last = tab.prev
+        self._count -= 1
+        del self._by_terminal[tab.terminal]
+        named = self._by_name[tab.name]
+        del named[tab]
+        if not named:
+            del self._by_name[tab.name]
+        if self.top is tab:
+            self.top = tab.next or tab.prev
+
         tab.terminal.grid_forget()
         self.master.delete_terminal(tab.terminal)
-        tab.destroy()
 
-        if self.tabs:
-            if i < len(self.tabs):
-                self.tabs[i].select()
-            else:
-                self.tabs[i-1].select()
-        else:
+        if tab is self.active_tab:
             self.active_tab = None
+            if neighbour := tab.next or tab.prev:
+                neighbour.select()
+        self._schedule_redraw()
         self.master.refresh()
+
+    def destroy(self) -> None:
+        if self._redraw_job:
+            self.after_cancel(self._redraw_job)
+            self._redraw_job = None
+        super().destroy()
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import typing
+from collections import OrderedDict
+
+from .theme import Theme
+
+if typing.TYPE_CHECKING:
+    import tkinter as tk
+    from tkinter import font as tkfont
+
+
+class Style(typing.NamedTuple):
+    """Text attributes set with SGR sequences.
+
+    Colors are either an index into the 256 color palette or a "#rrggbb"
+    string for truecolor. None is the default terminal color."""
+
+    fg: int | str | None = None
+    bg: int | str | None = None
+    bold: bool = False
+    italic: bool = False
+    underline: bool = False
+    inverse: bool = False
+
+
+DEFAULT = Style()
+
+_sgr_cache = {}
+
+
+def _extended_color(params: tuple, i: int) -> tuple[int | str | None, int]:
+    """Parse the color following 38/48, returns the color and the next index."""
+
+    if i < len(params) and params[i] == 5 and i + 1 < len(params):
+        return params[i + 1] & 0xFF, i + 2
+    if i < len(params) and params[i] == 2 and i + 3 < len(params):
+        r, g, b = (min(c, 255) for c in params[i + 1 : i + 4])
+        return f"#{r:02x}{g:02x}{b:02x}", i + 4
+    return None, len(params)
+
+
+def apply_sgr(style: Style, params: tuple) -> Style:
+    """Apply the parameters of a SGR sequence to a style.
+
+    Args:
+        style (Style): Current style.
+        params (tuple): SGR parameters.
+
+    Returns:
+        Style: The new style."""
+
+    key = (style, params)
+    if (result := _sgr_cache.get(key)) is not None:
+        return result
+
+    fg, bg, bold, italic, underline, inverse = style
+    if not params:
+        params = (0,)
+
+    i = 0
+    while i < len(params):
+        p = params[i]
+        i += 1
+        if p == 0:
+            fg, bg, bold, italic, underline, inverse = DEFAULT
+        elif p == 1:
+            bold = True
+        elif p == 3:
+            italic = True
+        elif p == 4:
+            underline = True
+        elif p == 7:
+            inverse = True
+        elif p == 22:
+            bold = False
+        elif p == 23:
+            italic = False
+        elif p == 24:
+            underline = False
+        elif p == 27:
+            inverse = False
+        elif 30 <= p <= 37:
+            fg = p - 30
+        elif p == 38:
+            fg, i = _extended_color(params, i)
+        elif p == 39:
+            fg = None
+        elif 40 <= p <= 47:
+            bg = p - 40
+        elif p == 48:
+            bg, i = _extended_color(params, i)
+        elif p == 49:
+            bg = None
+        elif 90 <= p <= 97:
+            fg = p - 90 + 8
+        elif 100 <= p <= 107:
+            bg = p - 100 + 8
+
+    result = Style(fg, bg, bold, italic, underline, inverse)
+    if len(_sgr_cache) >= 4096:
+        _sgr_cache.clear()
+    _sgr_cache[key] = result
+    return result
+
+
+def palette_color(theme: Theme, color: int | str) -> str:
+    """Resolve a palette index to a color, truecolor strings are returned as is."""
+
+    if isinstance(color, str):
+        return color
+    if color < 16:
+        return theme.ansi[color]
+    if color < 232:
+        color -= 16
+        levels = (0, 95, 135, 175, 215, 255)
+        r, g, b = levels[color // 36], levels[color // 6 % 6], levels[color % 6]
+        return f"#{r:02x}{g:02x}{b:02x}"
+
+    level = 8 + (color - 232) * 10
+    return f"#{level:02x}{level:02x}{level:02x}"
+
+
+class TagCache:
+    """Interns styles as reusable text tags.
+
+    Every distinct style gets exactly one tag, which is reused for all the text
+    having that style. Tags are kept in LRU order, once there are more than
+    `max_tags`, the tags in the least recently used half that no longer cover
+    any text are deleted. Tags handed out since the last `end_frame` are
+    never deleted, the text using them may not be inserted yet.
+
+    Tag options are derived from the theme, `retheme` reconfigures every tag
+    so a theme swap costs O(tags) and never touches the text.
+
+    Args:
+        text (tk.Text): Text widget the tags are created in.
+        theme (Theme): Theme used to resolve the colors.
+        font (tuple): Base font of the text widget.
+        max_tags (int): Soft limit on the number of tags."""
+
+    def __init__(
+        self, text: tk.Text, theme: Theme, font: tuple, max_tags: int = 256
+    ) -> None:
+        self.text = text
+        self.theme = theme
+        self.font = font
+        self.max_tags = max_tags
+
+        self._tags = OrderedDict()
+        # tags handed out during the current frame
+        self._frame = set()
+        self._counter = 0
+        self._fonts = {}
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def tag(self, style: Style) -> str:
+        """Get the tag for a style, creates it on first use.
+
+        Args:
+            style (Style): Text style.
+
+        Returns:
+            str: Tag name, empty string for the default style."""
+
+        if style == DEFAULT:
+            return ""
+
+        if (name := self._tags.get(style)) is not None:
+            self._tags.move_to_end(style)
+            self._frame.add(name)
+            return name
+
+        if len(self._tags) >= self.max_tags:
+            self.evict()
+
+        self._counter += 1
+        name = self._tags[style] = f"sgr{self._counter}"
+        self._frame.add(name)
+        self.configure(name, style)
+        return name
+
+    def end_frame(self) -> None:
+        """The text of the tags handed out so far was inserted, they can be
+        deleted again once unused."""
+
+        self._frame.clear()
+
+    def evict(self) -> None:
+        """Delete the least recently used tags that are not used by any text."""
+
+        # the recent half is kept, and the tags of the current frame which
+        # may be waiting to be inserted
+        frame = self._frame
+        for style, name in list(self._tags.items())[: len(self._tags) // 2]:
+            if name not in frame and not self.text.tag_nextrange(name, "1.0"):
+                self.text.tag_delete(name)
+                del self._tags[style]
+
+    def retheme(self, theme: Theme) -> None:
+        """Reconfigure every tag for a new theme.
+
+        Args:
+            theme (Theme): The new theme."""
+
+        self.theme = theme
+        for style, name in self._tags.items():
+            self.configure(name, style)
+
+    def configure(self, name: str, style: Style) -> None:
+        """Set the tag options for a style."""
+
+        bg, fg = self.theme.terminal
+        if style.fg is not None:
+            fg = palette_color(self.theme, style.fg)
+        if style.bg is not None:
+            bg = palette_color(self.theme, style.bg)
+        if style.inverse:
+            fg, bg = bg, fg
+
+        options = {
+            "foreground": fg,
+            "background": bg if style.bg is not None or style.inverse else "",
+            "underline": style.underline,
+        }
+        if style.bold or style.italic:
+            options["font"] = self._font(style.bold, style.italic)
+
+        self.text.tag_configure(name, **options)
+
+    def _font(self, bold: bool, italic: bool) -> tkfont.Font:
+        from tkinter import font as tkfont
+
+        key = (bold, italic)
+        if (font := self._fonts.get(key)) is None:
+            font = self._fonts[key] = tkfont.Font(
+                self.text,
+                family=self.font[0],
+                size=self.font[1],
+                weight="bold" if bold else "normal",
+                slant="italic" if italic else "roman",
+            )
+        return font
@@ -1,20 +1,76 @@
 import os
+import shlex
+import time
 import tkinter as tk
-from threading import Thread
+import typing
+from collections import deque
+from tkinter import font as tkfont
 from tkinter import ttk
 
-if os.name == "nt":
-    from winpty import PtyProcess as PTY
-else:
-    from ptyprocess import PtyProcessUnicode as PTY
-
 from mono.theme import Theme
 from mono.utils import Scrollbar
 
-from .ansi import replace_newline, strip_ansi_escape_sequences
+from .history import get_history
+from .search import Search
+from .session import (
+    HISTORY_LINES,
+    Exited,
+    Output,
+    Rewrite,
+    ScreenChanged,
+    Session,
+)
+from .tags import TagCache
 from .text import TerminalText
 
 
+MODIFIERS = frozenset(
+    (
+        "Shift_L",
+        "Shift_R",
+        "Control_L",
+        "Control_R",
+        "Alt_L",
+        "Alt_R",
+        "Meta_L",
+        "Meta_R",
+        "Super_L",
+        "Super_R",
+        "Caps_Lock",
+    )
+)
+
+# escape sequences sent for special keys while a full-screen program runs
+KEYS = {
+    "Return": "\r",
+    "BackSpace": "\x7f",
+    "Tab": "\t",
+    "Escape": "\x1b",
+    "Up": "\x1b[A",
+    "Down": "\x1b[B",
+    "Right": "\x1b[C",
+    "Left": "\x1b[D",
+    "Home": "\x1b[H",
+    "End": "\x1b[F",
+    "Insert": "\x1b[2~",
+    "Delete": "\x1b[3~",
+    "Prior": "\x1b[5~",
+    "Next": "\x1b[6~",
+    "F1": "\x1bOP",
+    "F2": "\x1bOQ",
+    "F3": "\x1bOR",
+    "F4": "\x1bOS",
+    "F5": "\x1b[15~",
+    "F6": "\x1b[17~",
+    "F7": "\x1b[18~",
+    "F8": "\x1b[19~",
+    "F9": "\x1b[20~",
+    "F10": "\x1b[21~",
+    "F11": "\x1b[23~",
+    "F12": "\x1b[24~",
+}
+
+
 class Terminal(ttk.Frame):
     """Terminal abstract class. All shell types should inherit from this class.
 
@@ -22,15 +78,102 @@ class Terminal(ttk.Frame):
         name (str): Name of the terminal.
         shell (str): command / path to shell executable.
 
+    The terminal is a Tk view of a `Session`, which owns the pty, the parser,
+    the scrollback and the screen model. The pty is read by the shared
+    `Reactor` thread; the Tk main loop processes the session every
+    `frame_interval` milliseconds and renders the new output with a single
+    insert, so the widget is never touched from the reader thread.
+
+    Full-screen programs switching to the alternate screen are rendered from
+    the `Screen` model instead, redrawing only the rows changed in the frame.
+
+    Shells can set `prompt`, a regex matching the end of their prompt, and
+    `integration`, environment variables making them emit OSC 133 markers, so
+    commands queued with `run_command` are sent as soon as they are ready.
+
+    The command history is shared by the terminals of the same `name` and
+    persisted, see `mono.history`.
+
+    Rendering is suspended while the terminal is hidden (the tab of the
+    terminal is not selected): the output is still processed into the
+    scrollback every `background_interval` milliseconds, but not inserted in
+    the widget, which catches up in a single render when shown again.
+
+    The terminal generates a `<<Exited>>` event once its shell exited, with
+    the status in `session.exit_status`. Destroying the terminal terminates
+    the shell and closes its pty.
+
     Args:
         master (tk.Tk): Main window.
-        cwd (str): Working directory."""
+        cwd (str): Working directory.
+        frame_interval (int): Milliseconds between two output frames.
+        frame_budget (int): Maximum number of characters rendered per frame,
+            the rest is left for the following frames.
+        max_scrollback_lines (int): Maximum number of lines kept in the
+            terminal, older lines are trimmed. None for unbounded.
+        history_lines (int): Maximum number of lines kept by the session
+            when `max_scrollback_lines` is None, including while the terminal
+            is hidden and nothing is rendered. None for unbounded.
+        virtual_scrollback (bool): Keep the history in a compact `Scrollback`
+            store and only `virtual_window` lines in the Text widget. Scrolling
+            past them pages the history in and out of the widget.
+        search_index (bool): Maintain a trigram index of the scrollback in
+            the background, making `search` skip most of a long history.
+        high_water (int): Characters of output waiting to be rendered past
+            which backpressure is applied, see `Session`.
+        low_water (int): Backlog under which reading resumes, or kept by
+            the "tail" mode.
+        flood (str): "pause" to stop reading the pty (the program is
+            throttled), "tail" to render only the tail of the output. Ctrl-C
+            always interrupts right away and skips the backlog.
+        lazy_spawn (bool): Defer spawning the shell until the tab of the
+            terminal is selected or a command is run, see `spawn`. Terminals
+            in `Terminals` default to the setting of the container.
+        background_interval (int): Milliseconds between two output frames
+            while rendering is suspended.
+        catch_up_lines (int): Lines rendered when the terminal is shown
+            again, only the tail of the output is shown if more arrived
+            while it was hidden."""
 
     name: str
     shell: str
+    prompt: str = None
+    integration: dict = None
+
+    frame_interval = 16
+    frame_budget = 1 << 20
+    max_scrollback_lines = None
+    history_lines = HISTORY_LINES
+    virtual_scrollback = False
+    virtual_window = 500
+    search_index = False
+    high_water = 1 << 22
+    low_water = None
+    flood = "pause"
+    lazy_spawn = False
+    background_interval = 250
+    catch_up_lines = 1000
 
     def __init__(
-        self, master, cwd=".", theme: Theme = None, standalone=True, *args, **kwargs
+        self,
+        master,
+        cwd=".",
+        theme: Theme = None,
+        standalone=True,
+        *args,
+        frame_interval: int = None,
+        frame_budget: int = None,
+        max_scrollback_lines: int = None,
+        history_lines: int = None,
+        virtual_scrollback: bool = None,
+        search_index: bool = None,
+        high_water: int = None,
+        low_water: int = None,
+        flood: str = None,
+        lazy_spawn: bool = None,
+        background_interval: int = None,
+        catch_up_lines: int = None,
+        **kwargs
     ) -> None:
         super().__init__(master, *args, **kwargs)
         self.master = master
@@ -38,9 +181,51 @@ class Terminal(ttk.Frame):
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
 
-        self.alive = False
         self.cwd = cwd
-        self.p = None
+        self.created_at = time.perf_counter()
+        # start_service was called but the shell is not spawned yet
+        self.deferred = False
+
+        if frame_interval is not None:
+            self.frame_interval = frame_interval
+        if frame_budget is not None:
+            self.frame_budget = frame_budget
+        if max_scrollback_lines is not None:
+            self.max_scrollback_lines = max_scrollback_lines
+        if history_lines is not None:
+            self.history_lines = history_lines
+        if virtual_scrollback is not None:
+            self.virtual_scrollback = virtual_scrollback
+        if search_index is not None:
+            self.search_index = search_index
+        if high_water is not None:
+            self.high_water = high_water
+        if low_water is not None:
+            self.low_water = low_water
+        if flood is not None:
+            self.flood = flood
+        if background_interval is not None:
+            self.background_interval = background_interval
+        if catch_up_lines is not None:
+            self.catch_up_lines = catch_up_lines
+
+        # first history line shown while scrolled back, None when following the output
+        self._view_top = None
+        self._saved_input = ""
+        self._flush_job = None
+        self._frame_due = 0.0
+        # false while hidden, see suspend_rendering
+        self.rendering = True
+        # absolute scrollback line of the last line of the widget when
+        # rendering was suspended, and first line to render when resumed
+        self._widget_tail = 0
+        self._stale_from = None
+        self._metrics_job = None
+        self._search = None
+        self._search_job = None
+        # batches of matches streamed by the search worker
+        self._search_results = deque()
+        self.search_matches = []
 
         if self.standalone:
             self.base = self
@@ -50,32 +235,112 @@ class Terminal(ttk.Frame):
 
             self.theme = theme or Theme()
             self.style = Styles(self, self.theme)
+            self.reactor = None
+            self.pool = None
         else:
             self.base = master.base
             self.theme = self.base.theme
+            self.reactor = self.base.reactor
+            self.pool = self.base.pool
+            if lazy_spawn is None:
+                lazy_spawn = self.base.lazy_spawn
+        if lazy_spawn is not None:
+            self.lazy_spawn = lazy_spawn
+
+        self.session = Session(
+            cwd=cwd,
+            max_scrollback_lines=(
+                self.history_lines
+                if self.max_scrollback_lines is None
+                else self.max_scrollback_lines
+            ),
+            reactor=self.reactor,
+            prompt=self.prompt,
+            high_water=self.high_water,
+            low_water=self.low_water,
+            flood=self.flood,
+        )
+        self.session.subscribe(self._render)
+        if self.search_index:
+            self.session.enable_search_index()
 
+        font = ("Consolas", 11)
         self.text = TerminalText(
-            self, relief=tk.FLAT, padx=10, pady=10, font=("Consolas", 11)
+            self,
+            max_scrollback_lines=(
+                self.virtual_window
+                if self.virtual_scrollback
+                else self.max_scrollback_lines
+            ),
+            relief=tk.FLAT,
+            padx=10,
+            pady=10,
+            font=font,
         )
         self.text.config(
             bg=self.theme.terminal[0],
             fg=self.theme.terminal[1],
             insertbackground=self.theme.terminal[1],
         )
+        # shared by the terminals of the same shell type, persisted
+        self.text.history = get_history(self.name)
+        self.tags = TagCache(self.text, self.theme, font)
         self.text.grid(row=0, column=0, sticky=tk.NSEW)
         self.text.bind("<Return>", self.enter)
+        self.text.bind("<Control-c>", lambda _: self._ctrl_key("c"))
+        self.text.bind("<Configure>", self._resize, add=True)
+
+        self._font = tkfont.Font(self, font=font)
+        # keys are sent straight to the program while the screen is shown,
+        # this tag comes before the bindings of the text widget
+        self._screen_bindtag = f"{self.text}_screen"
+        self.text.bindtags((self._screen_bindtag,) + self.text.bindtags())
+        self.text.bind_class(self._screen_bindtag, "<Key>", self._screen_key)
 
         self.terminal_scrollbar = Scrollbar(self, style="MonoScrollbar")
         self.terminal_scrollbar.grid(row=0, column=1, sticky="NSW")
 
-        self.text.config(yscrollcommand=self.terminal_scrollbar.set)
-        self.terminal_scrollbar.config(command=self.text.yview, orient=tk.VERTICAL)
+        if self.virtual_scrollback:
+            self.text.config(yscrollcommand=self._yscroll)
+            self.terminal_scrollbar.config(command=self._yview, orient=tk.VERTICAL)
+            self.text.bind("<MouseWheel>", self._mousewheel)
+            # wheel on X11
+            self.text.bind("<Button-4>", self._mousewheel)
+            self.text.bind("<Button-5>", self._mousewheel)
+        else:
+            self.text.config(yscrollcommand=self.terminal_scrollbar.set)
+            self.terminal_scrollbar.config(command=self.text.yview, orient=tk.VERTICAL)
 
         self.text.tag_config("prompt", foreground="orange")
         self.text.tag_config("command", foreground="yellow")
+        self.text.tag_config(
+            "search", background=self.theme.ansi[3], foreground=self.theme.bg
+        )
 
         self.bind("<Destroy>", self.stop_service)
 
+    @property
+    def p(self):
+        """The pty process of the shell."""
+
+        return self.session.p
+
+    @property
+    def alive(self) -> bool:
+        return self.session.alive
+
+    @property
+    def title(self) -> str:
+        return self.session.title
+
+    @property
+    def screen(self):
+        return self.session.screen
+
+    @property
+    def scrollback(self):
+        return self.session.scrollback
+
     def check_shell(self):
         """Check if the shell is available in the system path."""
 
@@ -85,53 +350,568 @@ class Terminal(ttk.Frame):
         return self.shell
 
     def start_service(self, *_) -> None:
-        """Start the terminal service."""
+        """Start the terminal service. With `lazy_spawn`, the shell is only
+        spawned once the terminal is shown or a command is run."""
 
-        self.alive = True
         self.last_command = None
 
-        self.p = PTY.spawn([self.shell])
-        Thread(target=self._write_loop, daemon=True).start()
+        if self.lazy_spawn and not self.session.p:
+            self.deferred = True
+            return
+        self._spawn()
 
-    def stop_service(self, *_) -> None:
-        """Stop the terminal service."""
+    def spawn(self) -> None:
+        """Spawn the shell of a deferred terminal now, does nothing if it
+        is already spawned. Commands queued until then are run once the
+        shell is ready."""
+
+        if self.deferred:
+            self.deferred = False
+            self._spawn()
+
+    @property
+    def time_to_interactive(self) -> float | None:
+        """Seconds from the creation of the terminal to the first prompt of
+        its shell, None until then."""
+
+        if self.session.ready_at is None:
+            return None
+        return self.session.ready_at - self.created_at
+
+    def _spawn(self) -> None:
+        if self.integration:
+            self.session.env = {**os.environ, **self.integration}
+
+        pty = None
+        if self.pool:
+            pty = self.pool.acquire([self.shell], self.session.env, self.cwd)
+        self.session.start([self.shell], pty=pty)
+        if pty and self.cwd and pty.cwd != self.cwd:
+            self.session.run_command(self.chdir_command(self.cwd))
+        self._schedule_flush()
 
-        self.alive = False
+    def chdir_command(self, path: str) -> str:
+        """Command changing the working directory of the shell, used when a
+        pooled shell was spawned in another directory.
+
+        Args:
+            path (str): Directory path."""
+
+        return f"cd {shlex.quote(path)}"
+
+    def stop_service(self, *_) -> None:
+        """Stop the terminal service, the shell is terminated and its pty
+        closed in the background, see `Session.close`."""
+
+        # terminating a shell ignoring SIGHUP takes a while, not on the UI
+        self.session.close(block=False)
+        self.session.stop_recording()
+        if self._flush_job:
+            self.after_cancel(self._flush_job)
+            self._flush_job = None
+        if self._metrics_job:
+            self.after_cancel(self._metrics_job)
+            self._metrics_job = None
+        if self._search:
+            self._search.cancel()
+        self.session.disable_search_index()
 
     def run_command(self, command: str) -> None:
-        """Run a command in the terminal.
-        TODO: Implement a queue for running multiple commands."""
+        """Run a command in the terminal. Commands are queued until the shell
+        is ready and the previous ones completed.
 
-        self.text.insert("end", command, "command")
-        self.enter()
+        Args:
+            command (str): Command to run."""
+
+        self.last_command = command
+        self.text.register_history(command)
+        self.session.run_command(command)
+        self.spawn()
 
     def enter(self, *_) -> None:
         """Enter key event handler for running commands."""
 
-        command = self.text.get("input", "end")
+        # without the newline ending the widget
+        command = self.text.get("input", "end-1c")
         self.last_command = command
         self.text.register_history(command)
         if command.strip():
             self.text.delete("input", "end")
 
-        self.p.write(command + "\r\n")
+        # a single Enter, like the queued commands
+        self.session.write(command + "\r")
         return "break"
 
-    def _write_loop(self) -> None:
-        while self.alive:
-            if buf := self.p.read():
-                p = buf.find("\x1b]0;")
-
-                if p != -1:
-                    buf = buf[:p]
-                buf = [
-                    strip_ansi_escape_sequences(i)
-                    for i in replace_newline(buf).splitlines()
-                ]
-                self._insert("\n".join(buf))
-
-    def _insert(self, output: str, tag="") -> None:
-        self.text.insert(tk.END, output, tag)
+    def start_recording(self, path: str, **kwargs) -> None:
+        """Record everything shown in and typed into the terminal to an
+        asciicast file. See `Session.start_recording`.
+
+        Args:
+            path (str): File to write.
+            **kwargs: Options of `Recorder`."""
+
+        self.session.start_recording(path, **kwargs)
+
+    def stop_recording(self) -> None:
+        """Stop recording the terminal."""
+
+        self.session.stop_recording()
+
+    def enable_metrics(
+        self, callback: typing.Callable[[dict], None] = None, interval: int = 1000
+    ) -> None:
+        """Start recording the metrics of the terminal, see `metrics`.
+
+        Args:
+            callback (Callable): Called with the metrics every `interval`.
+            interval (int): Milliseconds between two callbacks."""
+
+        self.session.enable_metrics()
+        if self._metrics_job:
+            self.after_cancel(self._metrics_job)
+            self._metrics_job = None
+
+        if callback:
+
+            def report() -> None:
+                self._metrics_job = self.after(interval, report)
+                callback(self.metrics())
+
+            self._metrics_job = self.after(interval, report)
+
+    def disable_metrics(self) -> None:
+        """Stop recording metrics and calling the metrics callback."""
+
+        self.session.disable_metrics()
+        if self._metrics_job:
+            self.after_cancel(self._metrics_job)
+            self._metrics_job = None
+
+    def metrics(self) -> dict:
+        """Counters and histograms of the terminal (see `Metrics`), the
+        current scrollback size and queue depths and the time to interactive.
+        Empty while disabled."""
+
+        if self.session.metrics is None:
+            return {}
+        return {
+            **self.session.metrics.snapshot(),
+            **self.gauges(),
+            "time_to_interactive": self.time_to_interactive,
+        }
+
+    def gauges(self) -> dict:
+        """Current size of the scrollback and of the queues."""
+
+        return {
+            "scrollback_lines": len(self.scrollback),
+            "pending_chunks": self.session.pending,
+            "queued_commands": self.session.queued,
+            "backlog": self.session.backlog,
+            "suspended": int(not self.rendering),
+        }
+
+    def search(
+        self, pattern: str, regex: bool = False, ignore_case: bool = False
+    ) -> Search:
+        """Find text in the scrollback without blocking the UI. The search
+        runs on a worker thread, matches are highlighted as they arrive
+        (newest first) and collected in `search_matches`. A new search
+        replaces the current one, e.g. on every keystroke of a find bar.
+
+        Args:
+            pattern (str): Text or regular expression searched.
+            regex (bool): Whether `pattern` is a regular expression.
+            ignore_case (bool): Case insensitive search.
+
+        Returns:
+            Search: The running search."""
+
+        self.stop_search()
+        self._search = self.session.search(
+            pattern,
+            regex=regex,
+            ignore_case=ignore_case,
+            callback=self._search_results.append,
+        )
+        self._search_job = self.after(self.frame_interval, self._poll_search)
+        return self._search
+
+    def stop_search(self) -> None:
+        """Cancel the search and remove the highlights."""
+
+        if self._search:
+            self._search.cancel()
+            self._search = None
+        if self._search_job:
+            self.after_cancel(self._search_job)
+            self._search_job = None
+        self._search_results.clear()
+        self.search_matches = []
+        self.text.tag_remove("search", "1.0", "end")
+
+    def _poll_search(self) -> None:
+        """Highlight the matches found since the last frame."""
+
+        done = self._search.done.is_set()
+        while self._search_results:
+            matches = self._search_results.popleft()
+            self.search_matches.extend(matches)
+            self._highlight(matches)
+
+        self._search_job = (
+            None if done else self.after(self.frame_interval, self._poll_search)
+        )
+
+    def _highlight(self, matches: list) -> None:
+        """Highlight the matches in the lines shown in the widget."""
+
+        lines = int(self.text.index("end-1c").split(".")[0])
+        # widget line of an absolute scrollback line, minus one
+        offset = self.scrollback.start + self._widget_base()
+        indices = []
+        for line, start, end in matches:
+            row = line - offset + 1
+            if 1 <= row <= lines:
+                indices += (f"{row}.{start}", f"{row}.{end}")
+        if indices:
+            self.text.tag_add("search", *indices)
+
+    def _schedule_flush(self) -> None:
+        interval = self.frame_interval if self.rendering else self.background_interval
+        self._frame_due = time.perf_counter() + interval / 1000
+        self._flush_job = self.after(interval, self._flush)
+
+    def _flush(self) -> None:
+        """Process the session, called once per frame from the main loop."""
+
+        if (metrics := self.session.metrics) is not None:
+            start = time.perf_counter()
+            metrics.loop_lag.observe(max(start - self._frame_due, 0))
+
+        self._flush_job = None
+        # until the exit of the shell is reported
+        if not self.session.exited.is_set() or self.session.pending:
+            self._schedule_flush()
+
+        # everything is processed while hidden, frames are far apart
+        self.session.process(self.frame_budget if self.rendering else None)
+        if metrics is not None:
+            metrics.flush.observe(time.perf_counter() - start)
+
+    def suspend_rendering(self) -> None:
+        """Stop inserting the output in the widget, while the terminal is
+        hidden. The output is still processed into the scrollback."""
+
+        if self.rendering:
+            self.rendering = False
+            self._widget_tail = self.scrollback.end - 1
+
+    def resume_rendering(self) -> None:
+        """Render the output again, the widget catches up at once."""
+
+        if self.rendering:
+            return
+        self.rendering = True
+        self._catch_up()
+        if self.screen.alternate and self.screen.dirty:
+            self._draw_screen()
+        if self._flush_job:
+            # sooner than the next background frame
+            self.after_cancel(self._flush_job)
+            self._schedule_flush()
+
+    def _mark_stale(self, line: int) -> None:
+        """Render from a scrollback line on once rendering resumes."""
+
+        if self._stale_from is None or line < self._stale_from:
+            self._stale_from = line
+
+    def _catch_up(self) -> None:
+        """Render the output processed while rendering was suspended."""
+
+        start, self._stale_from = self._stale_from, None
+        if start is None or self._view_top is not None:
+            return
+
+        scrollback = self.scrollback
+        start = max(start, scrollback.start)
+        if scrollback.end - start <= self.catch_up_lines:
+            lines = [
+                scrollback.runs(i - scrollback.start)
+                for i in range(start, scrollback.end)
+            ]
+            self._rewrite(start, lines, self._widget_tail)
+        else:
+            # only the tail, the rest stays in the scrollback
+            typed = self.text.get("input", "end-1c")
+            total = len(scrollback)
+            self._render_lines(max(total - self.catch_up_lines, 0), total)
+            self._insert("")
+            self.text.insert("end", typed)
+        self._widget_tail = scrollback.end - 1
+
+    def _render(self, updates: list) -> None:
+        """Render the updates of a session frame."""
+
+        if (metrics := self.session.metrics) is not None:
+            start = time.perf_counter()
+
+        for update in updates:
+            if not self.rendering:
+                match update:
+                    case Output():
+                        self._mark_stale(self._widget_tail)
+                        continue
+                    case Rewrite(first):
+                        self._mark_stale(first)
+                        continue
+                    case ScreenChanged():
+                        # the screen is shown below the output
+                        self._catch_up()
+
+            match update:
+                case Output(runs):
+                    if self._view_top is None:
+                        # a single insert of (text, tag) pairs for the frame
+                        args = []
+                        for text, style in runs:
+                            args += (text, self.tags.tag(style))
+                        self._insert(*args)
+                case Rewrite(first, lines, tail):
+                    if self._view_top is None:
+                        self._rewrite(first, lines, tail)
+                case ScreenChanged(True):
+                    if self._view_top is not None:
+                        self._attach()
+                    self._show_screen()
+                case ScreenChanged(False):
+                    self._hide_screen()
+                case Exited():
+                    self.event_generate("<<Exited>>", when="tail")
+
+        if self.rendering and self.screen.alternate and self.screen.dirty:
+            self._draw_screen()
+        self.tags.end_frame()
+
+        if metrics is not None:
+            metrics.render.observe(time.perf_counter() - start)
+
+    def _rewrite(self, start: int, lines: list, tail: int) -> None:
+        """Replace the output from a scrollback line on, the input typed so
+        far is kept."""
+
+        # the input mark is on the last line of the output
+        row = int(self.text.index("input").split(".")[0]) - (tail - start)
+        if row < 1:
+            # trimmed from the widget
+            lines = lines[1 - row :]
+            row = 1
+
+        args = []
+        for i, runs in enumerate(lines):
+            if i:
+                args += ("\n", "")
+            for text, style in runs:
+                args += (text, self.tags.tag(style))
+
+        typed = self.text.get("input", "end-1c")
+        self.text.proxy_enabled = False
+        try:
+            self.text.delete(f"{row}.0", "end")
+        finally:
+            self.text.proxy_enabled = True
+        self._insert(*(args or ("",)))
+        self.text.insert("end", typed)
+
+    def _show_screen(self) -> None:
+        """Make room for the screen below the output."""
+
+        self.text.proxy_enabled = False
+        try:
+            self.text.mark_set("screen", "end-1c")
+            self.text.mark_gravity("screen", "left")
+            self.text.insert("end", "\n" * self.screen.rows)
+        finally:
+            self.text.proxy_enabled = True
+
+        self.screen.dirty.update(range(self.screen.rows))
+        self._draw_screen()
+        self.text.see("end")
+
+    def _hide_screen(self) -> None:
+        """Remove the screen, the output is shown again as it was."""
+
+        self.text.proxy_enabled = False
+        try:
+            self.text.delete("screen", "end")
+            self.text.mark_unset("screen")
+        finally:
+            self.text.proxy_enabled = True
+
+        self.text.mark_set("insert", "end")
+        self.text.mark_set("input", "insert")
+        self.text.see("end")
+
+    def _draw_screen(self) -> None:
+        """Redraw the rows of the screen changed since the last frame."""
+
+        screen = self.screen
+        start = int(self.text.index("screen").split(".")[0]) + 1
+
+        self.text.proxy_enabled = False
+        try:
+            for y in screen.take_dirty():
+                line = start + y
+                args = []
+                for text, style in screen.runs(y):
+                    args += (text, self.tags.tag(style))
+                self.text.delete(f"{line}.0", f"{line}.end")
+                self.text.insert(f"{line}.0", *args)
+
+            self.text.mark_set("insert", f"{start + screen.y}.{screen.x}")
+        finally:
+            self.text.proxy_enabled = True
+
+    def _screen_key(self, event: tk.Event) -> str:
+        """Send keys straight to the program while the screen is shown."""
+
+        if self._view_top is not None and event.keysym not in MODIFIERS:
+            # typing while scrolled back jumps back to the output
+            self._attach()
+
+        if not self.screen.alternate or not self.alive:
+            return
+
+        if data := KEYS.get(event.keysym, event.char):
+            if data == "\x03":
+                self.session.interrupt()
+            else:
+                self.session.write(data)
+        return "break"
+
+    def _resize(self, event: tk.Event) -> None:
+        """Keep the size of the pty and the screen in sync with the widget."""
+
+        padding = 2 * (int(self.text.cget("padx")) + int(self.text.cget("borderwidth")))
+        cols = max((event.width - padding) // self._font.measure("0"), 1)
+        rows = max((event.height - padding) // self._font.metrics("linespace"), 1)
+        if (rows, cols) == (self.screen.rows, self.screen.cols):
+            return
+
+        alternate = self.screen.alternate
+        if alternate:
+            self._hide_screen()
+        self.session.resize(rows, cols)
+        if alternate:
+            self._show_screen()
+
+    def _widget_base(self) -> int:
+        """Scrollback line shown on the first line of the Text widget."""
+
+        if self._view_top is not None:
+            return self._view_top
+
+        lines = int(self.text.index("end-1c").split(".")[0])
+        return max(len(self.scrollback) - lines, 0)
+
+    def _yscroll(self, low: str, high: str) -> None:
+        """Map the position of the Text widget to the whole scrollback."""
+
+        lines = int(self.text.index("end-1c").split(".")[0])
+        base = self._widget_base()
+        total = max(len(self.scrollback), lines)
+        self.terminal_scrollbar.set(
+            (base + float(low) * lines) / total, (base + float(high) * lines) / total
+        )
+
+    def _yview(self, *args) -> None:
+        """Scroll through the scrollback, paging lines in and out of the widget."""
+
+        if self.screen.alternate:
+            return
+
+        total = len(self.scrollback)
+        rows = self.screen.rows
+        lines = int(self.text.index("end-1c").split(".")[0])
+        base = self._widget_base()
+        top = base + int(self.text.index("@0,0").split(".")[0]) - 1
+
+        match args:
+            case ("moveto", fraction):
+                target = int(float(fraction) * total)
+            case ("scroll", n, "pages"):
+                target = top + int(n) * rows
+            case ("scroll", n, _):
+                target = top + int(n)
+            case _:
+                return
+        target = max(min(target, total - rows), 0)
+
+        if target >= total - self.virtual_window:
+            # the tail is in the widget whenever the output is followed
+            if self._view_top is not None:
+                self._attach()
+            base = self._widget_base()
+        elif not (base <= target <= base + lines - rows):
+            base = self._show_history(target)
+
+        self.text.yview(f"{target - base + 1}.0")
+
+    def _mousewheel(self, event: tk.Event) -> str:
+        up = event.num == 4 or event.delta > 0
+        self._yview("scroll", -3 if up else 3, "units")
+        # the class binding of Text would scroll the widget again
+        return "break"
+
+    def _render_lines(self, start: int, end: int) -> None:
+        """Replace the content of the widget with scrollback lines."""
+
+        args = []
+        for i in range(start, end):
+            if i > start:
+                args += ("\n", "")
+            for text, style in self.scrollback.runs(i):
+                args += (text, self.tags.tag(style))
+
+        self.text.proxy_enabled = False
+        try:
+            self.text.delete("1.0", "end")
+            if args:
+                self.text.insert("end", *args)
+        finally:
+            self.text.proxy_enabled = True
+        self.tags.end_frame()
+        if self.search_matches:
+            self._highlight(self.search_matches)
+
+    def _show_history(self, target: int) -> int:
+        """Show the scrollback around a line, returns the first line shown."""
+
+        if self._view_top is None:
+            self._saved_input = self.text.get("input", "end-1c")
+
+        margin = (self.virtual_window - self.screen.rows) // 2
+        start = max(target - margin, 0)
+        self._render_lines(start, min(start + self.virtual_window, len(self.scrollback)))
+        self._view_top = start
+        return start
+
+    def _attach(self) -> None:
+        """Show the tail of the scrollback again and follow the output."""
+
+        total = len(self.scrollback)
+        self._render_lines(max(total - self.virtual_window, 0), total)
+        self._view_top = None
+
+        self.text.mark_set("input", "end-1c")
+        self.text.insert("end", self._saved_input)
+        self._saved_input = ""
+        self.text.mark_set("insert", "end")
+        self.text.see("end")
+
+    def _insert(self, output: str, tag="", *args) -> None:
+        self.text.append(output, tag, *args)
         # self.terminal.tag_add("prompt", "insert linestart", "insert")
         self.text.see(tk.END)
         self.text.mark_set("input", "insert")
@@ -139,15 +919,44 @@ class Terminal(ttk.Frame):
     def _newline(self):
         self._insert("\n")
 
+    def set_theme(self, theme: Theme) -> None:
+        """Change the theme of the terminal. Colored output is retagged, the
+        text itself is not touched.
+
+        Args:
+            theme (Theme): The new theme."""
+
+        self.theme = theme
+        self.text.config(
+            bg=self.theme.terminal[0],
+            fg=self.theme.terminal[1],
+            insertbackground=self.theme.terminal[1],
+        )
+        self.text.tag_config("search", background=theme.ansi[3], foreground=theme.bg)
+        self.tags.retheme(theme)
+
     def clear(self) -> None:
         """Clear the terminal."""
 
+        if self._view_top is not None:
+            self._attach()
+
+        # the prompt on the last line is kept, like in the widget
+        prompt = self.scrollback.runs(-1)
+        self.scrollback.clear()
+        for text, style in prompt:
+            self.scrollback.write(text, style)
         self.text.clear()
 
     # TODO: Implement a better way to handle key events.
-    def _ctrl_key(self, key: str) -> None:
-        if key == "c":
-            self.run_command("\x03")
+    def _ctrl_key(self, key: str) -> str:
+        if key == "c" and self.alive:
+            if self.text.tag_ranges("sel"):
+                # copying the selection
+                return
+            # ahead of the output waiting to be rendered
+            self.session.interrupt()
+            return "break"
 
     def __str__(self) -> str:
         return self.name
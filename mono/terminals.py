@@ -0,0 +1,364 @@
+import itertools
+import os
+import platform
+import subprocess
+import tkinter as tk
+import typing
+
+from .metrics import Metrics
+from .pool import PtyPool
+from .reactor import Reactor
+from .shells import Default, get_shell_from_name
+from .styles import Styles
+from .tabs import Tabs
+from .terminal import Terminal
+from .theme import Theme
+
+
+def get_home_directory() -> str:
+    if os.name == "nt":
+        return os.path.expandvars("%USERPROFILE%")
+    if os.name == "posix":
+        return os.path.expanduser("~")
+    return "."
+
+
+class Terminals(tk.Frame):
+    """Mono's tabbed terminal manager
+
+    This widget is a container for multiple terminal instances. It provides
+    methods to create, delete, and manage terminal instances. It also provides
+    methods to run commands in the active terminal and switch between terminals.
+
+    Args:
+        master (tk.Tk): Main window.
+        cwd (str): Working directory.
+        theme (Theme): Custom theme instance.
+        reactor (Reactor): Reactor reading the ptys of the terminals, defaults
+            to the one shared by all terminals (not used on windows).
+        lazy_spawn (bool): Only spawn the shell of a terminal once its tab is
+            selected or a command is run in it, e.g. when restoring many tabs.
+        pool (PtyPool): Pool of shells spawned ahead of time, new terminals
+            take their shell from it instead of waiting for one to start. The
+            working directory is changed after the handoff when it differs."""
+
+    def __init__(
+        self,
+        master,
+        cwd: str = None,
+        theme: Theme = None,
+        *args,
+        reactor: Reactor = None,
+        lazy_spawn: bool = False,
+        pool: PtyPool = None,
+        **kwargs
+    ) -> None:
+        super().__init__(master, *args, **kwargs)
+        self.master = master
+        self.base = self
+
+        self.reactor = reactor
+        self.lazy_spawn = lazy_spawn
+        self.pool = pool
+        self.theme = theme or Theme()
+        self.styles = Styles(self, self.theme)
+
+        self.config(bg=self.theme.border)
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_propagate(False)
+
+        self.cwd = cwd
+
+        self.tabs = Tabs(self)
+        self.tabs.grid(row=0, column=1, padx=(1, 0), sticky=tk.NS)
+
+        # insertion ordered, used as an ordered set
+        self._terminals = {}
+        # (directory, options) while recording, see start_recording
+        self.recording = None
+        self._recordings = itertools.count(1)
+        self.metrics_enabled = False
+        self._metrics_job = None
+
+    @property
+    def active_terminals(self) -> list[Terminal]:
+        """Terminals, in the order they were added."""
+
+        return list(self._terminals)
+
+    def add_default_terminal(self, *_) -> Default:
+        """Add a default terminal to the list. Create a tab for it.
+
+        Returns:
+            Default: Default terminal instance."""
+
+        default_terminal = Default(
+            self, cwd=self.cwd or get_home_directory(), standalone=False
+        )
+        self.add_terminal(default_terminal)
+        return default_terminal
+
+    def add_terminals(self, terminals) -> None:
+        """Append multiple terminals to list. Create tabs for them.
+
+        Args:
+            terminals (list): List of Shell types to append."""
+
+        for terminal in terminals:
+            self.add_terminal(terminal)
+
+    def add_terminal(self, terminal: Terminal) -> None:
+        """Append terminal to list. Create tab for it.
+
+        Args:
+            terminal (Terminal): Shell type to append."""
+
+        self._terminals[terminal] = None
+        self.tabs.add_tab(terminal)
+        if self.recording:
+            self._record(terminal)
+        if self.metrics_enabled:
+            terminal.enable_metrics()
+
+    def start_recording(self, directory: str, **kwargs) -> None:
+        """Record every terminal, including the ones opened later, to its own
+        asciicast file in a directory.
+
+        Args:
+            directory (str): Directory the recordings are written to.
+            **kwargs: Options of `Recorder`."""
+
+        os.makedirs(directory, exist_ok=True)
+        self.recording = (directory, kwargs)
+        for terminal in self._terminals:
+            self._record(terminal)
+
+    def stop_recording(self) -> None:
+        """Stop recording the terminals."""
+
+        self.recording = None
+        for terminal in self._terminals:
+            terminal.stop_recording()
+
+    def _record(self, terminal: Terminal) -> None:
+        directory, kwargs = self.recording
+        name = f"{next(self._recordings)}-{terminal.name}.cast"
+        terminal.start_recording(os.path.join(directory, name), **kwargs)
+
+    def enable_metrics(
+        self, callback: typing.Callable[[dict], None] = None, interval: int = 1000
+    ) -> None:
+        """Record the metrics of every terminal, including the ones opened
+        later, see `metrics`.
+
+        Args:
+            callback (Callable): Called with the aggregated metrics every `interval`.
+            interval (int): Milliseconds between two callbacks."""
+
+        self.metrics_enabled = True
+        for terminal in self._terminals:
+            terminal.enable_metrics()
+
+        if self._metrics_job:
+            self.after_cancel(self._metrics_job)
+            self._metrics_job = None
+
+        if callback:
+
+            def report() -> None:
+                self._metrics_job = self.after(interval, report)
+                callback(self.metrics())
+
+            self._metrics_job = self.after(interval, report)
+
+    def disable_metrics(self) -> None:
+        """Stop recording metrics and calling the metrics callback."""
+
+        self.metrics_enabled = False
+        for terminal in self._terminals:
+            terminal.disable_metrics()
+        if self._metrics_job:
+            self.after_cancel(self._metrics_job)
+            self._metrics_job = None
+
+    def metrics(self) -> dict:
+        """Metrics of all the terminals: counters and histograms are merged,
+        scrollback sizes and queue depths are summed. The time to interactive
+        is the one of the active terminal. Empty while disabled."""
+
+        if not self.metrics_enabled:
+            return {}
+
+        merged = Metrics()
+        gauges = {}
+        for terminal in self._terminals:
+            if terminal.session.metrics is not None:
+                merged.merge(terminal.session.metrics)
+            for name, value in terminal.gauges().items():
+                gauges[name] = gauges.get(name, 0) + value
+
+        active = self.active_terminal
+        return {
+            "terminals": len(self._terminals),
+            **merged.snapshot(),
+            **gauges,
+            "time_to_interactive": active and active.time_to_interactive,
+        }
+
+    def set_cwd(self, cwd: str) -> None:
+        """Set current working directory for all terminals.
+
+        Args:
+            cwd (str): Directory path."""
+
+        self.cwd = cwd
+
+    def open_shell(self, shell: Terminal) -> None:
+        """Creates an instance and opens a shell.
+
+        Args:
+            shell (Terminal): Shell type to open (not instance)
+                use add_terminal() to add existing instance."""
+
+        self.add_terminal(
+            shell(self, cwd=self.cwd or get_home_directory(), standalone=False)
+        )
+
+    def open_another_terminal(self, cwd: str = None) -> None:
+        """Opens another instance of the active terminal.
+
+        Args:
+            cwd (str): Directory path."""
+
+        self.add_terminal(
+            self.active_terminal_type(
+                self, cwd=cwd or self.cwd or get_home_directory(), standalone=False
+            )
+        )
+
+    def delete_all_terminals(self, *_) -> None:
+        """Permanently delete all terminal instances."""
+
+        for terminal in list(self._terminals):
+            terminal.destroy()
+
+        self.tabs.clear_all_tabs()
+        self._terminals.clear()
+        self.refresh()
+
+    def delete_terminal(self, terminal: Terminal) -> None:
+        """Permanently delete a terminal instance.
+
+        Args:
+            terminal (Terminal): Terminal instance to delete."""
+
+        terminal.destroy()
+        self._terminals.pop(terminal, None)
+
+    def delete_active_terminal(self, *_) -> None:
+        """Permanently delete the active terminal."""
+
+        try:
+            self.tabs.close_active_tab()
+        except IndexError:
+            pass
+
+    def set_active_terminal(self, terminal: Terminal) -> None:
+        """Switch tabs to the terminal.
+
+        Args:
+            terminal (Terminal): Terminal instance to switch to."""
+
+        if tab := self.tabs.get_tab(terminal):
+            tab.select()
+
+    def set_active_terminal_by_name(self, name: str) -> None:
+        """Switch tabs to the terminal by name.
+
+        Args:
+            name (str): Name of the terminal to switch to."""
+
+        if tab := self.tabs.get_tab_by_name(name):
+            tab.select()
+
+    def clear_terminal(self, *_) -> None:
+        """Clear text in the active terminal."""
+
+        if active := self.active_terminal:
+            active.clear()
+
+    def run_command(self, command: str) -> None:
+        """Run a command in the active terminal. If there is no active terminal,
+        create a default terminal and run the command once its shell is ready.
+
+        Args:
+            command (str): Command to run."""
+
+        if not self.active_terminal:
+            self.add_default_terminal().run_command(command)
+        else:
+            self.active_terminal.run_command(command)
+
+    @staticmethod
+    def run_in_external_console(self, command: str) -> None:
+        """Run a command in an external console.
+
+        Args:
+            command (str): Command to run."""
+
+        match platform.system():
+            case "Windows":
+                subprocess.Popen(["start", "cmd", "/K", command], shell=True)
+            case "Linux":
+                subprocess.Popen(["x-terminal-emulator", "-e", command])
+            case "Darwin":
+                subprocess.Popen(["open", "-a", "Terminal", command])
+            case _:
+                print("No terminal emulator detected.")
+
+    def open_pwsh(self, *_):
+        """Create a Powershell terminal instance and open it"""
+
+        self.open_shell(get_shell_from_name("Powershell"))
+
+    def open_cmd(self, *_):
+        """Create a Command Prompt terminal instance and open it"""
+
+        self.open_shell(get_shell_from_name("Command Prompt"))
+
+    def open_bash(self, *_):
+        """Create a Bash terminal instance and open it"""
+
+        self.open_shell(get_shell_from_name("Bash"))
+
+    def open_python(self, *_):
+        """Create a Python terminal instance and open it"""
+
+        self.open_shell(get_shell_from_name("Python"))
+
+    @property
+    def active_terminal_type(self) -> Terminal:
+        """Get the type of the active terminal. If there is no active
+        terminal, return Default type."""
+
+        if active := self.active_terminal:
+            return type(active)
+
+        return Default
+
+    @property
+    def active_terminal(self) -> Terminal:
+        """Get the active terminal instance."""
+
+        if not self.tabs.active_tab:
+            return
+
+        return self.tabs.active_tab.terminal
+
+    def refresh(self, *_) -> None:
+        """Generates <<Empty>> event that can be bound to hide the terminal
+        if there are no active terminals."""
+
+        if not self._terminals:
+            self.event_generate("<<Empty>>", when="tail")
@@ -1,71 +1,222 @@
 import tkinter as tk
 
+from .history import History
+
 
 class TerminalText(tk.Text):
     """Text widget used to display the terminal output and to get the user input.
 
     Limits the editable area to text after the input mark and prevents deletion
-    before the input mark. Also, it keeps a history of previously used commands.
+    before the input mark. Also, it keeps a history of previously used commands:
+    Up and Down step through the commands starting with the typed text, and
+    Ctrl-R starts a fuzzy reverse search of the history. `history` can be
+    replaced by a persisted one shared with other terminals.
+
+    When `max_scrollback_lines` is set, the oldest lines are trimmed once the
+    output grows past the limit. Trimming is done in batches of `trim_batch`
+    lines so that the cost of deleting is amortized over many inserts.
 
     Args:
         master (tkinter.Tk, optional): The parent widget.
         proxy_enabled (bool, optional): Whether the proxy is enabled. Defaults to True.
+        max_scrollback_lines (int, optional): Maximum number of lines kept. Defaults to None (unbounded).
     """
 
-    def __init__(self, master=None, proxy_enabled: bool = True, **kw) -> None:
+    def __init__(
+        self,
+        master=None,
+        proxy_enabled: bool = True,
+        max_scrollback_lines: int = None,
+        **kw
+    ) -> None:
         super().__init__(master, **kw)
         self.master = master
 
+        self.max_scrollback_lines = max_scrollback_lines
+        self._line_count = 1
+
         self.mark_set("input", "insert")
         self.mark_gravity("input", "left")
 
         self.proxy_enabled = proxy_enabled
         self.config(highlightthickness=0)
 
-        self._history = []
-        self._history_level = 0
+        self.history = History()
+        # commands Up and Down step through, newest first, None when not
+        # navigating. Level -1 is the text typed before navigating
+        self._history_matches = None
+        self._history_level = -1
+        self._history_typed = ""
+        self._history_shown = ""
         self.bind("<Up>", self.history_up)
         self.bind("<Down>", self.history_down)
 
+        # reverse search, its key bindings come before those of the widget
+        self._search_query = None
+        self._search_typed = ""
+        self._search_results = []
+        self._search_level = 0
+        self._search_label = tk.Label(self, anchor=tk.W)
+        self._search_bindtag = f"{self}_search"
+        self.bind_class(self._search_bindtag, "<Key>", self._search_key)
+        self.bind("<Control-r>", self.reverse_search)
+
         self._orig = self._w + "_orig"
         self.tk.call("rename", self._w, self._orig)
         self.tk.createcommand(self._w, self._proxy)
 
     def history_up(self, *_) -> None:
-        """moves up the history and displays it"""
+        """moves up the history (to older commands) and displays it"""
+
+        typed = self.get("input", "end-1c")
+        if self._history_matches is None or typed != self._history_shown:
+            # the typed text is the prefix of the commands stepped through
+            self._history_typed = typed
+            self._history_matches = (
+                self.history.prefix(typed) if typed else self.history.entries[::-1]
+            )
+            self._history_level = -1
+
+        if self._history_level + 1 < len(self._history_matches):
+            self._history_level += 1
+            self._show_history_entry()
+        return "break"
 
-        if not self._history:
-            return "break"
+    def history_down(self, *_) -> None:
+        """moves down the history (to newer commands) and displays it"""
 
-        self._history_level = max(self._history_level - 1, 0)
-        self.mark_set("insert", "input")
-        self.delete("input", "end")
-        self.insert("input", self._history[self._history_level])
+        if (
+            self._history_matches is None
+            or self.get("input", "end-1c") != self._history_shown
+        ):
+            return "break"
 
+        if self._history_level >= 0:
+            self._history_level -= 1
+            self._show_history_entry()
         return "break"
 
-    def history_down(self, *_) -> None:
-        """moves down the history and displays it"""
+    def _show_history_entry(self) -> None:
+        if self._history_level < 0:
+            command = self._history_typed
+        else:
+            command = self._history_matches[self._history_level]
+        self.set_input(command)
+        self._history_shown = command
 
-        if not self._history:
-            return "break"
+    def set_input(self, command: str) -> None:
+        """replaces the text typed after the prompt"""
 
-        self._history_level = min(self._history_level + 1, len(self._history) - 1)
         self.mark_set("insert", "input")
         self.delete("input", "end")
-        self.insert("input", self._history[self._history_level])
-
-        return "break"
+        self.insert("input", command)
 
     def register_history(self, command: str) -> None:
         """registers a command in the history"""
 
-        # don't register empty commands or duplicates
-        if command.strip() and (
-            not self._history or command.strip() != self._history[-1]
-        ):
-            self._history.append(command.strip())
-        self._history_level = len(self._history)
+        # empty commands and consecutive duplicates are not kept
+        self.history.add(command)
+        self._history_matches = None
+
+    def reverse_search(self, *_) -> str:
+        """starts a fuzzy search of the history, the next match on Ctrl-R
+
+        typed characters refine the search, Return runs the match, Escape or
+        Ctrl-G restore the input, other keys keep the match for editing"""
+
+        if self._search_query is None:
+            self._search_query = ""
+            self._search_typed = self.get("input", "end-1c")
+            self._search_results = []
+            self._search_level = 0
+            self.bindtags((self._search_bindtag,) + self.bindtags())
+            self._search_label.config(bg=self["bg"], fg=self["fg"], font=self["font"])
+            self._search_label.place(relx=0, rely=1, relwidth=1, anchor=tk.SW)
+        elif self._search_level + 1 < len(self._search_results):
+            self._search_level += 1
+        self._update_search()
+        return "break"
+
+    def _update_search(self) -> None:
+        match = ""
+        if self._search_results:
+            match = self._search_results[self._search_level]
+            self.set_input(match)
+        failed = "failed " if self._search_query and not match else ""
+        self._search_label.config(
+            text=f"({failed}reverse-i-search)`{self._search_query}': {match}"
+        )
+
+    def _search_key(self, event: tk.Event) -> str:
+        """handles the keys typed during a reverse search"""
+
+        control = event.state & 0x4
+        if control and event.keysym == "r":
+            return self.reverse_search()
+        if event.keysym == "Escape" or control and event.keysym == "g":
+            self._end_search()
+            self.set_input(self._search_typed)
+            return "break"
+        if event.keysym == "BackSpace" or event.char and not control:
+            if event.keysym == "BackSpace":
+                self._search_query = self._search_query[:-1]
+            else:
+                self._search_query += event.char
+            self._search_results = (
+                self.history.search(self._search_query) if self._search_query else []
+            )
+            self._search_level = 0
+            self._update_search()
+            return "break"
+        if event.keysym.startswith(("Shift", "Control", "Alt", "Meta", "Super")):
+            return "break"
+
+        # any other key (Return, arrows...) keeps the match and is handled
+        # by the widget as usual
+        self._end_search()
+
+    def _end_search(self) -> None:
+        self._search_query = None
+        self._search_label.place_forget()
+        self.bindtags(tuple(i for i in self.bindtags() if i != self._search_bindtag))
+
+    @property
+    def trim_batch(self) -> int:
+        """number of lines over the limit tolerated before trimming"""
+
+        return max(self.max_scrollback_lines // 10, 1)
+
+    def append(self, output: str, tag="", *args) -> None:
+        """inserts output at the end and trims the scrollback if it is over the limit
+
+        more output and tag pairs can follow, all of them are inserted at once"""
+
+        self.insert("end", output, tag, *args)
+
+        if not self.max_scrollback_lines:
+            return
+
+        self._line_count += output.count("\n")
+        for chars in args[::2]:
+            self._line_count += chars.count("\n")
+        if self._line_count > self.max_scrollback_lines + self.trim_batch:
+            self.trim_scrollback()
+
+    def trim_scrollback(self) -> None:
+        """deletes the oldest lines that are over the scrollback limit"""
+
+        # resync the counter, user input can add or remove lines as well
+        self._line_count = int(self.index("end-1c").split(".")[0])
+        excess = self._line_count - self.max_scrollback_lines
+        if excess <= 0:
+            return
+
+        self.proxy_enabled = False
+        try:
+            self.delete("1.0", f"{excess + 1}.0")
+        finally:
+            self.proxy_enabled = True
+        self._line_count -= excess
 
     def clear(self, *_) -> None:
         """clears the text"""
@@ -75,6 +226,7 @@ class TerminalText(tk.Text):
         lastline = self.get("input linestart", "input")
         self.delete("1.0", "end")
         self.insert("end", lastline)
+        self._line_count = 1
 
         self.proxy_enabled = True
 
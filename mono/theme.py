@@ -7,6 +7,8 @@ class Theme:
         abg (str): Active background color.
         afg (str): Active foreground color.
         border (str): Border color.
+        ansi (tuple): The 16 ANSI colors used for colored output (black, red, green,
+            yellow, blue, magenta, cyan, white, then their bright variants).
         tabbar (str): Tab bar background color. This can be modified only after initialization.
         tab (tuple): Tab color scheme. This can be modified only after initialization.
         tabs (tuple): Tabs color scheme. This can be modified only after initialization.
@@ -20,6 +22,12 @@ class Theme:
     abg = "#2C2D2D"
     afg = "#CCCCCC"
     border = "#2A2A2A"
+    ansi = (
+        "#484F58", "#FF7B72", "#3FB950", "#D29922",
+        "#58A6FF", "#BC8CFF", "#39C5CF", "#B1BAC4",
+        "#6E7681", "#FFA198", "#56D364", "#E3B341",
+        "#79C0FF", "#D2A8FF", "#56D4DD", "#FFFFFF",
+    )
 
     def __init__(self) -> None:
         self.tabbar = self.bg
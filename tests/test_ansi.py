@@ -0,0 +1,64 @@
+import pytest
+
+from mono.ansi import CSI, ESC, OSC, SGR, Control, CursorMove, Parser, Text, Title
+
+
+@pytest.fixture
+def parser():
+    return Parser()
+
+
+def test_text(parser):
+    assert parser.feed("hello\r\nworld\tx") == [Text("hello\nworld\tx")]
+
+
+def test_sequences(parser):
+    assert parser.feed("\x1b[1;31mred\x1b[0m\r\x1b[2K\x1b[5;1H\x1b[?1049h\x1b7") == [
+        SGR((1, 31)),
+        Text("red"),
+        SGR((0,)),
+        Control("\r"),
+        CSI("K", (2,)),
+        CursorMove("H", (5, 1)),
+        CSI("h", (1049,), "?"),
+        ESC("7"),
+    ]
+
+
+def test_osc(parser):
+    assert parser.feed("\x1b]0;title\x07\x1b]133;D;0\x1b\\ok") == [
+        Title("title"),
+        OSC("133", "D;0"),
+        Text("ok"),
+    ]
+
+
+def test_truecolor_subparams(parser):
+    assert parser.feed("\x1b[38:2::1:2:3m") == [SGR((38, 2, 1, 2, 3))]
+
+
+def test_split_sequences(parser):
+    stream = "a\x1b[38;5;208mb\x1b]0;some title\x07c\x1bPq#0\x1b\\d\x1b[0m"
+    expected = parser.feed(stream)
+
+    for size in range(1, 8):
+        parser = Parser()
+        events = []
+        for i in range(0, len(stream), size):
+            events.extend(parser.feed(stream[i : i + size]))
+
+        assert "".join(e.text for e in events if isinstance(e, Text)) == "abcd"
+        assert [e for e in events if not isinstance(e, Text)] == [
+            e for e in expected if not isinstance(e, Text)
+        ]
+
+
+def test_malformed_sequence(parser):
+    assert parser.feed("a\x1b[1\nb") == [Text("a"), Text("[1\nb")]
+    assert parser.pending == ""
+
+
+def test_split_carriage_return(parser):
+    assert parser.feed("50%\r") == [Text("50%")]
+    assert parser.feed("\nok\r") == [Text("\nok")]
+    assert parser.feed("done") == [Control("\r"), Text("done")]
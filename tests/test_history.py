@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from mono import history
+from mono.history import History, get_history
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "history" / "bash")
+
+
+def test_add(path):
+    h = History(path)
+    for command in ("ls", "ls", " git status ", "", "ls"):
+        h.add(command)
+
+    assert h.entries == ["ls", "git status", "ls"]
+
+
+def test_persisted(path):
+    h = History(path, flush_interval=0.01)
+    h.add("echo 'a\\nb'")
+    h.add("for i in 1 2\ndo echo $i\ndone")
+    h.add("ls")
+    h.close()
+
+    # appended to by another process meanwhile
+    with open(path, "a") as f:
+        f.write("pwd\n")
+
+    loaded = History(path)
+    assert loaded._entries is None
+    assert loaded.entries == [
+        "echo 'a\\nb'",
+        "for i in 1 2\ndo echo $i\ndone",
+        "ls",
+        "pwd",
+    ]
+
+
+def test_saved_in_background(path):
+    h = History(path, flush_interval=0.01)
+    h.add("ls")
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and not History(path).entries:
+        time.sleep(0.01)
+    assert History(path).entries == ["ls"]
+    h.close()
+
+
+def test_prefix():
+    h = History()
+    for command in ("git status", "git log", "ls", "git status", "git push"):
+        h.add(command)
+
+    assert h.prefix("git") == ["git push", "git status", "git log"]
+    h.add("git log")
+    assert h.prefix("git ") == ["git log", "git push", "git status"]
+    assert h.prefix("gitx") == []
+
+
+def test_search():
+    h = History()
+    for command in ("make test", "git status", "grep -r Test", "git stash"):
+        h.add(command)
+
+    # substring matches first, then fuzzy ones, newest first
+    assert h.search("st") == ["git stash", "grep -r Test", "git status", "make test"]
+    assert h.search("gst") == ["git stash", "grep -r Test", "git status"]
+    # case sensitive with uppercase
+    assert h.search("Test") == ["grep -r Test"]
+    assert h.search("st", limit=2) == ["git stash", "grep -r Test"]
+
+
+def test_large():
+    h = History()
+    h._entries = [f"command {i} --flag" for i in range(200_000)]
+
+    start = time.perf_counter()
+    assert h.prefix("command 199999")[0] == "command 199999 --flag"
+    assert h.search("c199999f") == ["command 199999 --flag"]
+    h.prefix("command 1")
+    assert h.search("flag", limit=3) == [
+        "command 199999 --flag",
+        "command 199998 --flag",
+        "command 199997 --flag",
+    ]
+    assert time.perf_counter() - start < 5
+
+
+def test_shared(monkeypatch, tmp_path):
+    monkeypatch.setattr(history, "DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(history, "_histories", {})
+
+    assert get_history("Bash") is get_history("Bash")
+    assert get_history("Command Prompt").path == str(tmp_path / "Command_Prompt")
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+from mono.shells import SHELLS, get_shell_from_name, register_shell
+
+
+def test_import_is_lazy():
+    code = "import sys, mono; print(sorted(m for m in sys.modules if m.startswith(('tkinter', 'mono.'))))"
+    loaded = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert loaded.strip() == "[]"
+
+
+def test_shells_resolved_on_first_use():
+    register_shell("Lazy", "mono.session:Session")
+    try:
+        assert "Lazy" in SHELLS
+        assert isinstance(SHELLS._shells["Lazy"], str)
+
+        from mono.session import Session
+
+        assert get_shell_from_name("Lazy") is Session
+        assert SHELLS._shells["Lazy"] is Session
+    finally:
+        del SHELLS["Lazy"]
+
+
+def test_unknown_shell_is_default():
+    from mono.shells.default import Default
+
+    assert get_shell_from_name("Unknown") is Default
+
+
+def test_default_chdir_command():
+    from mono.shells.default import Default
+
+    # resolved shells without creating a widget
+    terminal = object.__new__(Default)
+    terminal.name = "cmd"
+    assert terminal.chdir_command("D:\\work dir") == 'cd /d "D:\\work dir"'
+    terminal.name = "bash"
+    assert terminal.chdir_command("/tmp/a b") == "cd '/tmp/a b'"
@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+
+from mono.metrics import Histogram, Metrics
+from mono.session import Session
+
+
+def test_histogram():
+    histogram = Histogram(unit=1e-6)
+    for i in range(1, 101):
+        histogram.observe(i * 1e-5)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["mean"] == pytest.approx(505e-6)
+    assert snapshot["max"] == pytest.approx(1e-3)
+    # estimates are the bound of a power of two bucket
+    assert 250e-6 <= snapshot["p50"] <= 1e-3
+    assert snapshot["p50"] <= snapshot["p90"] <= snapshot["p99"] <= snapshot["max"]
+
+
+def test_merge():
+    a, b = Metrics(), Metrics()
+    a.bytes_read, b.bytes_read = 10, 5
+    a.parse.observe(1e-3)
+    b.parse.observe(2e-3)
+    a.merge(b)
+
+    snapshot = a.snapshot()
+    assert snapshot["bytes_read"] == 15
+    assert snapshot["parse"]["count"] == 2
+    assert snapshot["parse"]["max"] == 2e-3
+
+
+def test_disabled_by_default():
+    session = Session()
+    session.feed("output")
+    session.process()
+    assert session.metrics is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix shell")
+def test_session_metrics():
+    session = Session(["/bin/sh"], autoprocess=True)
+    metrics = session.enable_metrics()
+    session.start()
+    session.run_command("echo done")
+
+    deadline = time.monotonic() + 5
+    while "done" not in session.scrollback.lines(0, len(session.scrollback)):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    session.run_command("exit")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["reads"] > 0
+    assert snapshot["bytes_read"] >= len("done\r\n")
+    assert snapshot["parse"]["count"] == snapshot["process"]["count"] > 0
@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from mono.pool import PtyPool
+from mono.session import Session
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="posix shell")
+
+
+def wait(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def lines(session):
+    return session.scrollback.lines(0, len(session.scrollback))
+
+
+@pytest.fixture
+def pool():
+    pool = PtyPool(size=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_acquire(pool, tmp_path):
+    assert pool.acquire(["/bin/sh"]) is None
+    assert wait(lambda: len(pool) == 2)
+
+    pty = pool.acquire(["/bin/sh"], cwd=str(tmp_path))
+    assert pty is not None and not pty.closed
+    session = Session(["/bin/sh"], autoprocess=True)
+    metrics = session.enable_metrics()
+    session.start(pty=pty)
+    session.run_command("echo mono-$((40 + 2))")
+
+    assert wait(lambda: "mono-42" in lines(session))
+    # read like the output of a pty of its own
+    assert metrics.reads > 0
+    # topped up again in the background
+    assert wait(lambda: len(pool) == 2)
+    session.run_command("exit")
+
+
+def test_ttl():
+    pool = PtyPool(size=1, ttl=0.2)
+    pool.warm(["/bin/sh"])
+    assert wait(lambda: len(pool) == 1)
+    member = pool._members[pool._key(["/bin/sh"])][0]
+
+    # not asked for again, the member is killed and not replaced
+    time.sleep(0.3)
+    with pool._condition:
+        pool._condition.notify()
+    assert wait(lambda: not pool._wanted)
+    assert len(pool) == 0
+    assert wait(lambda: not member.p.isalive())
+    pool.shutdown()
+
+
+def test_shutdown(pool):
+    pool.warm(["/bin/sh"])
+    assert wait(lambda: len(pool) == 2)
+    members = pool._members[pool._key(["/bin/sh"])][:]
+
+    pool.shutdown()
+    assert len(pool) == 0
+    assert all(not member.p.isalive() for member in members)
+    assert pool.acquire(["/bin/sh"]) is None
+
+
+def test_not_kept_alive():
+    import gc
+    import weakref
+
+    ref = weakref.ref(PtyPool())
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,23 @@
+import os
+import signal
+
+import pytest
+
+from mono.reaper import Reaper, close_pty, terminate
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="posix signals")
+
+
+def test_terminate_while_reaped():
+    from ptyprocess import PtyProcess
+
+    # polling as often as possible
+    reaper = Reaper(interval=0)
+    for i in range(100):
+        p = PtyProcess.spawn(["/bin/sh", "-c", f"sleep 0.00{i % 5}"])
+        # the reaper collects the exit status of the same child meanwhile
+        reaper.watch(p, lambda status: None)
+
+        assert terminate(p, timeout=0.5) in (0, -signal.SIGHUP)
+        reaper.unwatch(p)
+        close_pty(p)
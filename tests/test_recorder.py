@@ -0,0 +1,59 @@
+import gzip
+import json
+
+from mono.recorder import Recorder
+from mono.session import Session
+
+
+def read(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        header, *events = map(json.loads, f)
+    return header, events
+
+
+def test_record_session(tmp_path):
+    session = Session(rows=10, cols=40)
+    session.start_recording(tmp_path / "session.cast.gz", flush_interval=0.01)
+    session.feed("hello\r\n")
+    session.resize(20, 60)
+    session.feed("\x1b[31mworld\x1b[0m")
+    # bytes read from the pty are decoded by the writer
+    session.feed("é".encode()[:1])
+    session.feed("é".encode()[1:])
+    session.stop_recording()
+
+    header, events = read(str(tmp_path / "session.cast.gz"))
+    assert (header["version"], header["width"], header["height"]) == (2, 40, 10)
+    assert [event[1:] for event in events] == [
+        ["o", "hello\r\n"],
+        ["r", "60x20"],
+        ["o", "\x1b[31mworld\x1b[0mé"],
+    ]
+    assert events == sorted(events)
+
+
+def test_rotation(tmp_path):
+    with Recorder(tmp_path / "log.cast", max_size=1000, flush_interval=60) as recorder:
+        for i in range(100):
+            recorder.output(f"line {i}\n")
+            recorder._write()
+
+    assert len(recorder.files) > 1
+    output = ""
+    for path in recorder.files:
+        header, events = read(path)
+        assert header["version"] == 2
+        output += "".join(data for _, _, data in events)
+    assert output == "".join(f"line {i}\n" for i in range(100))
+
+
+def test_bounded_queue(tmp_path):
+    with Recorder(tmp_path / "log.cast", max_events=10, flush_interval=60) as recorder:
+        for i in range(25):
+            recorder.output(str(i))
+        assert recorder.dropped == 15
+
+    _, events = read(recorder.files[0])
+    assert "".join(data for _, code, data in events if code == "o") == "0123456789"
+    assert events[-1][1:] == ["m", "dropped 15 events"]
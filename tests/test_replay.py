@@ -0,0 +1,41 @@
+from mono.recorder import Recorder
+from mono.replay import read_cast, replay
+from mono.session import Session
+
+
+def record(path):
+    with Recorder(path, width=40, height=10) as recorder:
+        recorder.output("\x1b[1mbuild\x1b[0m\r\n")
+        recorder.resize(20, 60)
+        for i in range(100):
+            recorder.output(f"step {i}\r\n")
+        recorder.input("q")
+
+
+def test_replay(tmp_path):
+    path = tmp_path / "build.cast.gz"
+    record(path)
+
+    header, events = read_cast(path)
+    assert (header["width"], header["height"]) == (40, 10)
+
+    session = Session(rows=10, cols=40)
+    stats = replay(session, events, frame_budget=100, read_size=10)
+
+    assert session.scrollback.line(0) == "build"
+    assert session.scrollback.line(100) == "step 99"
+    assert (session.screen.rows, session.screen.cols) == (20, 60)
+    assert stats.bytes == len("\x1b[1mbuild\x1b[0m\r\n") + sum(
+        len(f"step {i}\r\n") for i in range(100)
+    )
+    assert stats.frames == len(stats.frame_times) > 1
+    assert 0 < stats.percentile(50) <= stats.percentile(100)
+
+
+def test_replay_real_time(tmp_path):
+    path = tmp_path / "build.cast"
+    record(path)
+
+    _, events = read_cast(path)
+    stats = replay(Session(), events, speed=100)
+    assert stats.bytes > 0
@@ -0,0 +1,82 @@
+import pytest
+
+from mono.ansi import Parser
+from mono.screen import Screen
+from mono.tags import Style
+
+
+@pytest.fixture
+def screen():
+    return Screen(rows=4, cols=10)
+
+
+def feed(screen, data):
+    screen.feed(Parser().feed(data))
+
+
+def test_draw_and_wrap(screen):
+    feed(screen, "hello\r\nworld, wrapped")
+    assert screen.display == ["hello     ", "world, wra", "pped      ", " " * 10]
+    assert (screen.y, screen.x) == (2, 4)
+
+
+def test_scroll(screen):
+    feed(screen, "1\r\n2\r\n3\r\n4\r\n5")
+    assert [line.strip() for line in screen.display] == ["2", "3", "4", "5"]
+
+
+def test_cursor_addressing_and_erase(screen):
+    feed(screen, "aaaaaaaaaa\x1b[1;4Hxy\x1b[K\x1b[3;2Hz")
+    assert screen.line(0) == "aaaxy     "
+    assert screen.line(2) == " z        "
+
+
+def test_insert_delete(screen):
+    feed(screen, "abcdef\x1b[1;2H\x1b[2@\x1b[1;6H\x1b[1P")
+    assert screen.line(0) == "a  bcef   "
+    feed(screen, "\x1b[2;1H2\x1b[3;1H3\x1b[2;1H\x1b[L")
+    assert [line.strip() for line in screen.display][:4] == ["a  bcef", "", "2", "3"]
+
+
+def test_alternate_screen_and_damage(screen):
+    feed(screen, "shell$ ")
+    screen.take_dirty()
+
+    feed(screen, "\x1b[?1049h\x1b[H\x1b[31mtop\x1b[0m")
+    assert screen.alternate
+    assert sorted(screen.dirty) == [0, 1, 2, 3]
+    assert screen.runs(0) == [("top", Style(fg=1)), ("       ", Style())]
+
+    screen.take_dirty()
+    feed(screen, "\x1b[3;1Hx")
+    assert screen.take_dirty() == [2]
+
+    feed(screen, "\x1b[?1049l")
+    assert not screen.alternate
+    assert screen.line(0) == "shell$    "
+    assert (screen.y, screen.x) == (0, 7)
+
+
+def test_resize(screen):
+    feed(screen, "1\r\n2\r\n3\r\n4")
+    screen.resize(2, 5)
+    assert screen.display == ["3    ", "4    "]
+    assert screen.y == 1
+
+
+def test_styles_bounded():
+    screen = Screen(rows=2, cols=4, max_styles=16)
+    feed(screen, "\x1b[41mab\x1b[0m")
+    for i in range(100):
+        feed(screen, f"\x1b[1;3H\x1b[38;5;{i}mc")
+
+    assert len(screen.styles) <= 16
+    # the cells keep their styles
+    assert screen.runs(0) == [
+        ("ab", Style(bg=1)),
+        ("c", Style(fg=99)),
+        (" ", Style()),
+    ]
+
+    feed(screen, "\x1bc")
+    assert screen.styles == [Style()]
@@ -0,0 +1,65 @@
+import pytest
+
+from mono.scrollback import Scrollback
+from mono.tags import DEFAULT, Style
+
+RED = Style(fg=1)
+
+
+def test_lines():
+    scrollback = Scrollback(block_size=4)
+    for i in range(10):
+        scrollback.write(f"line {i}\n")
+    scrollback.write("$ ")
+
+    assert len(scrollback) == 11
+    assert scrollback.line(0) == "line 0"
+    assert scrollback.line(9) == "line 9"
+    assert scrollback.line(-1) == "$ "
+    assert scrollback.lines(3, 6) == ["line 3", "line 4", "line 5"]
+
+
+def test_runs():
+    scrollback = Scrollback(block_size=2)
+    scrollback.write("ok ")
+    scrollback.write("err", RED)
+    scrollback.write(" done\nplain\n")
+    scrollback.write("red\nred", RED)
+
+    assert scrollback.runs(0) == [("ok ", DEFAULT), ("err", RED), (" done", DEFAULT)]
+    assert scrollback.runs(1) == [("plain", DEFAULT)]
+    assert scrollback.runs(2) == [("red", RED)]
+    assert scrollback.runs(3) == [("red", RED)]
+
+
+def test_max_lines():
+    scrollback = Scrollback(max_lines=100, block_size=16)
+    for i in range(1000):
+        scrollback.write(f"{i}\n")
+
+    assert 100 <= len(scrollback) <= 100 + 2 * 16
+    assert scrollback.line(-2) == "999"
+    assert scrollback.start + len(scrollback) == scrollback.end == 1001
+    assert scrollback.line(0) == str(scrollback.start)
+
+
+def test_rewrite():
+    scrollback = Scrollback(block_size=4, editable=2)
+    for i in range(9):
+        scrollback.write(f"line {i}\n")
+    scrollback.write("$ ")
+
+    # the last two completed lines stay unpacked
+    assert scrollback.packed == 4
+    scrollback.rewrite(-2, [("line ", DEFAULT), ("8", RED)])
+    scrollback.rewrite(-1, [("> ", RED)])
+    assert scrollback.runs(8) == [("line ", DEFAULT), ("8", RED)]
+    assert scrollback.runs(-1) == [("> ", RED)]
+    with pytest.raises(IndexError):
+        scrollback.rewrite(0, [])
+
+    scrollback.truncate(7)
+    assert len(scrollback) == 8
+    assert scrollback.line(-1) == "line 7"
+    scrollback.write(" done\n")
+    assert scrollback.lines(6, 9) == ["line 6", "line 7 done", ""]
@@ -0,0 +1,72 @@
+import pytest
+
+from mono.scrollback import Scrollback
+from mono.search import Match, Search, SearchIndex
+from mono.session import Session
+
+
+@pytest.fixture
+def session():
+    session = Session()
+    session.scrollback = Scrollback(block_size=4)
+    for i in range(20):
+        session.scrollback.write(f"line {i} {'error' if i % 7 == 0 else 'ok'}\n")
+    session.scrollback.write("$ grep Error")
+    return session
+
+
+def test_plain(session):
+    search = session.search("error")
+    assert search.wait(5)
+    assert search.matches == [
+        Match(14, 8, 13),
+        Match(7, 7, 12),
+        Match(0, 7, 12),
+    ]
+
+
+def test_ignore_case_and_regex(session):
+    search = session.search("ERROR", ignore_case=True)
+    assert search.wait(5)
+    assert [m.line for m in search.matches] == [20, 14, 7, 0]
+
+    search = session.search(r"^line 1\d", regex=True)
+    assert search.wait(5)
+    assert [m.line for m in search.matches] == list(range(19, 9, -1))
+
+
+def test_streaming():
+    session = Session()
+    session.scrollback.write("match\n" * 1000)
+    batches = []
+    search = Search(session.scrollback, "match", callback=batches.append, batch_size=64)
+    assert search.wait(5)
+    assert all(len(batch) <= 64 for batch in batches)
+    assert sum(batches, []) == search.matches
+    assert len(search.matches) == 1000
+
+
+def test_index(session):
+    index = session.enable_search_index()
+    assert index.wait(5)
+    assert len(index) == 5
+
+    search = session.search("error")
+    assert search.wait(5)
+    assert len(search.matches) == 3
+    # 3 of the 5 blocks have no "error"
+    assert search.skipped == 2
+
+    # blocks are indexed as output arrives
+    session.feed("more output\n" * 8)
+    session.process()
+    assert index.wait(5)
+    assert len(index) == 7
+    session.disable_search_index()
+
+
+def test_index_bitmap():
+    index = SearchIndex(bits=1 << 10)
+    bitmap = index.bitmap(SearchIndex.trigrams("Hello world"))
+    assert index.may_contain(bitmap, SearchIndex.trigrams("WORLD"))
+    assert not index.may_contain(bitmap, SearchIndex.trigrams("zebra"))
@@ -0,0 +1,429 @@
+import asyncio
+import os
+import re
+import shutil
+import signal
+import sys
+import threading
+import time
+
+import pytest
+
+from mono.reactor import Reactor
+from mono.session import (
+    HISTORY_LINES,
+    Exited,
+    Output,
+    Result,
+    Rewrite,
+    ScreenChanged,
+    Session,
+    TitleChanged,
+)
+from mono.tags import Style
+
+
+@pytest.fixture
+def session():
+    return Session(rows=4, cols=10)
+
+
+def test_output_runs(session):
+    session.feed("plain \x1b[31mred\x1b[0m\r\nnext")
+    updates = session.process()
+
+    assert updates == [
+        Output([("plain ", Style()), ("red", Style(fg=1)), ("\nnext", Style())])
+    ]
+    assert session.scrollback.lines(0, 2) == ["plain red", "next"]
+    assert session.process() == []
+
+
+def test_alternate_screen_and_title(session):
+    received = []
+    session.subscribe(received.extend)
+
+    session.feed("before\x1b[?1049h\x1b]0;vim\x07full\x1b[?1049lafter")
+    session.process()
+
+    assert received == [
+        Output([("before", Style())]),
+        ScreenChanged(True),
+        TitleChanged("vim"),
+        ScreenChanged(False),
+        Output([("after", Style())]),
+    ]
+    assert session.title == "vim"
+    assert session.scrollback.line(0) == "beforeafter"
+
+
+def test_carriage_return(session):
+    session.feed("$ make\r\n")
+    session.process()
+    for i in range(0, 101, 10):
+        session.feed(f"\r{i:3}% \x1b[32m{'#' * (i // 10)}\x1b[0m")
+    updates = session.process()
+
+    # the first frame is appended, a single update for all the redraws
+    line = [("100% ", Style()), ("#" * 10, Style(fg=2))]
+    assert updates == [Output([("  0% ", Style())]), Rewrite(1, [line], 1)]
+    assert session.scrollback.lines(0, 3) == ["$ make", "100% ##########"]
+
+    session.feed("\rdone\x1b[K\r\nok")
+    session.process()
+    assert session.scrollback.lines(0, 3) == ["$ make", "done", "ok"]
+
+
+def test_cursor_up_and_erase(session):
+    session.feed("layer 1: waiting\nlayer 2: waiting\n")
+    session.process()
+    session.feed("\x1b[2A\x1b[2Klayer 1: done\n\x1b[2Klayer 2: 50%\n")
+    session.feed("\x1b[1A\x1b[2Klayer 2: done\nend")
+    updates = session.process()
+
+    lines = ["layer 1: done", "layer 2: done", "end"]
+    assert session.scrollback.lines(0, 4) == lines
+    assert updates == [Rewrite(0, [[(text, Style())] for text in lines], 2)]
+
+    # spinners, erasing below the cursor
+    session.feed("\n-\b\\\b|x\x1b[3D\x1b[1K")
+    session.feed("\x1b[2A\x1b[9G\x1b[J fine")
+    session.process()
+    assert session.scrollback.lines(0, 4) == ["layer 1: done", "layer 2: fine"]
+
+
+def test_cursor_clamped(session):
+    # right-aligned prompts move past the right margin
+    session.feed("ab\x1b[999C\x1b[2Dxy")
+    session.feed("\r\x1b[99999999999999999Gz\x1b[99999999999999999C")
+    session.process()
+
+    assert session.scrollback.line(0) == "ab     xyz"
+
+
+def test_bounded_by_default():
+    session = Session(rows=4, cols=10)
+    assert session.scrollback.max_lines == HISTORY_LINES
+    assert Session(max_scrollback_lines=None).scrollback.max_lines is None
+
+
+def test_budget(session):
+    session.feed("a" * 10)
+    session.feed("b" * 10)
+    session.process(budget=5)
+    assert session.pending == 1
+    assert session.scrollback.line(0) == "a" * 10
+
+
+def test_bytes_decoded_when_processed(session):
+    data = "naïve ✓ 😀\r\n".encode()
+    # split in the middle of every multibyte character
+    for i in range(0, len(data), 3):
+        session.feed(data[i : i + 3])
+    session.feed("text\r\n")
+    session.process(budget=5)
+    session.process()
+
+    assert session.scrollback.lines(0, 2) == ["naïve ✓ 😀", "text"]
+
+
+def wait(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def lines(session):
+    return session.scrollback.lines(0, len(session.scrollback))
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix shell")
+def test_spawn():
+    session = Session(["/bin/sh"], autoprocess=True)
+    session.start()
+    session.run_command("echo mono-$((40 + 2))")
+
+    assert wait(lambda: "mono-42" in lines(session))
+    assert session.ready_at > session.started_at
+    session.run_command("exit")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix shell")
+@pytest.mark.parametrize("pipeline", [1, 3])
+def test_command_queue(pipeline):
+    session = Session(["/bin/sh"], autoprocess=True, pipeline=pipeline)
+    for i in range(5):
+        session.run_command(f"echo out-$(({i} * 10))")
+    assert session.queued == 5
+
+    session.start()
+    assert wait(lambda: "out-40" in "".join(lines(session)))
+    # the echo of pipelined commands is mixed with the output, the echoed
+    # commands read "out-$((...", only the output has digits
+    outputs = re.findall(r"out-(\d+)", "\n".join(lines(session)))
+    assert outputs == [str(i * 10) for i in range(5)]
+    session.run_command("exit")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix shell")
+@pytest.mark.skipif(not shutil.which("bash"), reason="needs bash")
+def test_shell_integration():
+    from mono.shells.bash import INTEGRATION
+
+    session = Session(
+        ["bash", "--norc", "--noprofile"],
+        env={**os.environ, **INTEGRATION},
+        prompt=r"(?!)",
+        autoprocess=True,
+    )
+    session.run_command("echo ready")
+    session.start()
+
+    assert wait(lambda: "ready" in lines(session))
+    assert session._integrated
+    session.run_command("exit")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix shell")
+@pytest.mark.skipif(not shutil.which("bash"), reason="needs bash")
+def test_shell_integration_queue():
+    from mono.shells.bash import INTEGRATION
+
+    session = Session(
+        ["bash", "--norc", "--noprofile"],
+        env={**os.environ, **INTEGRATION},
+        prompt=r"(?!)",
+        autoprocess=True,
+    )
+    sent = []
+
+    def write(data, write=session.write):
+        sent.append((time.monotonic(), data))
+        write(data)
+
+    session.write = write
+    for i in range(3):
+        session.run_command(f"sleep 0.3; echo done-{i}")
+    session.start()
+
+    assert wait(lambda: "done-2" in lines(session))
+    assert [data for _, data in sent] == [
+        f"sleep 0.3; echo done-{i}\r" for i in range(3)
+    ]
+    # one at a time, each once the previous one completed
+    times = [t for t, _ in sent]
+    assert all(b - a >= 0.3 for a, b in zip(times, times[1:]))
+    session.close()
+
+
+def test_run_cleared(session):
+    async def main():
+        session.ready = session.alive = True
+        session.write = lambda data: None
+        task = asyncio.ensure_future(session.run("ls", timeout=5))
+        await asyncio.sleep(0)
+        session.feed("old\r\n" * 10 + "\x1b]777;mono;start;1\x07old\r\n")
+        session.process()
+        # cleared by the terminal while the command runs
+        session.scrollback.clear()
+        session.feed("new\r\n\x1b]777;mono;end;1;0\x07")
+        session.process()
+        return await task
+
+    assert asyncio.run(main()) == Result(0, "new\n")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix pty")
+def test_failing_subscriber(caplog):
+    reactor = Reactor()
+    broken = Session(["/bin/sh"], reactor=reactor, autoprocess=True)
+
+    def fail(updates):
+        raise RuntimeError("broken subscriber")
+
+    broken.subscribe(fail)
+    session = Session(["/bin/sh"], reactor=reactor, autoprocess=True)
+    broken.start()
+    session.start()
+
+    # the pty of the broken session is dropped, the other one is still read
+    assert wait(lambda: not broken.alive)
+    assert "broken subscriber" in caplog.text
+    session.run_command("echo mono-$((40 + 2))")
+    assert wait(lambda: "mono-42" in lines(session))
+    broken.close()
+    session.close()
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix shell")
+def test_run():
+    async def main():
+        sessions = [Session(["/bin/sh"], autoprocess=True) for _ in range(3)]
+        for session in sessions:
+            session.start()
+
+        results = await asyncio.gather(
+            *(
+                session.run(f"echo out-{i}; false", timeout=5)
+                for i, session in enumerate(sessions)
+            ),
+            sessions[0].run("printf 'a\\nb'", timeout=5),
+            sessions[1].run("printf '10%%\\r\\033[K100%%\\na\\rb\\n'", timeout=5),
+        )
+        for session in sessions:
+            session.run_command("exit")
+        return results
+
+    *results, last, progress = asyncio.run(main())
+    assert results == [Result(1, f"out-{i}\n") for i in range(3)]
+    assert last == Result(0, "a\nb")
+    # as shown, once rewritten
+    assert progress == Result(0, "100%\nb\n")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix pty")
+def test_backpressure_pause():
+    session = Session(["yes"], high_water=1 << 16)
+    session.start()
+
+    assert wait(lambda: session.paused)
+    time.sleep(0.1)
+    # the reader stopped, at most one more read was queued
+    assert session.backlog <= (1 << 16) + session.reactor.read_size
+
+    fed = session._fed
+    session.process(1 << 20)
+    # reading resumed
+    assert wait(lambda: session._fed > fed)
+    assert wait(lambda: session.paused)
+
+    # Ctrl-C goes through the flood and the backlog is skipped
+    session.interrupt()
+    assert session.backlog < 1 << 16
+    while session.alive or session.pending:
+        session.process()
+    assert session.skipped > 0
+    assert "characters skipped]" in "\n".join(lines(session))
+
+
+def test_backpressure_tail():
+    session = Session(high_water=1000, low_water=100, flood="tail")
+    session.feed("\x1b]133;A\x07")
+    for i in range(300):
+        session.feed(f"line {i}\r\n")
+    session.process()
+
+    assert session.skipped > 0
+    assert session.backlog == 0
+    # markers in the skipped output are still handled
+    assert session._integrated
+    output = lines(session)
+    assert output[-2] == "line 299"
+    assert any(line.endswith("characters skipped]") for line in output)
+    assert "line 0" not in output
+
+
+def test_backpressure_tail_bytes():
+    session = Session(high_water=1000, low_water=100, flood="tail")
+    metrics = session.enable_metrics()
+    data = b"\x1b]133;A\x07" + "é".encode() * 1000
+    # split in the middle of characters, read by the reactor as bytearrays
+    for i in range(0, len(data), 7):
+        session.feed(bytearray(data[i : i + 7]))
+    session.process()
+
+    # only the kept output is decoded, from a character boundary
+    assert metrics.decodes == 1
+    assert session._integrated
+    assert session.skipped > 0
+    assert set(lines(session)[-1]) == {"é"}
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix shell")
+def test_exit_status():
+    session = Session(["/bin/sh", "-c", "echo bye; exit 3"])
+    session.start()
+
+    assert session.exited.wait(5)
+    assert session.exit_status == 3
+    updates = []
+    assert wait(lambda: updates.extend(session.process()) or Exited(3) in updates)
+    # reported after the last output
+    assert updates[-1] == Exited(3)
+    assert "bye" in lines(session)
+    assert session.process() == []
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix signals")
+def test_close_escalates():
+    script = (
+        "import signal, time\n"
+        "signal.signal(signal.SIGHUP, signal.SIG_IGN)\n"
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+        "print('ready', flush=True)\n"
+        "time.sleep(30)"
+    )
+    session = Session([sys.executable, "-c", script], autoprocess=True)
+    session.start()
+    assert wait(lambda: "ready" in lines(session))
+
+    start = time.monotonic()
+    assert session.close(timeout=0.2) == -signal.SIGKILL
+    assert time.monotonic() - start < 2
+    assert session.exited.is_set() and not session.alive
+    # closing again is harmless
+    assert session.close() == -signal.SIGKILL
+
+
+@pytest.mark.skipif(os.name == "nt", reason="posix signals")
+def test_close_in_background():
+    script = (
+        "import signal, time\n"
+        "signal.signal(signal.SIGHUP, signal.SIG_IGN)\n"
+        "print('ready', flush=True)\n"
+        "time.sleep(30)"
+    )
+    session = Session([sys.executable, "-c", script], autoprocess=True)
+    session.start()
+    assert wait(lambda: "ready" in lines(session))
+
+    start = time.monotonic()
+    assert session.close(timeout=0.5, block=False) is None
+    # the escalation is not waited for
+    assert time.monotonic() - start < 0.1
+    assert not session.alive
+    assert session.exited.wait(5)
+    assert session.exit_status == -signal.SIGTERM
+
+
+def resources() -> tuple:
+    """Open descriptors, threads and resident memory in MB."""
+
+    with open("/proc/self/statm") as f:
+        rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    return len(os.listdir("/proc/self/fd")), threading.active_count(), rss
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="linux")
+def test_churn():
+    # MONO_CHURN=10000 for the full stress test
+    cycles = int(os.environ.get("MONO_CHURN", 50))
+
+    def cycle():
+        session = Session(["/bin/sh"])
+        session.start()
+        session.write("echo churn\n")
+        # hung up, and not a lost status
+        assert session.close() == -signal.SIGHUP
+        assert session.p.signalstatus == signal.SIGHUP
+
+    for _ in range(10):
+        cycle()
+    fds, threads, rss = resources()
+
+    for _ in range(cycles):
+        cycle()
+    assert wait(lambda: resources()[1] <= threads)
+    assert resources()[0] <= fds
+    assert resources()[2] - rss < 20
@@ -20,3 +20,49 @@ def test_terminals(terminals):
     assert terminals.active_terminals[0].alive
     assert terminals.active_terminals[0].shell
     assert terminals.active_terminals[0].icon != 'error'
+
+def test_many_tabs(root):
+    terminals = Terminals(root, lazy_spawn=True)
+    terminals.pack(fill=tk.BOTH, expand=True)
+    root.geometry("800x300")
+    for _ in range(100):
+        terminals.add_default_terminal()
+    root.update()
+
+    tabs = terminals.tabs
+    assert len(tabs) == 100
+    # widgets are only created for the visible tabs
+    assert len(tabs.winfo_children()) < 100
+
+    first = terminals.active_terminals[0]
+    terminals.set_active_terminal(first)
+    root.update()
+    assert terminals.active_terminal is first
+    assert [tab.terminal for tab in tabs if tab.selected] == [first]
+
+    terminals.delete_active_terminal()
+    assert len(tabs) == 99
+    assert terminals.active_terminal is terminals.active_terminals[0]
+    assert tabs.get_tab(first) is None
+    terminals.delete_all_terminals()
+
+def test_background_tabs(root):
+    terminals = Terminals(root, lazy_spawn=True)
+    first = terminals.add_default_terminal()
+    second = terminals.add_default_terminal()
+    assert not first.rendering and second.rendering
+
+    first.session.feed("hidden output\n" * 10)
+    first._flush()
+    assert "hidden output" not in first.text.get("1.0", "end")
+    terminals.set_active_terminal(first)
+    assert first.text.get("1.0", "end").count("hidden output") == 10
+
+    # only the tail once too much output arrived
+    second.catch_up_lines = 5
+    second.session.feed("".join(f"line {i}\n" for i in range(100)))
+    second._flush()
+    terminals.set_active_terminal(second)
+    text = second.text.get("1.0", "end")
+    assert "line 99" in text and "line 90" not in text
+    terminals.delete_all_terminals()
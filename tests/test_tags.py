@@ -0,0 +1,55 @@
+from mono.tags import DEFAULT, Style, TagCache, apply_sgr, palette_color
+from mono.theme import Theme
+
+
+def test_apply_sgr():
+    style = apply_sgr(DEFAULT, (1, 31))
+    assert style == Style(fg=1, bold=True)
+    assert apply_sgr(style, (22, 44)) == Style(fg=1, bg=4)
+    assert apply_sgr(style, (0,)) == DEFAULT
+    assert apply_sgr(style, ()) == DEFAULT
+
+
+def test_extended_colors():
+    assert apply_sgr(DEFAULT, (38, 5, 208)).fg == 208
+    assert apply_sgr(DEFAULT, (48, 2, 255, 0, 16)).bg == "#ff0010"
+    assert apply_sgr(DEFAULT, (97, 7)) == Style(fg=15, inverse=True)
+
+
+def test_palette_color():
+    theme = Theme()
+    assert palette_color(theme, 1) == theme.ansi[1]
+    assert palette_color(theme, 196) == "#ff0000"
+    assert palette_color(theme, 232) == "#080808"
+    assert palette_color(theme, "#123456") == "#123456"
+
+
+class Text:
+    """Tag calls of a Text widget without any text."""
+
+    def __init__(self) -> None:
+        self.tags = set()
+
+    def tag_configure(self, name: str, **options) -> None:
+        self.tags.add(name)
+
+    def tag_delete(self, name: str) -> None:
+        self.tags.remove(name)
+
+    def tag_nextrange(self, name: str, index: str) -> tuple:
+        return ()
+
+
+def test_evict_keeps_frame():
+    text = Text()
+    tags = TagCache(text, Theme(), ("Consolas", 11), max_tags=4)
+
+    # more new styles in one frame than half the limit
+    frame = [tags.tag(Style(fg=i)) for i in range(6)]
+    assert set(frame) <= text.tags
+
+    tags.end_frame()
+    tags.tag(Style(fg=6))
+    tags.tag(Style(fg=7))
+    assert len(tags) < 8
+    assert frame[0] not in text.tags